@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import subprocess
+
+# Ad-blocking benchmark: compiles a generated EasyList-style list of --rules
+# filters (or --list, a real one) into FilterEngine and times should_block()
+# per kind of request: hosts hit by a "||host^" anchor, hits undone by an
+# "@@" exception, "$third-party" rules seen from a third-party and from a
+# first-party page, "$domain=" rules on and off their domains, path rules
+# found through the token index, and clean misses. Every generated request
+# has a known answer, so a wrong decision fails the run. Requests are timed
+# twice: the first pass includes compiling rule regexes on first use. With
+# --output, the summary is appended as a JSON line tagged with the git commit.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import main as unibrowser
+
+# Share of each kind of rule in the generated list; the rest are path rules
+MIX = {"anchor": 0.55, "exception": 0.05, "third_party": 0.1, "domain": 0.1}
+WORDS = ("ad ads adserver banner track tracker pixel beacon analytics metrics stats "
+         "promo sponsor click counter collect telemetry tag sync").split()
+
+def word(rng):
+    return rng.choice(WORDS) + str(rng.randrange(100000))
+
+def generate(count, seed):
+    # The list, plus sample hosts/paths of each kind to build requests from
+    rng = random.Random(seed)
+    lines = []
+    kinds = {"anchor": [], "exception": [], "third_party": [], "domain": [], "path": []}
+    for i in range(count):
+        r = rng.random()
+        host = "%s.%s%d.com" % (word(rng), rng.choice(WORDS), i)
+        if r < MIX["anchor"]:
+            lines.append("||%s^" % host)
+            kinds["anchor"].append(host)
+        elif r < MIX["anchor"] + MIX["exception"]:
+            # Blocked as a whole, but one path of it is allowed again
+            path = "/%s/%s.js" % (word(rng), word(rng))
+            lines.append("||%s^" % host)
+            lines.append("@@||%s%s" % (host, path))
+            kinds["exception"].append((host, path))
+        elif r < MIX["anchor"] + MIX["exception"] + MIX["third_party"]:
+            lines.append("||%s^$third-party" % host)
+            kinds["third_party"].append(host)
+        elif r < MIX["anchor"] + MIX["exception"] + MIX["third_party"] + MIX["domain"]:
+            site = "%s%d.org" % (rng.choice(WORDS), i)
+            path = "/%s/%s" % (word(rng), word(rng))
+            lines.append("%s$script,domain=%s|www.%s" % (path, site, site))
+            kinds["domain"].append((site, path))
+        else:
+            path = "/%s/%s.gif" % (word(rng), word(rng))
+            lines.append(path + "^")
+            kinds["path"].append(path)
+    rng.shuffle(lines)
+    return lines, kinds
+
+def requests(kinds, n, seed):
+    # (case, url, host, first party host, resource type, expected) tuples
+    rng = random.Random(seed)
+    page = "news.example.net"
+    cases = []
+    for _ in range(n):
+        host = rng.choice(kinds["anchor"])
+        cases.append(("domain anchor", "https://cdn.%s/x.js" % host, "cdn." + host, page, "script", True))
+        host, path = rng.choice(kinds["exception"])
+        cases.append(("exception", "https://%s%s" % (host, path), host, page, "script", False))
+        cases.append(("exception (other path)", "https://%s/other.js" % host, host, page, "script", True))
+        host = rng.choice(kinds["third_party"])
+        cases.append(("third-party", "https://%s/p.gif" % host, host, page, "image", True))
+        cases.append(("third-party (first party)", "https://%s/p.gif" % host, host, "www." + host, "image", False))
+        site, path = rng.choice(kinds["domain"])
+        cases.append(("domain=", "https://static.cdn.net%s.js" % path, "static.cdn.net", "www." + site, "script", True))
+        cases.append(("domain= (other site)", "https://static.cdn.net%s.js" % path, "static.cdn.net", page, "script", False))
+        path = rng.choice(kinds["path"])
+        cases.append(("path", "https://img.example.com%s?x=1" % path, "img.example.com", page, "image", True))
+        cases.append(("miss", "https://www.example.com/assets/app-%d.js" % rng.randrange(10 ** 6),
+                      "www.example.com", page, "script", False))
+    return cases
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure FilterEngine compile and match times")
+    parser.add_argument("--rules", type=int, default=50000, help="Generated filters (exceptions add one more)")
+    parser.add_argument("--list", metavar="PATH", help="Also time a real EasyList file against the misses")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+
+    lines, kinds = generate(args.rules, args.seed)
+    engine = unibrowser.FilterEngine()
+    start = time.perf_counter()
+    for line in lines:
+        engine.add_filter(line)
+    if args.list:
+        engine.load_file(args.list)
+    compile_ms = (time.perf_counter() - start) * 1000
+    rules = {
+        "total": engine.rule_count,
+        "block_domain_anchors": sum(map(len, engine.block.domains.values())),
+        "block_tokenized": sum(map(len, engine.block.tokens.values())),
+        "block_untokenized": len(engine.block.untokenized),
+        "allow": (sum(map(len, engine.allow.domains.values())) + sum(map(len, engine.allow.tokens.values()))
+                  + len(engine.allow.untokenized)),
+    }
+    for name, value in rules.items():
+        print("%-28s %d" % (name + " rules", value))
+    print("%-28s %.0f ms" % ("compile", compile_ms))
+
+    # The first pass includes compiling each rule's regex on its first
+    # candidate URL; the second is the steady state
+    timings = ({}, {})
+    wrong = []
+    cases = requests(kinds, args.requests, args.seed)
+    for timing in timings:
+        for case, url, host, first_party, kind, expected in cases:
+            t = time.perf_counter()
+            blocked = engine.should_block(url, host, first_party, kind)
+            timing.setdefault(case, []).append((time.perf_counter() - t) * 1e6)
+            if blocked != expected and not args.list and timing is timings[0]:
+                wrong.append((case, url, first_party, blocked))
+    results = {}
+    print("%-26s %10s %10s %10s %10s" % ("should_block (us)", "first", "median", "p99", "max"))
+    for case, values in timings[1].items():
+        values.sort()
+        results[case] = {"first_median": round(statistics.median(timings[0][case]), 1),
+                         "median": round(statistics.median(values), 1),
+                         "p99": round(values[int(len(values) * 0.99) - 1], 1), "max": round(values[-1], 1)}
+        print("%-26s %10.1f %10.1f %10.1f %10.1f" % (case, results[case]["first_median"], results[case]["median"],
+                                                     results[case]["p99"], results[case]["max"]))
+    if wrong:
+        for case, url, first_party, blocked in wrong[:10]:
+            print("wrong: %s %s on %s -> %s" % (case, url, first_party, blocked), file=sys.stderr)
+        print("%d wrong decisions" % len(wrong), file=sys.stderr)
+        return 1
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "rules": rules,
+                  "compile_ms": round(compile_ms), "should_block_us": results}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
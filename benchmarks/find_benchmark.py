@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import subprocess
+
+# Find-in-page benchmark: opens a generated text page of --size MB in a
+# headless browser window (offscreen QPA, throwaway home directory), types
+# --query into the find bar one character every --interval ms and then steps
+# through matches with Enter. Reports how many searches actually ran, how
+# long after the last keystroke the "N of M" counter was right, the time per
+# next-match step, and the longest stall of the UI thread while it happened
+# (a 5 ms heartbeat timer). --debounce 0 searches on every keystroke, for
+# comparison. With --output, the summary is appended as a JSON line tagged
+# with the git commit.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = tempfile.mkdtemp(prefix="unibrowser-bench-")
+# Must be set before main is imported; its file locations are computed then
+os.environ["HOME"] = os.environ["USERPROFILE"] = HOME
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+
+import main as unibrowser
+from PyQt5.QtCore import QUrl, QTimer, QEventLoop
+from PyQt5.QtWidgets import QApplication
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua").split()
+
+def write_page(path, size, query, every):
+    # Plain words in paragraphs, with the query as one word in `every`
+    rng = random.Random(1)
+    matches = 0
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!doctype html><meta charset=utf-8><title>Find benchmark</title><body>\n")
+        while written < size:
+            words = []
+            for _ in range(200):
+                if rng.randrange(every) == 0:
+                    words.append(query)
+                    matches += 1
+                else:
+                    words.append(rng.choice(WORDS))
+            line = "<p>" + " ".join(words) + "</p>\n"
+            f.write(line)
+            written += len(line)
+    return matches
+
+def wait_for(condition, timeout):
+    # Runs the event loop until condition() holds; returns the ms it took, or None
+    start = time.perf_counter()
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: condition() and loop.quit())
+    timer.start(1)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    if not condition():
+        loop.exec_()
+    timer.stop()
+    return (time.perf_counter() - start) * 1000 if condition() else None
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure find-in-page on a large page")
+    parser.add_argument("--size", type=float, default=10, help="Page size in MB")
+    parser.add_argument("--query", default="needle")
+    parser.add_argument("--every", type=int, default=1000, help="One word in EVERY is the query")
+    parser.add_argument("--interval", type=int, default=60, help="ms between keystrokes")
+    parser.add_argument("--steps", type=int, default=20, help="Enter presses after typing")
+    parser.add_argument("--debounce", type=int, default=None,
+                        help="Override FIND_DEBOUNCE_MS (0 searches on every keystroke)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+
+    page = os.path.join(HOME, "find.html")
+    expected = write_page(page, int(args.size * 1024 * 1024), args.query, args.every)
+    with open(os.path.join(HOME, ".unibrowser_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"homepage": QUrl.fromLocalFile(page).toString()}, f)
+
+    app = QApplication(sys.argv)
+    window = unibrowser.UniBrowser()
+    if args.debounce is not None:
+        window.find_timer.setInterval(args.debounce)
+    tab = window.tab_widget.currentWidget()
+    if wait_for(lambda: tab.load_seconds is not None, args.timeout) is None:
+        print("page did not load", file=sys.stderr)
+        return 1
+
+    searches = []
+    tab.find_finished.connect(lambda t, active, matches: searches.append(matches))
+    stalls = {"last": time.perf_counter(), "max": 0.0}
+    def beat():
+        now = time.perf_counter()
+        stalls["max"] = max(stalls["max"], now - stalls["last"])
+        stalls["last"] = now
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(beat)
+    heartbeat.start(5)
+
+    window.show_find_bar()
+    stalls["last"] = time.perf_counter()
+    for i in range(1, len(args.query) + 1):
+        window.find_input.setText(args.query[:i])
+        if i < len(args.query):
+            wait_for(lambda: False, args.interval / 1000)
+    counted = wait_for(lambda: window.find_count_label.text() == "1 of %d" % expected, args.timeout)
+    if counted is None:
+        print("counter never showed 1 of %d (last: %r)" % (expected, window.find_count_label.text()),
+              file=sys.stderr)
+        return 1
+    typed_searches = len(searches)
+    steps = []
+    for i in range(2, args.steps + 2):
+        window.find_input.returnPressed.emit()
+        step = wait_for(lambda: window.find_count_label.text() == "%d of %d" % (i, expected), args.timeout)
+        if step is None:
+            print("step %d did not arrive" % i, file=sys.stderr)
+            return 1
+        steps.append(step)
+    heartbeat.stop()
+
+    summary = {
+        "page_mb": args.size,
+        "matches": expected,
+        "keystrokes": len(args.query),
+        "searches": typed_searches,
+        "count_after_last_key_ms": round(counted, 1),
+        "next_match_ms": round(sum(steps) / len(steps), 1),
+        "max_ui_stall_ms": round(stalls["max"] * 1000, 1),
+        "debounce_ms": window.find_timer.interval(),
+    }
+    for name, value in summary.items():
+        print("%-24s %s" % (name, value))
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "find": summary}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    window.close()
+    app.processEvents()
+    return 0
+
+if __name__ == "__main__":
+    try:
+        code = main()
+    finally:
+        shutil.rmtree(HOME, ignore_errors=True)
+    sys.exit(code)
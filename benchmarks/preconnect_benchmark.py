@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Preconnect benchmark: serves a page from local HTTP servers that hold every
+# new connection for --latency ms before answering (standing in for DNS, TCP
+# and TLS setup on a real network), then loads it in a headless page of a
+# throwaway off-the-record profile, once cold and once after Preconnector has
+# warmed the origin, and compares time-to-first-byte (Navigation Timing
+# responseStart). Every trial uses fresh ports so no pooled socket carries over.
+# With --output, the summary is appended as a JSON line tagged with the git commit.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+
+import main as unibrowser
+from PyQt5.QtCore import QObject, QUrl, QTimer, QEventLoop
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage
+
+PAGE = b"<!doctype html><title>Preconnect benchmark</title><p>Hello from Unibrowser</p>"
+TIMING_JS = """
+JSON.stringify((function () {
+    var nav = performance.getEntriesByType('navigation')[0];
+    return {ttfb: nav.responseStart};
+})())
+"""
+
+class SlowConnectServer(ThreadingHTTPServer):
+    daemon_threads = True
+    latency = 0
+
+    def get_request(self):
+        request = super().get_request()
+        time.sleep(self.latency)
+        return request
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+class Host(QObject):
+    # What Preconnector needs from a browser window
+    def __init__(self, profile):
+        super().__init__()
+        self.profile = profile
+        self.config = {"preconnect": {"budget": 1000, "cooldown_ms": 0}}
+
+    def web_profile(self):
+        return self.profile
+
+def serve(latency):
+    server = SlowConnectServer(("127.0.0.1", 0), Handler)
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def wait(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+def timed_load(page, url, timeout):
+    loop = QEventLoop()
+    result = {}
+    def finished(ok):
+        def timing(value):
+            result.update(json.loads(value) if value else {})
+            loop.quit()
+        page.runJavaScript(TIMING_JS, timing)
+    page.loadFinished.connect(finished)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    page.load(QUrl(url))
+    loop.exec_()
+    page.loadFinished.disconnect(finished)
+    if "ttfb" not in result:
+        raise RuntimeError("no timing for %s" % url)
+    return result
+
+def run_once(page, preconnector, latency, settle, timeout):
+    servers = [serve(latency / 1000), serve(latency / 1000)]
+    try:
+        cold_url, warm_url = ("http://127.0.0.1:%d/" % s.server_address[1] for s in servers)
+        cold = timed_load(page, cold_url, timeout)
+        preconnector.preconnect(warm_url)
+        wait(settle)
+        warm = timed_load(page, warm_url, timeout)
+        return cold, warm
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def stats(values):
+    return {"median": round(statistics.median(values), 1), "min": round(min(values), 1),
+            "max": round(max(values), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the TTFB saved by preconnecting")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=int, default=150, help="Connection setup delay of the servers, in ms")
+    parser.add_argument("--settle", type=int, default=None,
+                        help="ms between the preconnect and the navigation (default: latency + 100)")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds before a load is abandoned")
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+    settle = args.latency + 100 if args.settle is None else args.settle
+
+    app = QApplication(sys.argv)
+    profile = QWebEngineProfile()  # off the record, so nothing is cached on disk
+    profile.setHttpCacheType(QWebEngineProfile.NoCache)
+    page = QWebEnginePage(profile)
+    host = Host(profile)
+    preconnector = unibrowser.Preconnector(host)
+    cold, warm = [], []
+    try:
+        for i in range(args.runs):
+            try:
+                c, w = run_once(page, preconnector, args.latency, settle, args.timeout)
+            except RuntimeError as e:
+                print("run %d failed: %s" % (i + 1, e), file=sys.stderr)
+                return 1
+            cold.append(c["ttfb"])
+            warm.append(w["ttfb"])
+    finally:
+        preconnector.close()
+        page.deleteLater()
+        app.processEvents()
+    summary = {"cold_ttfb": stats(cold), "preconnected_ttfb": stats(warm),
+               "saved": stats([c - w for c, w in zip(cold, warm)])}
+    print("%-18s %10s %10s %10s" % ("ttfb (ms)", "median", "min", "max"))
+    for name, s in summary.items():
+        print("%-18s %10.1f %10.1f %10.1f" % (name, s["median"], s["min"], s["max"]))
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "runs": args.runs,
+                  "latency_ms": args.latency, "settle_ms": settle, "ttfb": summary}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
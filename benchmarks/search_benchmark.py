@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# History and bookmark search benchmark: fills a HistoryStore in a throwaway
+# SQLite file with --rows distinct URLs (through add_visit and the batching
+# writer, as browsing would; a fifth of them are revisited, a few of those
+# very often) and a BookmarkIndex with --bookmarks entries,
+# then times search() for kinds of query typed into the filter boxes:
+# common and rare words, two words, a host prefix, a two-letter query (too
+# short for the trigram index) and a miss. Fails if the median of any kind
+# exceeds --target ms. With --output, the summary is appended as a JSON line
+# tagged with the git commit.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import main as unibrowser
+
+WORDS = ("news weather recipe python release notes guide tutorial review video music travel "
+         "flight hotel market stock sports football science space history museum garden "
+         "kitchen design photo camera laptop phone security privacy browser engine").split()
+SITES = ("example", "wiki", "forum", "shop", "blog", "docs", "mail", "maps", "tube", "press")
+
+def generate(count, seed):
+    # (url, title, visits); rare words appear on one page in a thousand
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        words = rng.sample(WORDS, 4)
+        if i % 1000 == 0:
+            words.append("zanzibar")
+        host = "www.%s%d.com" % (rng.choice(SITES), rng.randrange(500))
+        url = "https://%s/%s/%d" % (host, "-".join(words[:2]), i)
+        visits = 1 + int(rng.paretovariate(1.0)) if rng.random() < 0.2 else 1
+        entries.append((url, " ".join(w.capitalize() for w in words), visits))
+    return entries
+
+QUERIES = {
+    "common word": ["news", "travel", "python", "garden"],
+    "rare word": ["zanzibar"],
+    "two words": ["python release", "flight hotel", "space museum"],
+    "host prefix": ["wiki12", "shop3", "docs4"],
+    "short (LIKE)": ["py", "ne", "ho"],
+    "miss": ["qwertyuiop", "nothing here"],
+}
+
+def time_queries(search, repeat):
+    results = {}
+    for kind, queries in QUERIES.items():
+        times = []
+        for _ in range(repeat):
+            for query in queries:
+                t = time.perf_counter()
+                search(query)
+                times.append((time.perf_counter() - t) * 1000)
+        times.sort()
+        results[kind] = {"median": round(statistics.median(times), 2),
+                         "p95": round(times[int(len(times) * 0.95) - 1], 2), "max": round(times[-1], 2)}
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure history and bookmark search")
+    parser.add_argument("--rows", type=int, default=100000, help="Distinct history URLs")
+    parser.add_argument("--bookmarks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20, help="Times each query is run")
+    parser.add_argument("--target", type=float, default=10, help="Median ms allowed per kind of query")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="unibrowser-bench-")
+    try:
+        entries = generate(max(args.rows, args.bookmarks), args.seed)
+        history = unibrowser.HistoryStore(os.path.join(workdir, "history.sqlite"))
+        start = time.perf_counter()
+        now = time.time() - args.rows
+        for i, (url, title, visits) in enumerate(entries[:args.rows]):
+            for _ in range(visits):
+                history.add_visit(url, title, now + i)
+        history.flush()
+        fill = {"history_s": round(time.perf_counter() - start, 1)}
+        start = time.perf_counter()
+        bookmarks = unibrowser.BookmarkIndex({"url": url, "title": title} for url, title, _ in entries[:args.bookmarks])
+        bookmarks.search("warm up")  # waits for the initial build
+        fill["bookmarks_s"] = round(time.perf_counter() - start, 1)
+        print("filled %d history rows in %.1f s, %d bookmarks in %.1f s (full-text index: %s)"
+              % (args.rows, fill["history_s"], args.bookmarks, fill["bookmarks_s"], history.fts))
+        summary = {"history": time_queries(history.search, args.repeat),
+                   "bookmarks": time_queries(bookmarks.search, args.repeat)}
+        history.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    slow = []
+    for store, results in summary.items():
+        print("%-28s %8s %8s %8s" % (store + " search (ms)", "median", "p95", "max"))
+        for kind, r in results.items():
+            print("%-28s %8.2f %8.2f %8.2f" % (kind, r["median"], r["p95"], r["max"]))
+            if r["median"] > args.target:
+                slow.append("%s %s" % (store, kind))
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "rows": args.rows,
+                  "bookmarks": args.bookmarks, "fill": fill, "search_ms": summary}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    if slow:
+        print("over %g ms: %s" % (args.target, ", ".join(slow)), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
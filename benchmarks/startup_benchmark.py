@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Cold-start benchmark: launches unibrowser/main.py --profile-startup with the
+# offscreen QPA against a throwaway home directory whose homepage is a local
+# file:// page, and reports the median of each startup mark over several runs.
+# With --output, a record per run of the benchmark is appended as a JSON line
+# (tagged with the current git commit) so numbers can be compared across commits.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BROWSER = os.path.join(ROOT, "unibrowser", "main.py")
+PAGE = "<!doctype html><title>Startup benchmark</title><p>Hello from Unibrowser</p>"
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_once(timeout):
+    with tempfile.TemporaryDirectory(prefix="unibrowser-bench-") as home:
+        page = os.path.join(home, "page.html")
+        with open(page, "w", encoding="utf-8") as f:
+            f.write(PAGE)
+        with open(os.path.join(home, ".unibrowser_config.json"), "w", encoding="utf-8") as f:
+            json.dump({"homepage": "file://" + page}, f)
+        report_path = os.path.join(home, "startup.json")
+        env = dict(os.environ, HOME=home, USERPROFILE=home, QT_QPA_PLATFORM="offscreen",
+                   QTWEBENGINE_DISABLE_SANDBOX="1")
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, BROWSER, "--profile-startup", report_path, "--quit-after-startup"],
+                              env=env, capture_output=True, text=True, timeout=timeout)
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0 or not os.path.exists(report_path):
+            raise RuntimeError("browser exited with %d:\n%s" % (proc.returncode, proc.stderr[-2000:]))
+        with open(report_path, "r", encoding="utf-8") as f:
+            marks = json.load(f)["marks"]
+        marks["process_exit"] = round(wall, 3)
+        return marks
+
+def summarize(runs):
+    summary = {}
+    for name in runs[0]:
+        values = [run[name] for run in runs if name in run]
+        summary[name] = {
+            "median": round(statistics.median(values), 3),
+            "min": min(values),
+            "max": max(values),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Unibrowser cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a run is abandoned")
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        try:
+            runs.append(run_once(args.timeout))
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print("run %d failed: %s" % (i + 1, e), file=sys.stderr)
+            return 1
+    summary = summarize(runs)
+    print("%-14s %10s %10s %10s" % ("mark (ms)", "median", "min", "max"))
+    for name, stats in sorted(summary.items(), key=lambda item: item[1]["median"]):
+        print("%-14s %10.1f %10.1f %10.1f" % (name, stats["median"], stats["min"], stats["max"]))
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "runs": args.runs, "marks": summary}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
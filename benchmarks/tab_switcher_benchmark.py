@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Tab overview benchmark: restores a session of --tabs placeholder tabs in a
+# headless browser window (offscreen QPA, throwaway home directory, local
+# file:// pages), gives every tab a snapshot in the thumbnail cache and opens
+# the overview (Ctrl+Shift+A) --repeat times, timing refresh() up to the first
+# paint of the grid. The first open decodes every snapshot; later ones reuse
+# the decoded pixmaps. It also times switching between two live tabs, which
+# snapshots the tab being left. Fails if the first or the median open takes
+# longer than --target ms. With --output, the summary is appended as a JSON
+# line tagged with the git commit.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = tempfile.mkdtemp(prefix="unibrowser-bench-")
+# Must be set before main is imported; its file locations are computed then
+os.environ["HOME"] = os.environ["USERPROFILE"] = HOME
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+
+import main as unibrowser
+from PyQt5.QtCore import QObject, QEvent, QUrl, QTimer, QEventLoop
+from PyQt5.QtGui import QImage, QColor, QPainter, QLinearGradient
+from PyQt5.QtWidgets import QApplication, QListView
+
+def write_pages(count):
+    urls = []
+    for i in range(count):
+        path = os.path.join(HOME, "tab%d.html" % i)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("<!doctype html><title>Tab %d</title><h1>Tab %d</h1>%s\n" % (i, i, "<p>text " * 200))
+        urls.append(QUrl.fromLocalFile(path).toString())
+    return urls
+
+def write_session(urls):
+    tabs = [{"id": i + 1, "url": url, "title": "Tab %d" % i, "history": None} for i, url in enumerate(urls)]
+    with open(unibrowser.SESSION_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "snapshot", "tabs": tabs, "ids": [t["id"] for t in tabs],
+                            "active": 0, "closed_tabs": []}) + "\n")
+
+def snapshot_image(i):
+    # A page-sized picture with some structure, so the JPEGs aren't trivially small
+    image = QImage(1280, 800, QImage.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, 1280, 800)
+    gradient.setColorAt(0, QColor.fromHsv(i * 37 % 360, 120, 240))
+    gradient.setColorAt(1, QColor.fromHsv(i * 53 % 360, 200, 90))
+    painter.fillRect(image.rect(), gradient)
+    for y in range(40, 800, 24):
+        painter.fillRect(40, y, 300 + (i * y) % 900, 10, QColor(30, 30, 30))
+    painter.end()
+    return image
+
+class FirstPaint(QObject):
+    # Notes the time of the next paint of a widget
+    def __init__(self, widget):
+        super().__init__()
+        self.at = None
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.at is None:
+            self.at = time.perf_counter()
+        return False
+
+def wait_for(condition, timeout):
+    # Runs the event loop until condition() holds; returns whether it did
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: condition() and loop.quit())
+    timer.start(1)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    if not condition():
+        loop.exec_()
+    timer.stop()
+    return condition()
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure opening the tab overview")
+    parser.add_argument("--tabs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20, help="Times the overview is opened")
+    parser.add_argument("--switches", type=int, default=20, help="Switches between two live tabs")
+    parser.add_argument("--target", type=float, default=100, help="ms allowed for the first and the median open")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", metavar="PATH", help="Append the summary as a JSON line to PATH")
+    args = parser.parse_args()
+
+    write_session(write_pages(args.tabs))
+    app = QApplication(sys.argv)
+    window = unibrowser.UniBrowser()
+    first = window.tab_widget.currentWidget()
+    if not wait_for(lambda: first.load_seconds is not None, args.timeout):
+        print("page did not load", file=sys.stderr)
+        return 1
+    window.tab_widget.setCurrentIndex(1)
+    second = window.tab_widget.currentWidget()
+    if not wait_for(lambda: second.load_seconds is not None, args.timeout):
+        print("page did not load", file=sys.stderr)
+        return 1
+    # Let the second page paint before it is left for the first time
+    wait_for(lambda: False, 0.3)
+
+    switches = []
+    for i in range(args.switches):
+        start = time.perf_counter()
+        window.tab_widget.setCurrentIndex(i % 2)
+        switches.append((time.perf_counter() - start) * 1000)
+        app.processEvents()
+    # The snapshots are encoded on the thumbnail worker
+    wait_for(lambda: all(tab.session_id in window.thumbnails.snapshots for tab in (first, second)), 5)
+    captured = sum(1 for tab in (first, second) if tab.session_id in window.thumbnails.snapshots)
+
+    for i in range(window.tab_widget.count()):
+        session_id = window.tab_widget.widget(i).session_id
+        if session_id not in window.thumbnails.snapshots:
+            window.thumbnails.store(session_id, window.thumbnails.encode(
+                snapshot_image(i).scaled(2 * unibrowser.THUMBNAIL_WIDTH, 2 * unibrowser.THUMBNAIL_HEIGHT)))
+    window.thumbnails.decoded.clear()
+
+    dlg = window.build_tab_overview_dialog()
+    grid = dlg.findChild(QListView)
+    opens = []
+    for _ in range(args.repeat):
+        painted = FirstPaint(grid.viewport())
+        start = time.perf_counter()
+        dlg.refresh()
+        dlg.show()
+        if not wait_for(lambda: painted.at is not None, args.timeout):
+            print("overview never painted", file=sys.stderr)
+            return 1
+        opens.append((painted.at - start) * 1000)
+        grid.viewport().removeEventFilter(painted)
+        dlg.hide()
+        app.processEvents()
+
+    summary = {
+        "tabs": window.tab_widget.count(),
+        "first_open_ms": round(opens[0], 1),
+        "open_ms": round(statistics.median(opens[1:] or opens), 1),
+        "max_open_ms": round(max(opens), 1),
+        "switch_ms": round(statistics.median(switches), 1),
+        "switch_snapshots": captured,
+    }
+    for name, value in summary.items():
+        print("%-20s %s" % (name, value))
+    if args.output:
+        record = {"commit": git_commit(), "time": int(time.time()), "tab_overview": summary}
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    window.close()
+    app.processEvents()
+    slow = [name for name in ("first_open_ms", "open_ms") if summary[name] > args.target]
+    if slow:
+        print("over %g ms: %s" % (args.target, ", ".join(slow)), file=sys.stderr)
+        return 1
+    if captured < 2:
+        print("switching tabs did not snapshot both tabs", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    try:
+        code = main()
+    finally:
+        shutil.rmtree(HOME, ignore_errors=True)
+    sys.exit(code)
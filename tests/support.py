@@ -0,0 +1,84 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Shared setup for the tests: a throwaway home directory (main computes its
+# file locations at import time), the offscreen platform, and main itself.
+# Run with `python -m unittest discover tests` (or pytest) from the repo root.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME = tempfile.mkdtemp(prefix="unibrowser-test-")
+os.environ["HOME"] = os.environ["USERPROFILE"] = HOME
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+sys.path.insert(0, os.path.join(ROOT, "unibrowser"))
+atexit.register(shutil.rmtree, HOME, True)
+
+import main as unibrowser
+from PyQt5.QtCore import QTimer, QEventLoop
+from PyQt5.QtWidgets import QApplication
+
+def application():
+    return QApplication.instance() or QApplication([sys.argv[0]])
+
+def wait_for(condition, timeout=30):
+    # Runs the event loop until condition() holds or timeout seconds pass
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: condition() and loop.quit())
+    timer.start(5)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    if not condition():
+        loop.exec_()
+    timer.stop()
+    return condition()
+
+def spin(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+class CountingServer(ThreadingHTTPServer):
+    # Local HTTP stand-in that counts GETs per path. Subclass Handler, or
+    # pass routes {path: (content type, body)}; anything else is a small page.
+    daemon_threads = True
+
+    def __init__(self, routes=None, handler=None):
+        super().__init__(("127.0.0.1", 0), handler or CountingHandler)
+        self.routes = routes or {}
+        self.lock = threading.Lock()
+        self.counts = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def url(self, path="/"):
+        return "http://127.0.0.1:%d%s" % (self.server_address[1], path)
+
+    def count(self, path):
+        with self.lock:
+            return self.counts.get(path, 0)
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.counts[self.path] = self.server.counts.get(self.path, 0) + 1
+        content_type, body = self.server.routes.get(
+            self.path, ("text/html", b"<!doctype html><title>%s</title><p>ok" % self.path.encode()))
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,110 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from support import unibrowser
+
+# JSON bookmark import reads the file a chunk at a time: every format must
+# come out the same whatever the chunk size, including chunks that end in the
+# middle of a string, a number or a folder.
+
+OURS = [
+    {"url": "https://a.example/", "title": "Alpha", "folder": "Work/Docs", "tags": ["x", "y"], "added": 1700000000.5},
+    {"url": "https://b.example/", "title": "", "tags": "one, two", "added": 1700000001},
+    {"url": "https://c.example/été", "title": "Café \"quoted\"\n", "added": 12345678901234567},
+]
+
+CHROME = {"checksum": "0", "roots": {
+    "bookmark_bar": {"children": [
+        {"date_added": "13300000000000000", "name": "Alpha", "type": "url", "url": "https://a.example/",
+         "meta_info": {"k": "v"}},
+        {"children": [{"date_added": "13300000000000001", "name": "Beta", "type": "url", "url": "https://b.example/"}],
+         "name": "Sub", "type": "folder"},
+    ], "name": "Bookmarks bar", "type": "folder"},
+    "other": {"children": [], "name": "Other bookmarks", "type": "folder"},
+}, "version": 1}
+
+FIREFOX = {"title": "", "root": "placesRoot", "children": [
+    {"title": "menu", "root": "bookmarksMenuFolder", "children": [
+        {"title": "Alpha", "uri": "https://a.example/", "dateAdded": 1700000000000000},
+        {"title": "Folder", "children": [{"title": "Beta", "uri": "https://b.example/", "dateAdded": 1700000001000000}]},
+        {"title": "Query", "uri": "place:sort=8"},
+    ]},
+]}
+
+class JsonImportTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="unibrowser-bookmarks-")
+        self.chunk = unibrowser.BOOKMARK_IMPORT_CHUNK
+
+    def tearDown(self):
+        unibrowser.BOOKMARK_IMPORT_CHUNK = self.chunk
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, data, indent=None):
+        path = os.path.join(self.dir, "bookmarks.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        return path
+
+    def expected(self, data):
+        found = []
+        for folders, b in unibrowser.json_bookmarks(data):
+            b["folder"] = b["folder"] or "/".join(folders)
+            found.append(b)
+        return found
+
+    def check(self, data):
+        for indent in (None, 2):
+            path = self.write(data, indent)
+            for chunk in (2, 3, 7, 64, 256 * 1024):
+                unibrowser.BOOKMARK_IMPORT_CHUNK = chunk
+                self.assertEqual(list(unibrowser.iter_json_bookmarks(path)), self.expected(data), (indent, chunk))
+
+    def test_our_export(self):
+        self.check(OURS)
+        bookmarks = list(unibrowser.iter_json_bookmarks(self.write(OURS)))
+        self.assertEqual([b["folder"] for b in bookmarks], ["Work/Docs", "", ""])
+        self.assertEqual(bookmarks[1]["tags"], ["one", "two"])
+
+    def test_chrome(self):
+        self.check(CHROME)
+        bookmarks = list(unibrowser.iter_json_bookmarks(self.write(CHROME)))
+        self.assertEqual([(b["title"], b["folder"]) for b in bookmarks],
+                         [("Alpha", "Bookmarks bar"), ("Beta", "Bookmarks bar/Sub")])
+
+    def test_firefox(self):
+        self.check(FIREFOX)
+        bookmarks = list(unibrowser.iter_json_bookmarks(self.write(FIREFOX)))
+        self.assertEqual([(b["title"], b["folder"]) for b in bookmarks],
+                         [("Alpha", ""), ("Beta", "Folder"), ("Query", "")])
+
+    def test_many_bookmarks_in_small_chunks(self):
+        data = {"roots": {"bookmark_bar": {"children": [
+            {"name": "Page %d" % i, "type": "url", "url": "https://page%d.example/" % i} for i in range(2000)
+        ], "name": "Bar"}}}
+        path = self.write(data)
+        unibrowser.BOOKMARK_IMPORT_CHUNK = 4096
+        self.assertEqual(list(unibrowser.iter_json_bookmarks(path)), self.expected(data))
+
+    def test_broken_files_raise(self):
+        for text in ("", "[", '[{"url": "https://a.example/"}', '[{"url": "https://a.example/"},]', "[] []", '{"roots": 1}'):
+            path = os.path.join(self.dir, "broken.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            for chunk in (1, 256 * 1024):
+                unibrowser.BOOKMARK_IMPORT_CHUNK = chunk
+                with self.assertRaises((ValueError, AttributeError), msg=(text, chunk)):
+                    list(unibrowser.iter_json_bookmarks(path))
+
+    def test_store_import_skips_known_and_place_urls(self):
+        store = unibrowser.BookmarkStore()
+        store.add("https://a.example/", "Already here")
+        added = store.import_file(self.write(FIREFOX))
+        self.assertEqual([b["url"] for b in added], ["https://b.example/"])
+        self.assertEqual(store.get("https://a.example/")["title"], "Already here")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import unittest
+
+from support import unibrowser, application, HOME
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+
+# Cache settings: clearing the cache folder field must put the cache back in
+# the profile's own folder, not leave it in the last custom one.
+
+class CachePathTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+
+    def setUp(self):
+        self.profile = QWebEngineProfile("unibrowser-cache-test-%s" % self.id().rsplit(".", 1)[-1])
+        self.default = self.profile.cachePath()
+        self.custom = os.path.join(HOME, "custom-cache")
+
+    def tearDown(self):
+        self.profile.deleteLater()
+        self.app.processEvents()
+
+    def apply(self, path):
+        unibrowser.apply_cache_settings(self.profile, dict(unibrowser.DEFAULT_CACHE, path=path))
+
+    def test_empty_path_restores_the_default(self):
+        self.apply(self.custom)
+        self.assertEqual(self.profile.cachePath(), self.custom)
+        self.apply("")
+        self.assertEqual(self.profile.cachePath(), self.default)
+
+    def test_default_survives_several_custom_paths(self):
+        self.apply(self.custom)
+        self.apply(self.custom + "-2")
+        self.assertEqual(self.profile.cachePath(), self.custom + "-2")
+        self.apply("")
+        self.assertEqual(self.profile.cachePath(), self.default)
+        self.assertEqual(unibrowser.default_cache_path(self.profile), self.default)
+
+    def test_home_is_expanded(self):
+        self.apply("~/cache-here")
+        self.assertEqual(self.profile.cachePath(), os.path.join(HOME, "cache-here"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from support import unibrowser, application, wait_for, spin, CountingServer, CountingHandler
+from PyQt5.QtCore import QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage
+
+# DownloadManager against a local server that streams large files slowly
+# enough for several downloads to be in flight at once.
+
+FILE_SIZE = 4 * 1024 * 1024
+CHUNK = 64 * 1024
+CHUNK_DELAY = 0.02  # about 1.3 s per file
+
+def file_bytes(n):
+    # Distinct, checkable content per file
+    block = bytes((n + i) % 251 for i in range(CHUNK))
+    return block * (FILE_SIZE // CHUNK)
+
+class FileHandler(CountingHandler):
+    def do_GET(self):
+        with self.server.lock:
+            self.server.counts[self.path] = self.server.counts.get(self.path, 0) + 1
+        n = int(self.path.rsplit("/", 1)[-1])
+        data = file_bytes(n)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Disposition", 'attachment; filename="file%d.bin"' % n)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            for i in range(0, len(data), CHUNK):
+                self.wfile.write(data[i:i + CHUNK])
+                time.sleep(CHUNK_DELAY)
+        except OSError:
+            pass  # cancelled by the browser
+
+class DownloadQueueTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+        cls.server = CountingServer(handler=FileHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="unibrowser-downloads-")
+        self.journal = os.path.join(self.dir, "downloads.jsonl")
+        self.profile = QWebEngineProfile()  # off the record
+        self.profile.setDownloadPath(self.dir)
+        self.page = QWebEnginePage(self.profile)
+        self.manager = unibrowser.DownloadManager(path=self.journal)
+        self.manager.settings["max_parallel"] = 2
+        self.manager.watch(self.profile)
+        self.most_active = 0
+        self.manager.changed.connect(self.track_active)
+        self.manager.added.connect(self.track_active)
+
+    def tearDown(self):
+        for record in list(self.manager.records):
+            self.manager.cancel(record)
+        self.app.processEvents()
+        self.manager.close()
+        self.page.deleteLater()
+        self.profile.deleteLater()
+        self.app.processEvents()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def track_active(self, record):
+        self.most_active = max(self.most_active, len(self.manager.active))
+
+    def start(self, *numbers):
+        before = len(self.manager.records)
+        for n in numbers:
+            self.page.download(QUrl(self.server.url("/file/%d" % n)))
+        self.assertTrue(wait_for(lambda: len(self.manager.records) == before + len(numbers)))
+        return self.manager.records[before:]
+
+    def assert_file(self, record, n):
+        self.assertEqual(record["state"], "completed", record["error"])
+        with open(record["path"], "rb") as f:
+            self.assertEqual(f.read(), file_bytes(n))
+
+    def test_queues_beyond_max_parallel(self):
+        records = self.start(1, 2, 3, 4, 5)
+        states = sorted(r["state"] for r in records)
+        self.assertEqual(states, ["downloading"] * 2 + ["queued"] * 3)
+        self.assertTrue(wait_for(lambda: all(r["state"] == "completed" for r in records), timeout=60))
+        self.assertLessEqual(self.most_active, 2)
+        self.assertEqual(self.manager.active, set())
+        for record in records:
+            self.assert_file(record, int(record["url"].rsplit("/", 1)[-1]))
+            self.assertEqual(record["received"], FILE_SIZE)
+        # Queued downloads were paused, not restarted: one request per file
+        for n in range(1, 6):
+            self.assertEqual(self.server.count("/file/%d" % n), 1)
+        self.assertEqual(len({r["path"] for r in records}), 5)
+
+    def test_pause_and_resume(self):
+        record, = self.start(10)
+        self.assertTrue(wait_for(lambda: record["received"] > 0))
+        self.manager.pause(record)
+        self.assertEqual(record["state"], "paused")
+        self.assertNotIn(record["id"], self.manager.active)
+        item = self.manager.items[record["id"]]
+        self.assertTrue(wait_for(item.isPaused))
+        received = item.receivedBytes()
+        spin(500)
+        self.assertEqual(item.receivedBytes(), received)
+        self.assertLess(received, FILE_SIZE)
+        self.manager.resume(record)
+        self.assertEqual(record["state"], "downloading")
+        self.assertTrue(wait_for(lambda: record["state"] == "completed", timeout=60))
+        self.assert_file(record, 10)
+
+    def test_paused_download_frees_its_slot(self):
+        first, second, third = self.start(20, 21, 22)
+        queued = next(r for r in (first, second, third) if r["state"] == "queued")
+        running = next(r for r in (first, second, third) if r["state"] == "downloading")
+        self.manager.pause(running)
+        self.assertEqual(queued["state"], "downloading")
+        self.assertLessEqual(len(self.manager.active), 2)
+        self.manager.resume(running)
+        self.assertTrue(wait_for(lambda: all(r["state"] == "completed" for r in (first, second, third)),
+                                 timeout=60))
+
+    def test_journal_reload(self):
+        done, running = self.start(30, 31)
+        self.assertTrue(wait_for(lambda: done["state"] == "completed" or running["state"] == "completed",
+                                 timeout=60))
+        finished = done if done["state"] == "completed" else running
+        # Reopened while the other download is still in flight, as after a crash
+        manager = unibrowser.DownloadManager(path=self.journal)
+        manager.close()
+        reloaded = {r["id"]: r for r in manager.records}
+        self.assertEqual(set(reloaded), {done["id"], running["id"]})
+        self.assertEqual(reloaded[finished["id"]]["state"], "completed")
+        self.assertEqual(reloaded[finished["id"]]["path"], finished["path"])
+        self.assertEqual(reloaded[finished["id"]]["received"], FILE_SIZE)
+        other = running if finished is done else done
+        if other["state"] != "completed":
+            self.assertEqual(reloaded[other["id"]]["state"], "interrupted")
+
+class DownloadJournalTest(unittest.TestCase):
+    # Journal replay and trimming, without any transfer
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="unibrowser-downloads-")
+        self.journal = os.path.join(self.dir, "downloads.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def record(self, i, state="completed", private=False):
+        return {"id": i, "url": "http://127.0.0.1/file/%d" % i, "path": os.path.join(self.dir, "file%d.bin" % i),
+                "state": state, "received": 10, "total": 10, "rate": 5, "started": 1.0,
+                "finished": 2.0 if state == "completed" else None, "error": "", "private": private}
+
+    def test_reload_keeps_finished_and_interrupts_running(self):
+        manager = unibrowser.DownloadManager(path=self.journal)
+        for record in (self.record(1), self.record(2, "downloading"), self.record(3, private=True)):
+            manager.records.append(record)
+            manager.log(record)
+        manager.close()
+        reloaded = unibrowser.DownloadManager(path=self.journal)
+        self.assertEqual([r["id"] for r in reloaded.records], [1, 2])
+        self.assertEqual(reloaded.records[0]["state"], "completed")
+        self.assertEqual(reloaded.records[1]["state"], "interrupted")
+        self.assertEqual(reloaded.records[1]["rate"], 0)
+        self.assertEqual(reloaded.next_id, 3)
+        reloaded.close()
+
+    def test_history_is_trimmed(self):
+        manager = unibrowser.DownloadManager(path=self.journal)
+        manager.settings["history_limit"] = 10
+        for i in range(1, 101):
+            record = self.record(i)
+            manager.records.append(record)
+            manager.log(record)
+        manager.close()
+        # Compacted down to history_limit whenever the journal passes twice that
+        with open(self.journal, encoding="utf-8") as f:
+            self.assertLessEqual(len(f.readlines()), 20)
+        self.assertLessEqual(len(manager.records), 30)
+        reloaded = unibrowser.DownloadManager(path=self.journal)
+        ids = [r["id"] for r in reloaded.records]
+        self.assertEqual(ids, [r["id"] for r in manager.records])
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(ids[-1], 100)
+        reloaded.close()
+
+if __name__ == "__main__":
+    unittest.main()
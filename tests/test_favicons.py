@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import unibrowser, application
+from PyQt5.QtGui import QIcon, QPixmap, QColor
+
+def solid_icon(rgb):
+    pixmap = QPixmap(unibrowser.FAVICON_SIZE, unibrowser.FAVICON_SIZE)
+    pixmap.fill(QColor(*rgb))
+    return QIcon(pixmap)
+
+def color_of(icon):
+    image = icon.pixmap(unibrowser.FAVICON_SIZE, unibrowser.FAVICON_SIZE).toImage()
+    color = image.pixelColor(0, 0)
+    return color.red(), color.green(), color.blue()
+
+class FaviconStoreTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="unibrowser-favicons-")
+        self.store = unibrowser.FaviconStore(self.dir)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def images(self):
+        return sorted(name for name in os.listdir(self.dir) if name.endswith(".png"))
+
+    def reopen(self):
+        self.store.close()
+        self.store = unibrowser.FaviconStore(self.dir)
+
+    def test_icon_is_shared_by_the_origin(self):
+        stored = self.store.set_icon("https://example.com/a", solid_icon((255, 0, 0)))
+        first = self.store.icon("https://example.com/b?q=1")
+        self.assertIs(first, stored)
+        self.assertIs(self.store.icon("https://example.com/"), first)
+        self.assertEqual(color_of(first), (255, 0, 0))
+        self.assertIsNone(self.store.icon("https://other.example.com/"))
+        self.assertIsNone(self.store.icon("http://example.com/"))
+
+    def test_same_image_is_stored_once(self):
+        for i in range(20):
+            self.store.set_icon("https://site%d.example/" % i, solid_icon((0, 128, 0)))
+        self.assertEqual(len(self.images()), 1)
+        icons = {id(self.store.icon("https://site%d.example/x" % i)) for i in range(20)}
+        self.assertEqual(len(icons), 1)
+
+    def test_reload_from_journal(self):
+        self.store.set_icon("https://a.example/", solid_icon((0, 0, 255)))
+        self.store.set_icon("https://b.example:8443/", solid_icon((10, 20, 30)))
+        self.store.set_icon("https://a.example/", solid_icon((40, 50, 60)))
+        self.reopen()
+        self.assertEqual(color_of(self.store.icon("https://a.example/page")), (40, 50, 60))
+        self.assertEqual(color_of(self.store.icon("https://b.example:8443/")), (10, 20, 30))
+        self.assertIsNone(self.store.icon("https://b.example/"))
+
+    def test_unchanged_icon_is_not_journaled_again(self):
+        for _ in range(10):
+            self.store.set_icon("https://example.com/", solid_icon((1, 2, 3)))
+        self.assertEqual(self.store.journal.records, 1)
+
+    def test_compact_drops_unused_images(self):
+        self.store.set_icon("https://example.com/", solid_icon((1, 1, 1)))
+        self.store.set_icon("https://example.com/", solid_icon((2, 2, 2)))
+        self.assertEqual(len(self.images()), 2)
+        self.store.compact()
+        self.assertEqual(self.images(), [self.store.by_origin["https://example.com"] + ".png"])
+        self.reopen()
+        self.assertEqual(self.store.journal.records, 1)
+        self.assertEqual(color_of(self.store.icon("https://example.com/")), (2, 2, 2))
+
+    def test_missing_image_is_forgotten(self):
+        self.store.set_icon("https://example.com/", solid_icon((5, 5, 5)))
+        self.reopen()
+        for name in self.images():
+            os.remove(os.path.join(self.dir, name))
+        self.assertIsNone(self.store.icon("https://example.com/"))
+        self.assertNotIn("https://example.com", self.store.by_origin)
+
+    def test_ignores_non_web_urls_and_null_icons(self):
+        self.store.set_icon("file:///tmp/page.html", solid_icon((9, 9, 9)))
+        self.store.set_icon("https://example.com/", QIcon())
+        self.assertEqual(self.store.by_origin, {})
+        self.assertEqual(self.images(), [])
+
+    def test_decoded_icons_are_bounded(self):
+        for i in range(unibrowser.FAVICON_CACHE_SIZE + 50):
+            self.store.set_icon("https://site%d.example/" % i, solid_icon((i % 256, i // 256, 7)))
+        self.assertEqual(len(self.store.icons), unibrowser.FAVICON_CACHE_SIZE)
+        # Evicted icons are decoded again from disk
+        self.assertEqual(color_of(self.store.icon("https://site0.example/")), (0, 0, 7))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+
+from support import unibrowser, application, wait_for, CountingServer
+from PyQt5.QtCore import Qt
+
+# One history visit per navigation, with later title updates merged into it,
+# for the store on its own and for 50 tabs loading in the background at once.
+
+# Renames itself a few times after loading, like pages that show unread counts
+RETITLING_PAGE = b"""<!doctype html><title>Loading</title><p>page
+<script>
+var n = 0;
+var timer = setInterval(function () {
+    document.title = n < 3 ? "Step " + n : "Final " + location.pathname;
+    if (++n > 3) clearInterval(timer);
+}, 20);
+</script>"""
+
+def visits(history):
+    return history.reader.execute(
+        "SELECT u.url, u.title, u.visit_count, count(v.id) FROM urls u JOIN visits v ON v.url_id = u.id "
+        "GROUP BY u.id ORDER BY u.url").fetchall()
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.history = unibrowser.HistoryStore(None)
+
+    def tearDown(self):
+        self.history.close()
+
+    def test_title_updates_merge_into_the_visit(self):
+        urls = ["http://example.com/%02d" % i for i in range(50)]
+        for url in urls:
+            self.history.add_visit(url, "")
+        for step in range(5):
+            for url in urls:
+                self.history.update_title(url, "%s title %d" % (url, step))
+        self.history.flush()
+        self.assertEqual(visits(self.history), [(url, url + " title 4", 1, 1) for url in urls])
+
+    def test_last_title_wins_across_batches(self):
+        self.history.add_visit("http://example.com/", "First")
+        self.history.flush()
+        self.history.update_title("http://example.com/", "Second")
+        self.history.flush()
+        self.history.update_title("http://example.com/", "Third")
+        self.history.update_title("http://example.com/", "Fourth")
+        self.history.flush()
+        self.assertEqual(visits(self.history), [("http://example.com/", "Fourth", 1, 1)])
+
+    def test_title_update_without_visit_records_nothing(self):
+        self.history.update_title("http://example.com/never", "Title")
+        self.history.flush()
+        self.assertEqual(visits(self.history), [])
+
+    def test_untitled_revisit_keeps_title(self):
+        self.history.add_visit("http://example.com/", "Example", 1.0)
+        self.history.add_visit("http://example.com/", "", 2.0)
+        self.history.flush()
+        self.assertEqual(visits(self.history), [("http://example.com/", "Example", 2, 2)])
+        self.assertEqual([row["visit_time"] for row in self.history.page()], [2.0, 1.0])
+
+    def test_flush_soon_signals_when_written(self):
+        app = application()
+        flushed = []
+        self.history.flushed.connect(lambda: flushed.append(len(self.history.page())), Qt.QueuedConnection)
+        for i in range(10):
+            self.history.add_visit("http://example.com/%d" % i, "")
+        self.history.flush_soon()
+        self.assertTrue(wait_for(lambda: flushed, timeout=unibrowser.HISTORY_BATCH_DELAY * 4))
+        self.assertEqual(flushed, [10])
+        app.processEvents()
+
+class BackgroundTabsTest(unittest.TestCase):
+    TABS = 50
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+        cls.server = CountingServer(routes={"/tab/%d" % i: ("text/html", RETITLING_PAGE) for i in range(cls.TABS)})
+        config = unibrowser.config_service()
+        config.set("homepage", cls.server.url("/home"))
+        # Every tab must stay live (and running its timers) for the whole
+        # test: the default budget would discard most of them under our feet
+        cls.saved = {key: config.get(key, {}) for key in ("tab_discard", "tab_freeze")}
+        config.set("tab_discard", dict(unibrowser.DEFAULT_TAB_DISCARD, policy="off"))
+        config.set("tab_freeze", dict(unibrowser.DEFAULT_TAB_FREEZE, enabled=False))
+        # Private: history stays in memory, nothing from other tests in it
+        cls.window = unibrowser.UniBrowser(private=True)
+        first = cls.window.tab_widget.widget(0)
+        wait_for(lambda: first.load_seconds is not None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.window.close()
+        cls.app.processEvents()
+        cls.server.close()
+        config = unibrowser.config_service()
+        for key, value in cls.saved.items():
+            config.set(key, value)
+
+    def test_one_visit_per_background_tab(self):
+        window = self.window
+        active = window.tab_widget.currentWidget()
+        urls = [self.server.url("/tab/%d" % i) for i in range(self.TABS)]
+        tabs = [window.tab_widget.widget(window.open_in_new_tab(url, background=True)) for url in urls]
+        self.assertIs(window.tab_widget.currentWidget(), active)
+        self.assertTrue(wait_for(lambda: all(t.webview.page().title().startswith("Final") for t in tabs),
+                                 timeout=120))
+        window.history.flush()
+        rows = [row for row in visits(window.history) if "/tab/" in row[0]]
+        self.assertEqual(sorted(rows), sorted((url, "Final " + url[url.index("/tab/"):], 1, 1) for url in urls))
+        # Background loads leave the active tab alone
+        self.assertEqual(window.tab_widget.tabText(window.tab_widget.indexOf(active)),
+                         window.elide_tab_title(active.webview.page().title()))
+        for tab in tabs:
+            self.assertEqual(window.tab_widget.tabText(window.tab_widget.indexOf(tab)),
+                             window.elide_tab_title(tab.webview.page().title()))
+        self.assertEqual([self.server.count("/tab/%d" % i) for i in range(self.TABS)], [1] * self.TABS)
+
+if __name__ == "__main__":
+    unittest.main()
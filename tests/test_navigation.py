@@ -0,0 +1,96 @@
+import unittest
+
+from support import unibrowser, application, wait_for, spin, CountingServer
+from PyQt5.QtWidgets import QListView
+
+# Every tab open must cost exactly one request for its page: BrowserTab used
+# to navigate to DuckDuckGo in its constructor before add_tab set the real URL.
+
+class TabNavigationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+        cls.server = CountingServer()
+        unibrowser.config_service().set("homepage", cls.server.url("/home"))
+        cls.window = unibrowser.UniBrowser(private=True)
+        first = cls.window.tab_widget.widget(0)
+        wait_for(lambda: first.load_seconds is not None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.window.close()
+        cls.app.processEvents()
+        cls.server.close()
+
+    def loaded(self, tab):
+        self.assertTrue(wait_for(lambda: tab.load_seconds is not None), "page did not load")
+        # Give a stray second navigation time to show up
+        spin(200)
+
+    def test_browser_tab_without_url_does_not_navigate(self):
+        tab = unibrowser.BrowserTab(private_profile=self.window.profile)
+        spin(200)
+        self.assertTrue(tab.webview.url().isEmpty())
+        self.assertIsNone(tab.load_started_at)
+        tab.deleteLater()
+
+    def test_homepage_tab_requests_once(self):
+        before = self.server.count("/home")
+        tab = self.window.tab_widget.widget(self.window.add_tab())
+        self.loaded(tab)
+        self.assertEqual(tab.webview.url().toString(), self.server.url("/home"))
+        self.assertEqual(self.server.count("/home"), before + 1)
+
+    def test_one_request_per_tab_open(self):
+        paths = ["/add/%d" % i for i in range(5)]
+        tabs = [self.window.tab_widget.widget(self.window.add_tab(self.server.url(p))) for p in paths]
+        for tab in tabs:
+            self.loaded(tab)
+        self.assertEqual([self.server.count(p) for p in paths], [1] * len(paths))
+
+    def test_one_request_per_new_tab_from_link(self):
+        paths = ["/link/%d" % i for i in range(3)]
+        for path in paths:
+            tab = self.window.tab_widget.widget(self.window.open_in_new_tab(self.server.url(path)))
+            self.loaded(tab)
+        self.assertEqual([self.server.count(p) for p in paths], [1] * len(paths))
+
+    def test_one_request_per_navigation(self):
+        tab = self.window.tab_widget.widget(self.window.add_tab(self.server.url("/first")))
+        self.loaded(tab)
+        tab.load_seconds = None
+        self.window.load_url_from_string(self.server.url("/second"))
+        self.loaded(tab)
+        self.assertEqual(self.server.count("/first"), 1)
+        self.assertEqual(self.server.count("/second"), 1)
+
+    def test_opening_a_prerendered_bookmark_requests_once(self):
+        window = self.window
+        url = self.server.url("/bookmarked")
+        window.bookmark_index.add(window.bookmarks.add(url, "Bookmarked"))
+        current = window.tab_widget.currentWidget()
+        dlg = window.build_bookmarks_dialog()
+        dlg.refresh()
+        view = dlg.findChild(QListView)
+        model = view.model()
+        index = model.index(next(i for i, b in enumerate(model.records) if b["url"] == url), 0)
+        # Hovering long enough prerenders the page
+        view.entered.emit(index)
+        self.assertTrue(wait_for(lambda: url in window.prerender.pages))
+        prerendered = window.prerender.pages[url][0]
+        self.loaded(prerendered)
+        self.assertEqual(self.server.count("/bookmarked"), 1)
+        view.setCurrentIndex(index)
+        view.activated.emit(index)
+        # The prerendered page took the current tab's place, already loaded
+        self.assertIs(window.tab_widget.currentWidget(), prerendered)
+        self.assertEqual(prerendered.session_id, current.session_id)
+        self.assertEqual(window.url_bar.text(), url)
+        self.assertNotIn(url, window.prerender.pages)
+        # Not even once the selection's own prediction would have fired
+        spin(window.prerender.settings()["delay_ms"] + 200)
+        self.assertEqual(self.server.count("/bookmarked"), 1)
+        dlg.deleteLater()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from support import unibrowser
+
+# History and bookmark search pick their candidates by relevance: the best
+# match must be found however many newer entries also contain the query.
+
+OLDER = unibrowser.SEARCH_CANDIDATES * 2
+
+def urls(results):
+    return [r["url"] for r in results]
+
+class HistorySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.history = unibrowser.HistoryStore(None)
+
+    def tearDown(self):
+        self.history.close()
+
+    def visit(self, url, title, times=1):
+        for _ in range(times):
+            self.history.add_visit(url, title)
+
+    def check_index(self):
+        # Raises if frequent_fts disagrees with the rows it indexes
+        with self.history.reader:
+            self.history.reader.execute("INSERT INTO frequent_fts (frequent_fts) VALUES ('integrity-check')")
+
+    def bury(self, word, count=OLDER):
+        # Newer entries that contain word, but only in the middle of the path
+        for i in range(count):
+            self.visit("https://filler%d.example/page-x%sy/%d" % (i % 7, word, i), "Filler page %d" % i)
+
+    def test_title_prefix_match_older_than_the_candidates(self):
+        self.visit("https://old.example/", "Gardening for beginners")
+        self.bury("gardening")
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("gardening"))[0], "https://old.example/")
+
+    def test_host_prefix_match_older_than_the_candidates(self):
+        self.visit("https://www.gardening.example/tips", "Tips")
+        self.bury("gardening")
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("gardening"))[0], "https://www.gardening.example/tips")
+
+    def test_frequently_visited_match_older_than_the_candidates(self):
+        self.visit("https://old.example/about-xgardeningy", "About", times=50)
+        self.bury("gardening")
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("gardening"))[0], "https://old.example/about-xgardeningy")
+
+    def test_short_query_finds_old_matches(self):
+        self.visit("https://old.example/", "Go tutorial")
+        self.visit("https://often.example/axgoy", "Often", times=50)
+        self.bury("go", count=unibrowser.SHORT_SEARCH_CANDIDATES * 2)
+        self.history.flush()
+        found = urls(self.history.search("go"))
+        self.assertEqual(found[:2], ["https://old.example/", "https://often.example/axgoy"])
+
+    def test_every_word_must_match(self):
+        self.visit("https://old.example/", "Gardening tools", times=50)
+        self.visit("https://new.example/", "Gardening seeds")
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("gardening seeds")), ["https://new.example/"])
+        self.assertEqual(urls(self.history.search("gardening tools")), ["https://old.example/"])
+
+    def test_frequent_index_follows_renames_and_clear(self):
+        self.visit("https://often.example/", "Old name", times=5)
+        self.history.flush()
+        self.history.update_title("https://often.example/", "New name")
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("old name")), [])
+        self.assertEqual(urls(self.history.search("new name")), ["https://often.example/"])
+        self.check_index()
+        self.history.clear()
+        self.history.flush()
+        self.assertEqual(urls(self.history.search("new name")), [])
+        self.check_index()
+
+class HistoryUpgradeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="unibrowser-search-")
+        self.path = os.path.join(self.dir, "history.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_frequent_index_is_built_for_existing_history(self):
+        history = unibrowser.HistoryStore(self.path)
+        for _ in range(5):
+            history.add_visit("https://often.example/about-xgardeningy", "About")
+        history.close()
+        # As left by a version without the frequently visited index
+        conn = sqlite3.connect(self.path)
+        for name in ("frequent_fts_insert", "frequent_fts_promote", "frequent_fts_delete", "frequent_fts_update"):
+            conn.execute("DROP TRIGGER %s" % name)
+        conn.execute("DROP TABLE frequent_fts")
+        conn.commit()
+        conn.close()
+        history = unibrowser.HistoryStore(self.path)
+        try:
+            for i in range(OLDER):
+                history.add_visit("https://filler.example/page-xgardeningy/%d" % i, "Filler")
+            history.flush()
+            self.assertEqual(urls(history.search("gardening"))[0], "https://often.example/about-xgardeningy")
+        finally:
+            history.close()
+
+class BookmarkSearchTest(unittest.TestCase):
+    def index(self, bookmarks):
+        index = unibrowser.BookmarkIndex(bookmarks)
+        index.search("wait for the build")
+        return index
+
+    def test_title_prefix_match_older_than_the_candidates(self):
+        bookmarks = [{"url": "https://old.example/", "title": "Gardening for beginners"}]
+        bookmarks += [{"url": "https://filler.example/page-xgardeningy/%d" % i, "title": "Filler"}
+                      for i in range(OLDER)]
+        index = self.index(bookmarks)
+        self.assertEqual(urls(index.search("gardening"))[0], "https://old.example/")
+        self.assertEqual(urls(index.search("ga"))[0], "https://old.example/")
+
+    def test_add_and_remove(self):
+        index = self.index([{"url": "https://a.example/", "title": "Alpha"}])
+        index.add({"url": "https://b.example/", "title": "Beta"})
+        self.assertEqual(urls(index.search("beta")), ["https://b.example/"])
+        index.remove("https://b.example/")
+        self.assertEqual(urls(index.search("beta")), [])
+        self.assertEqual(urls(index.search("alpha")), ["https://a.example/"])
+        if index.fts:
+            index.conn.execute("INSERT INTO docs (docs) VALUES ('integrity-check')")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+
+from support import unibrowser, application, wait_for, CountingServer
+
+# Find in all tabs: TabTextIndex on its own, fed the way the window feeds it
+# when pages finish loading, and the window's panel searching real pages.
+
+class TabTextIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+
+    def setUp(self):
+        self.index = unibrowser.TabTextIndex()
+
+    def tearDown(self):
+        self.index.close()
+        self.index.worker.join()
+
+    def indexed(self, session_id, url=None):
+        # The worker has written the tab's row (with this URL, if given)
+        def done():
+            with self.index.lock:
+                row = self.index.conn.execute("SELECT url FROM docs WHERE rowid = ?", (session_id,)).fetchone()
+            return row is not None and (url is None or row[0] == url)
+        self.assertTrue(wait_for(done, timeout=10))
+
+    def removed(self, session_id):
+        def done():
+            with self.index.lock:
+                return self.index.conn.execute("SELECT 1 FROM docs WHERE rowid = ?", (session_id,)).fetchone() is None
+        self.assertTrue(wait_for(done, timeout=10))
+
+    def put(self, session_id, url, title, text):
+        self.index.put(session_id, url, title, text)
+        self.indexed(session_id, url)
+
+    def ids(self, text, **kwargs):
+        return [r["id"] for r in self.index.search(text, **kwargs)]
+
+    def test_substring_any_case(self):
+        self.put(1, "https://a.example/", "Alpha", "The Quick brown fox jumps over the lazy dog")
+        self.put(2, "https://b.example/", "Beta", "Nothing to see here")
+        self.assertEqual(self.ids("quick BROWN"), [1])
+        self.assertEqual(self.ids("rown fo"), [1])
+        self.assertEqual(self.ids("see here"), [2])
+        self.assertEqual(self.ids("zebra"), [])
+
+    def test_phrase_matches_across_line_breaks(self):
+        self.put(1, "https://a.example/", "Alpha", "first line ends with quick\n\n   brown\tfox on the next")
+        self.assertEqual(self.ids("quick brown fox"), [1])
+        self.assertEqual(self.ids("  quick   brown "), [1])
+
+    def test_title_and_url_are_searched_and_titles_rank_first(self):
+        self.put(1, "https://a.example/", "Gardening tips", "Water in the morning")
+        self.put(2, "https://b.example/", "Weekly digest", "An article about gardening and more gardening")
+        self.put(3, "https://gardening.example/", "Home", "Welcome")
+        results = self.ids("gardening")
+        self.assertEqual(set(results), {1, 2, 3})
+        self.assertEqual(results[0], 1)
+
+    def test_snippet_surrounds_the_match(self):
+        words = " ".join("filler%d" % i for i in range(200))
+        self.put(1, "https://a.example/", "Long", words + " the needle is here " + words)
+        result, = self.index.search("needle")
+        self.assertIn("needle", result["snippet"])
+        self.assertLess(len(result["snippet"]), 200)
+        self.assertEqual((result["title"], result["url"]), ("Long", "https://a.example/"))
+
+    def test_short_queries_fall_back_to_like(self):
+        self.put(1, "https://a.example/", "Go", "a page about go")
+        self.put(2, "https://b.example/", "Other", "nothing")
+        self.assertEqual(self.ids("go"), [1])
+        self.assertEqual(self.ids("qz"), [])
+
+    def test_quotes_and_operators_are_literal(self):
+        self.put(1, "https://a.example/", "Quotes", 'he said "hello there" AND left; 100% sure_thing')
+        self.assertEqual(self.ids('"hello there"'), [1])
+        self.assertEqual(self.ids("AND left"), [1])
+        self.assertEqual(self.ids("100% sure_"), [1])
+        self.assertEqual(self.ids("hello OR zebra"), [])
+
+    def test_reindex_replaces_and_remove_drops(self):
+        self.put(1, "https://a.example/old", "Old", "old words")
+        self.put(1, "https://a.example/new", "New", "new words")
+        self.assertEqual(self.ids("old words"), [])
+        self.assertEqual(self.ids("new words"), [1])
+        self.index.remove(1)
+        self.assertNotIn(1, self.index.ids)
+        self.removed(1)
+        self.assertEqual(self.ids("new words"), [])
+
+    def test_only_the_newest_queued_op_counts(self):
+        for i in range(20):
+            self.index.put(5, "https://a.example/%d" % i, "Tab", "version %d text" % i)
+        self.index.remove(5)
+        self.index.put(5, "https://a.example/final", "Tab", "final text")
+        self.indexed(5, "https://a.example/final")
+        self.assertEqual(self.ids("version"), [])
+        self.assertEqual(self.ids("final text"), [5])
+
+    def test_limit(self):
+        for i in range(30):
+            self.index.put(i, "https://a.example/%d" % i, "Tab %d" % i, "common text")
+        self.indexed(29)
+        self.assertEqual(len(self.ids("common text", limit=10)), 10)
+        self.assertEqual(len(self.ids("common text")), 30)
+
+    def test_text_past_the_limit_is_not_indexed(self):
+        text = "a" * unibrowser.TAB_TEXT_LIMIT + " needle"
+        self.put(1, "https://a.example/", "Big", text)
+        self.assertEqual(self.ids("needle"), [])
+
+class FindInAllTabsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+        cls.server = CountingServer()
+        unibrowser.config_service().set("homepage", cls.server.url("/home"))
+        cls.window = unibrowser.UniBrowser(private=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.window.close()
+        cls.app.processEvents()
+        cls.server.close()
+
+    def results(self):
+        return {r["id"] for r in self.window.tab_results_model.records}
+
+    def test_panel_opened_right_after_loading_tabs(self):
+        window = self.window
+        tabs = [window.tab_widget.widget(window.add_tab(self.server.url("/page/%d" % i))) for i in range(3)]
+        for tab in tabs:
+            self.assertTrue(wait_for(lambda: tab.load_seconds is not None), "page did not load")
+        # Text the pages gained after loading is only indexed once the panel re-reads them
+        for tab in tabs:
+            tab.webview.page().runJavaScript("document.body.textContent = 'late arriving needle';")
+        window.show_find_bar()
+        window.find_input.setText("late arriving needle")
+        window.show_find_all()
+        # Enter searches at once, before the worker has indexed the re-read pages
+        window.find_return_pressed()
+        self.assertTrue(wait_for(lambda: self.results() == {tab.session_id for tab in tabs}, timeout=10))
+        self.assertEqual(window.find_count_label.text(), "3 tabs")
+        window.hide_find_bar()
+
+if __name__ == "__main__":
+    unittest.main()
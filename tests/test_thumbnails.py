@@ -0,0 +1,114 @@
+import unittest
+
+from support import unibrowser, application, wait_for
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtWidgets import QWidget
+
+def solid_image(color, width=unibrowser.THUMBNAIL_WIDTH, height=unibrowser.THUMBNAIL_HEIGHT):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(color))
+    return image
+
+class FakeTab(QWidget):
+    # Anything with a session id that can be grabbed will do
+    def __init__(self, session_id, color="#3366cc"):
+        super().__init__()
+        self.session_id = session_id
+        self.resize(1200, 800)
+        self.setStyleSheet("background: %s;" % color)
+
+class ThumbnailCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = application()
+
+    def setUp(self):
+        self.cache = unibrowser.ThumbnailCache()
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache.worker.join()
+
+    def fill(self, session_id, size):
+        # A snapshot of exactly `size` bytes, for the size accounting
+        self.cache.store(session_id, bytes(size))
+
+    def test_capture_is_scaled_to_fit(self):
+        tab = FakeTab(1)
+        self.cache.capture(tab, wait=True)
+        pixmap = self.cache.pixmap(1)
+        self.assertFalse(pixmap.isNull())
+        # 3:2 into a 240x150 box: the height is the limit
+        self.assertEqual(pixmap.height(), unibrowser.THUMBNAIL_HEIGHT)
+        self.assertLessEqual(pixmap.width(), unibrowser.THUMBNAIL_WIDTH)
+        self.assertAlmostEqual(pixmap.width() / pixmap.height(), 1200 / 800, delta=0.05)
+
+    def test_queued_capture_is_encoded_off_the_ui_thread(self):
+        tab = FakeTab(2)
+        self.cache.capture(tab)
+        self.assertTrue(wait_for(lambda: 2 in self.cache.snapshots, timeout=10))
+        self.assertTrue(self.cache.snapshots[2].startswith(b"\xff\xd8"))  # JPEG
+
+    def test_tabs_without_session_or_size_are_skipped(self):
+        tab = FakeTab(None)
+        self.cache.capture(tab, wait=True)
+        tab = FakeTab(3)
+        tab.resize(0, 0)
+        self.cache.capture(tab, wait=True)
+        self.assertEqual(len(self.cache.snapshots), 0)
+
+    def test_least_recently_captured_are_evicted(self):
+        limit = unibrowser.THUMBNAIL_CACHE_BYTES
+        chunk = limit // 10
+        for i in range(10):
+            self.fill(i, chunk)
+        self.assertEqual(list(self.cache.snapshots), list(range(10)))
+        # Recapturing tab 0 makes it the newest; tab 1 is now the oldest
+        self.fill(0, chunk)
+        self.fill(10, chunk)
+        self.assertNotIn(1, self.cache.snapshots)
+        self.assertIn(0, self.cache.snapshots)
+        self.assertLessEqual(self.cache.size, limit)
+        self.assertEqual(self.cache.size, sum(map(len, self.cache.snapshots.values())))
+
+    def test_size_accounting(self):
+        self.fill(1, 1000)
+        self.fill(2, 2000)
+        self.fill(1, 500)
+        self.assertEqual(self.cache.size, 2500)
+        self.cache.remove(2)
+        self.assertEqual(self.cache.size, 500)
+        self.cache.remove(2)
+        self.assertEqual(self.cache.size, 500)
+
+    def test_oversized_snapshot_is_kept_alone(self):
+        self.fill(1, 1000)
+        self.fill(2, unibrowser.THUMBNAIL_CACHE_BYTES + 1)
+        self.assertEqual(list(self.cache.snapshots), [2])
+
+    def test_decoded_pixmap_is_reused_until_recaptured(self):
+        self.cache.store(1, self.cache.encode(solid_image("#ff0000")))
+        first = self.cache.pixmap(1)
+        self.assertIs(self.cache.pixmap(1), first)
+        self.cache.store(1, self.cache.encode(solid_image("#00ff00")))
+        second = self.cache.pixmap(1)
+        self.assertIsNot(second, first)
+        self.assertGreater(second.toImage().pixelColor(5, 5).green(), 200)
+
+    def test_evicted_snapshot_has_no_pixmap(self):
+        self.cache.store(1, self.cache.encode(solid_image("#ff0000")))
+        self.assertIsNotNone(self.cache.pixmap(1))
+        self.fill(2, unibrowser.THUMBNAIL_CACHE_BYTES)
+        self.assertIsNone(self.cache.pixmap(1))
+        self.assertNotIn(1, self.cache.decoded)
+
+    def test_decoded_pixmaps_are_bounded(self):
+        data = self.cache.encode(solid_image("#808080"))
+        for i in range(unibrowser.THUMBNAIL_DECODED + 20):
+            self.cache.store(i, data)
+            self.cache.pixmap(i)
+        self.assertEqual(len(self.cache.decoded), unibrowser.THUMBNAIL_DECODED)
+        self.assertNotIn(0, self.cache.decoded)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,186 @@
 import sys
 import os
+import re
+import glob
 import json
-from PyQt5.QtCore import Qt, QUrl, QPoint, QTimer, pyqtSlot
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QLineEdit, QPushButton, QAction, QLabel, QDialog, QMenu)
-from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile, QWebEngineSettings
-from PyQt5.QtGui import QPalette, QColor, QKeySequence, QIcon
-from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor
+import math
+import heapq
+import bisect
+import time
+STARTUP_T0 = time.perf_counter()  # taken before the Qt imports, for --profile-startup
+import queue
+import sqlite3
+import threading
+import collections
+import html
+import hashlib
+from PyQt5.QtCore import Qt, QUrl, QPoint, QSize, QTimer, QObject, QFile, QBuffer, QByteArray, QDataStream, QIODevice, QAbstractListModel, QModelIndex, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QLineEdit, QPushButton, QAction, QLabel, QDialog, QMenu, QCompleter,
+                             QListView, QAbstractItemView, QFileDialog, QMessageBox,
+                             QFormLayout, QDialogButtonBox, QComboBox, QSpinBox)
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile, QWebEngineSettings, QWebEngineDownloadItem, QWebEngineScript
+from PyQt5.QtGui import QPalette, QColor, QKeySequence, QIcon, QPixmap, QStandardItemModel, QStandardItem, QDesktopServices
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+STARTUP_IMPORTED = time.perf_counter()
 
 DUCKDUCKGO_URL = "https://duckduckgo.com/?q="
-BOOKMARKS_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_bookmarks.json")
+BOOKMARKS_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_bookmarks.json")  # pre-journal format, migrated on load
+BOOKMARKS_JOURNAL = os.path.join(os.path.expanduser("~"), ".unibrowser_bookmarks.jsonl")
+BOOKMARKS_COMPACT_RECORDS = 1000  # the bookmark journal is snapshotted past this many records
+BOOKMARK_IMPORT_CHUNK = 256 * 1024  # characters of an import file read at a time
 CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_config.json")
+CONFIG_SAVE_DELAY_MS = 500
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_history.sqlite")
+SESSION_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_session.jsonl")
+DOWNLOADS_FILE = os.path.join(os.path.expanduser("~"), ".unibrowser_downloads.jsonl")
+FAVICON_DIR = os.path.join(os.path.expanduser("~"), ".unibrowser_favicons")
+FAVICON_SIZE = 32  # favicons are stored as PNGs of this size
+FAVICON_CACHE_SIZE = 512  # decoded icons kept in memory
+
+# Tab overview snapshots: downscaled to fit THUMBNAIL_WIDTH x THUMBNAIL_HEIGHT
+# and kept as JPEGs, at most THUMBNAIL_CACHE_BYTES of them per window
+THUMBNAIL_WIDTH = 240
+THUMBNAIL_HEIGHT = 150
+THUMBNAIL_QUALITY = 70
+THUMBNAIL_CACHE_BYTES = 8 * 1024 * 1024
+THUMBNAIL_DECODED = 64  # decoded snapshots kept for repainting the overview
+
+# The session journal is rewritten as a single snapshot after this many
+# records, or every SESSION_COMPACT_INTERVAL_MS if anything was appended
+SESSION_COMPACT_RECORDS = 1000
+SESSION_COMPACT_INTERVAL_MS = 5 * 60 * 1000
+SESSION_TITLE_DELAY_MS = 5000  # a tab's title changes are journaled at most this often
+CLOSED_TABS_LIMIT = 25  # closed tabs kept for reopening, newest last
+
+# History writes are coalesced into one transaction per batch on a worker thread
+HISTORY_BATCH_SIZE = 500
+HISTORY_BATCH_DELAY = 0.25
+HISTORY_PAGE_SIZE = 200
+
+# Full-text search: the indexes pick candidates that are then ranked in
+# Python, so they must pick by relevance rather than age. Candidates are the
+# newest matches, the entries whose title or host starts with a query word
+# (the best-scoring kind of match) and, for history, the most visited
+# matches among URLs with SEARCH_FREQUENT_VISITS or more visits, which have
+# a trigram index of their own. benchmarks/search_benchmark.py keeps it honest.
+SEARCH_CANDIDATES = 200
+SHORT_SEARCH_CANDIDATES = 200
+SEARCH_PREFIX_CANDIDATES = 50  # per query word and prefix
+SEARCH_FREQUENT_VISITS = 3  # part of the history schema's triggers
+SEARCH_FREQUENT_CANDIDATES = 100
+
+# Omnibox completion. Frecency is a visit count with exponential decay: a
+# visit is worth half as much every FRECENCY_HALF_LIFE seconds.
+FRECENCY_HALF_LIFE = 30 * 24 * 3600
+FRECENCY_EPOCH = 1577836800  # 2020-01-01, scores are measured from here
+BOOKMARK_FRECENCY_WEIGHT = 8  # a bookmark counts as this many fresh visits
+COMPLETION_SCAN_LIMIT = 2000
+COMPLETION_RESULTS = 8
+SEARCH_RESULTS = 100
+FIND_DEBOUNCE_MS = 150  # pause in typing before find-in-page searches
+TAB_TEXT_LIMIT = 1000000  # characters of a page's text indexed for find in all tabs
+TAB_SEARCH_RESULTS = 50
+TAB_SNIPPET_TOKENS = 32  # trigrams of page text shown around a match
+
+# Background tab discarding, overridable via the "tab_discard" key in CONFIG_FILE.
+# A budget of 0 disables that limit; policy is "lru" or "off".
+DEFAULT_TAB_DISCARD = {
+    "policy": "lru",
+    "max_live_tabs": 12,
+    "memory_budget_mb": 0,
+    "check_interval_ms": 30000,
+}
+
+# Background tab freezing (QWebEnginePage lifecycle), via the "tab_freeze" key.
+DEFAULT_TAB_FREEZE = {
+    "enabled": True,
+    "freeze_after_ms": 60000,
+    "check_interval_ms": 5000,
+}
+
+# Downloads, overridable via the "downloads" key. Past max_parallel, new
+# downloads wait paused in a queue.
+DEFAULT_DOWNLOADS = {
+    "max_parallel": 3,
+    "history_limit": 500,
+}
+DOWNLOAD_UPDATE_INTERVAL = 0.25  # seconds between progress updates per download
+
+# HTTP cache and cookies of the default profile, via the "cache" key.
+# type is "disk", "memory" or "none"; an empty path keeps Qt's default
+# location; max_size_mb 0 lets Chromium size the cache; cookies is
+# "persistent", "session" (never written to disk) or "force".
+DEFAULT_CACHE = {
+    "type": "disk",
+    "path": "",
+    "max_size_mb": 0,
+    "cookies": "persistent",
+}
+CACHE_MAX_SIZE_MB = 2047  # setHttpCacheMaximumSize takes a C++ int of bytes
+CACHE_CLEAR_POLL_MS = 250  # clearHttpCache() is asynchronous; poll the cache size
+CACHE_CLEAR_TIMEOUT_MS = 10000
+
+# Per-tab metrics (HUD and export), via the "metrics" key. An empty
+# export_path disables the export; format is "prometheus" or "jsonl".
+DEFAULT_METRICS = {
+    "export_path": "",
+    "format": "prometheus",
+    "interval_ms": 15000,
+    "hud_interval_ms": 1000,
+}
+# (Prometheus name, TabMetrics.sample() key, type, help)
+TAB_METRICS = [
+    ("tab_load_seconds", "load_seconds", "gauge", "Time from loadStarted to loadFinished of the last page load"),
+    ("tab_renderer_rss_bytes", "rss_bytes", "gauge", "Resident memory of the tab's renderer process"),
+    ("tab_renderer_cpu_seconds_total", "cpu_seconds", "counter", "CPU time used by the tab's renderer process"),
+    ("tab_requests_total", "requests", "counter", "Subresource requests of the page shown in the tab, since its load started"),
+    ("tab_blocked_requests_total", "blocked", "counter", "Of those, requests blocked by the ad blocker"),
+    ("tab_js_heap_bytes", "js_heap_bytes", "gauge", "Used JS heap, from performance.memory"),
+    ("tab_freezes_total", "freeze_count", "counter", "Times the tab's page was moved to the Frozen lifecycle state"),
+    ("tab_frozen_seconds_total", "frozen_seconds", "counter", "Time the tab's page has spent frozen"),
+    ("tab_cpu_seconds_saved_total", "cpu_seconds_saved", "counter",
+     "Renderer CPU time freezing the tab is estimated to have saved"),
+]
+# Window-wide counts, from TabMetrics.totals(); same tuple layout
+WINDOW_METRICS = [
+    ("tabs_frozen", "frozen", "gauge", "Tabs whose page is frozen"),
+    ("tabs_discarded", "discarded", "gauge", "Tabs discarded back to placeholders"),
+    ("tabs_unloaded", "unloaded", "gauge", "Restored tabs not loaded since the session was restored"),
+    ("tab_discards_total", "discards", "counter", "Tabs discarded to stay within the tab or memory budget"),
+]
+
+# Navigation/Paint/Resource Timing collected from every page load, kept per
+# origin in ring buffers. Disable with "performance_timing": false.
+PERF_ORIGINS = 200
+PERF_ENTRIES_PER_ORIGIN = 50
+PERF_MAX_RESOURCES = 150  # resource entries kept per load
+HUD_SLOWEST_RESOURCES = 5
+
+# Speculative DNS resolution and connection warm-up for likely navigation
+# targets, via the "preconnect" key: at most budget origins per budget_ms,
+# and an origin is not warmed again within cooldown_ms.
+DEFAULT_PRECONNECT = {
+    "enabled": True,
+    "budget": 8,
+    "budget_ms": 10000,
+    "cooldown_ms": 10000,
+}
+PRECONNECT_RECENT = 256  # warmed origins remembered for the cooldown
+
+# Hidden pages loading predicted bookmark and history targets, via the
+# "prerender" key: an entry hovered or selected for delay_ms starts
+# loading; unused pages are dropped after ttl_ms.
+DEFAULT_PRERENDER = {
+    "enabled": True,
+    "max_pages": 2,
+    "delay_ms": 300,
+    "ttl_ms": 120000,
+}
+
+# Ad/tracker blocking: EasyList-format lists are read from ADBLOCK_DIR unless
+# the "adblock" config key lists other files
+ADBLOCK_DIR = os.path.join(os.path.expanduser("~"), ".unibrowser_filters")
 
 # Set user agent and enable Widevine before QApplication is created
 os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = "--enable-widevine-cdm"
@@ -20,26 +191,493 @@ CHROME_USER_AGENT = (
     "Chrome/124.0.0.0 Safari/537.36"
 )
 
+class StartupProfile:
+    # --profile-startup: milliseconds from STARTUP_T0 to each startup phase.
+    # Only the first occurrence of a mark counts, so later windows don't
+    # overwrite the numbers of the first one.
+    def __init__(self):
+        self.enabled = False
+        self.path = "-"
+        self.quit_when_done = False
+        self.marks = {}
+
+    def start(self, path="-", quit_when_done=False):
+        self.enabled = True
+        self.path = path
+        self.quit_when_done = quit_when_done
+        self.marks = {"imports": round((STARTUP_IMPORTED - STARTUP_T0) * 1000, 3)}
+
+    def mark(self, name):
+        if self.enabled and name not in self.marks:
+            self.marks[name] = round((time.perf_counter() - STARTUP_T0) * 1000, 3)
+
+    def finish(self):
+        # Called once the first page has loaded
+        if not self.enabled:
+            return
+        self.mark("first_load")
+        self.enabled = False
+        report = {"unit": "ms", "pid": os.getpid(), "marks": self.marks}
+        if self.path == "-":
+            print(json.dumps(report, indent=2))
+        else:
+            atomic_write_json(self.path, report)
+        if self.quit_when_done:
+            QTimer.singleShot(0, QApplication.quit)
+
+startup_profile = StartupProfile()
+
+def atomic_write_json(path, data):
+    # Write to a temp file and rename over the target, so readers (and a
+    # crash mid-write) only ever see the old or the new file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ConfigService(QObject):
+    # Single cached copy of CONFIG_FILE shared by every window. Reads come
+    # from memory; set() notifies listeners through `changed` and schedules a
+    # debounced, atomic write of the whole file.
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, path=CONFIG_FILE, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.data = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    self.data = data
+        except (OSError, ValueError):
+            pass
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(CONFIG_SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.flush)
+        self.dirty = False
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        if key in self.data and self.data[key] == value:
+            return
+        self.data[key] = value
+        self.dirty = True
+        self.save_timer.start()
+        self.changed.emit(key, value)
+
+    def flush(self):
+        self.save_timer.stop()
+        if not self.dirty:
+            return
+        try:
+            atomic_write_json(self.path, self.data)
+            self.dirty = False
+        except OSError:
+            pass
+
+_config_service = None
+
+def config_service():
+    # The process-wide ConfigService, created on first use
+    global _config_service
+    if _config_service is None:
+        app = QApplication.instance()
+        _config_service = ConfigService(parent=app)
+        if app is not None:
+            app.aboutToQuit.connect(_config_service.flush)
+    return _config_service
+
+FILTER_TOKEN_RE = re.compile(r"[a-z0-9%]{2,}")
+FILTER_OPTIONS_RE = re.compile(r"^[a-z0-9~,=|._-]+$")
+FILTER_TYPES = {"script", "image", "stylesheet", "subdocument", "font", "media",
+                "object", "xmlhttprequest", "ping", "websocket", "other"}
+REQUEST_TYPES = {
+    QWebEngineUrlRequestInfo.ResourceTypeScript: "script",
+    QWebEngineUrlRequestInfo.ResourceTypeImage: "image",
+    QWebEngineUrlRequestInfo.ResourceTypeFavicon: "image",
+    QWebEngineUrlRequestInfo.ResourceTypeStylesheet: "stylesheet",
+    QWebEngineUrlRequestInfo.ResourceTypeSubFrame: "subdocument",
+    QWebEngineUrlRequestInfo.ResourceTypeFontResource: "font",
+    QWebEngineUrlRequestInfo.ResourceTypeMedia: "media",
+    QWebEngineUrlRequestInfo.ResourceTypeObject: "object",
+    QWebEngineUrlRequestInfo.ResourceTypePluginResource: "object",
+    QWebEngineUrlRequestInfo.ResourceTypeXhr: "xmlhttprequest",
+    QWebEngineUrlRequestInfo.ResourceTypePing: "ping",
+    QWebEngineUrlRequestInfo.ResourceTypeCspReport: "ping",
+}
+
+def filter_regex(pattern):
+    # Adblock Plus URL pattern to a regular expression over lower-cased URLs
+    prefix = ""
+    if pattern.startswith("||"):
+        prefix = r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?"
+        pattern = pattern[2:]
+    elif pattern.startswith("|"):
+        prefix = "^"
+        pattern = pattern[1:]
+    suffix = ""
+    if pattern.endswith("|"):
+        suffix = "$"
+        pattern = pattern[:-1]
+    body = re.escape(pattern).replace(r"\*", ".*").replace(r"\^", r"(?:[^a-z0-9_.%-]|$)")
+    return prefix + body + suffix
+
+def site_of(host):
+    # Rough registrable domain (last two labels), for third-party checks
+    return ".".join(host.rsplit(".", 2)[-2:])
+
+def host_suffixes(host):
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))]
+
+class FilterRule:
+    __slots__ = ("pattern", "regex", "third_party", "domains", "not_domains", "types", "not_types")
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.regex = None
+        self.third_party = None
+        self.domains = None
+        self.not_domains = None
+        self.types = None
+        self.not_types = None
+
+    def applies(self, first_party_host, resource_type, third_party):
+        if self.third_party is not None and self.third_party != third_party:
+            return False
+        if self.types is not None and resource_type not in self.types:
+            return False
+        if self.not_types is not None and resource_type in self.not_types:
+            return False
+        if self.domains is not None or self.not_domains is not None:
+            suffixes = host_suffixes(first_party_host)
+            if self.not_domains is not None and any(d in self.not_domains for d in suffixes):
+                return False
+            if self.domains is not None and not any(d in self.domains for d in suffixes):
+                return False
+        return True
+
+    def matches_url(self, url):
+        if self.regex is None:
+            # Compiled on first use: most rules never see a candidate URL
+            self.regex = re.compile(filter_regex(self.pattern))
+        return self.regex.search(url) is not None
+
+def parse_filter(line):
+    # One EasyList line to (rule, is_exception, host), where host is set for
+    # plain "||host^" rules. None for comments, cosmetic filters, regex
+    # rules and options this engine cannot honour.
+    line = line.strip()
+    if not line or line.startswith(("!", "[")) or "##" in line or "#@#" in line or "#?#" in line or "#$#" in line:
+        return None
+    exception = line.startswith("@@")
+    if exception:
+        line = line[2:]
+    options = ""
+    if "$" in line:
+        head, _, tail = line.rpartition("$")
+        if FILTER_OPTIONS_RE.match(tail):
+            line, options = head, tail
+    if not line or (line.startswith("/") and line.endswith("/") and len(line) > 1):
+        return None
+    rule = FilterRule(line.lower())
+    for option in filter(None, options.split(",")):
+        negated = option.startswith("~")
+        name = option.lstrip("~")
+        if name == "third-party":
+            rule.third_party = not negated
+        elif name.startswith("domain="):
+            for domain in name[7:].split("|"):
+                if domain.startswith("~"):
+                    rule.not_domains = (rule.not_domains or set()) | {domain[1:]}
+                else:
+                    rule.domains = (rule.domains or set()) | {domain}
+        elif name in FILTER_TYPES:
+            if negated:
+                rule.not_types = (rule.not_types or set()) | {name}
+            else:
+                rule.types = (rule.types or set()) | {name}
+        elif name not in ("match-case", "important"):
+            return None
+    host = None
+    if rule.pattern.startswith("||"):
+        candidate = rule.pattern[2:].rstrip("^")
+        if candidate and re.match(r"^[a-z0-9.-]+$", candidate) and rule.pattern[2:] in (candidate, candidate + "^"):
+            host = candidate
+    return rule, exception, host
+
+def filter_tokens(pattern):
+    # Alphanumeric runs that any URL matching `pattern` must contain whole:
+    # not bordering a wildcard, nor an unanchored start or end of the pattern
+    left_anchored = pattern.startswith("|")
+    body = pattern.lstrip("|")
+    right_anchored = body.endswith("|")
+    body = body.rstrip("|")
+    tokens = []
+    for m in FILTER_TOKEN_RE.finditer(body):
+        start, end = m.span()
+        if start == 0 and not left_anchored or start > 0 and body[start - 1] == "*":
+            continue
+        if end == len(body) and not right_anchored or end < len(body) and body[end] == "*":
+            continue
+        tokens.append(m.group())
+    return tokens
+
+class FilterBucket:
+    # Rules of one kind (blocking or exception), indexed two ways: plain
+    # "||host^" rules in a hash map probed with each parent domain of the
+    # request host, everything else filed under one of its required tokens.
+    # A URL then only tests the few rules filed under tokens it contains.
+    def __init__(self):
+        self.domains = {}
+        self.tokens = {}
+        self.untokenized = []
+
+    def add(self, rule, host):
+        if host is not None:
+            self.domains.setdefault(host, []).append(rule)
+            return
+        tokens = filter_tokens(rule.pattern)
+        if not tokens:
+            self.untokenized.append(rule)
+            return
+        # File under the rarest token seen so far to keep buckets short
+        token = min(tokens, key=lambda t: (len(self.tokens.get(t, ())), -len(t)))
+        self.tokens.setdefault(token, []).append(rule)
+
+    def match(self, url, url_tokens, host, first_party_host, resource_type, third_party):
+        for suffix in host_suffixes(host):
+            for rule in self.domains.get(suffix, ()):
+                if rule.applies(first_party_host, resource_type, third_party):
+                    return rule
+        for token in url_tokens:
+            for rule in self.tokens.get(token, ()):
+                if rule.applies(first_party_host, resource_type, third_party) and rule.matches_url(url):
+                    return rule
+        for rule in self.untokenized:
+            if rule.applies(first_party_host, resource_type, third_party) and rule.matches_url(url):
+                return rule
+        return None
+
+class FilterEngine:
+    # Compiled EasyList-style request filters
+    def __init__(self):
+        self.block = FilterBucket()
+        self.allow = FilterBucket()
+        self.rule_count = 0
+
+    def add_filter(self, line):
+        parsed = parse_filter(line)
+        if parsed is None:
+            return
+        rule, exception, host = parsed
+        (self.allow if exception else self.block).add(rule, host)
+        self.rule_count += 1
+
+    def load_file(self, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    self.add_filter(line)
+        except OSError:
+            pass
+
+    def should_block(self, url, host, first_party_host, resource_type):
+        url = url.lower()
+        host = host.lower()
+        first_party_host = first_party_host.lower()
+        third_party = bool(first_party_host) and site_of(host) != site_of(first_party_host)
+        url_tokens = set(FILTER_TOKEN_RE.findall(url))
+        if self.block.match(url, url_tokens, host, first_party_host, resource_type, third_party) is None:
+            return False
+        return self.allow.match(url, url_tokens, host, first_party_host, resource_type, third_party) is None
+
+_adblock_engine = None
+_adblock_loading = False
+
+def adblock_engine():
+    # The process-wide FilterEngine, or None until it has been compiled on a
+    # worker thread (started on first use) or if blocking is turned off
+    global _adblock_loading
+    if not _adblock_loading:
+        _adblock_loading = True
+        settings = config_service().get("adblock", {})
+        if settings.get("enabled", True):
+            paths = settings.get("lists") or sorted(glob.glob(os.path.join(ADBLOCK_DIR, "*.txt")))
+            def build():
+                global _adblock_engine
+                engine = FilterEngine()
+                for path in paths:
+                    engine.load_file(path)
+                _adblock_engine = engine
+            threading.Thread(target=build, name="adblock-compile", daemon=True).start()
+    return _adblock_engine
+
+class AdBlockInterceptor(QWebEngineUrlRequestInterceptor):
+    # One page's request interceptor: blocks subresource requests matched by
+    # the shared FilterEngine and counts the page's subresource requests and
+    # blocked ones. The request info doesn't say which page asked, so each
+    # BrowserTab installs its own and restarts the counts when a load starts.
+    blocked_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.requests = 0
+        self.blocked = 0
+
+    def reset(self):
+        self.requests = 0
+        if self.blocked:
+            self.blocked = 0
+            self.blocked_changed.emit()
+
+    def interceptRequest(self, info):
+        resource_type = info.resourceType()
+        if resource_type == QWebEngineUrlRequestInfo.ResourceTypeMainFrame:
+            return
+        self.requests += 1
+        engine = adblock_engine()
+        if engine is None:
+            return
+        url = info.requestUrl()
+        if url.scheme() not in ("http", "https", "ws", "wss"):
+            return
+        kind = "websocket" if url.scheme() in ("ws", "wss") else REQUEST_TYPES.get(resource_type, "other")
+        if engine.should_block(url.toString(), url.host(), info.firstPartyUrl().host(), kind):
+            info.block(True)
+            self.blocked += 1
+            self.blocked_changed.emit()
+
+CACHE_TYPES = {
+    "disk": QWebEngineProfile.DiskHttpCache,
+    "memory": QWebEngineProfile.MemoryHttpCache,
+    "none": QWebEngineProfile.NoCache,
+}
+COOKIE_POLICIES = {
+    "persistent": QWebEngineProfile.AllowPersistentCookies,
+    "session": QWebEngineProfile.NoPersistentCookies,
+    "force": QWebEngineProfile.ForcePersistentCookies,
+}
+
+def cache_settings(config):
+    settings = dict(DEFAULT_CACHE)
+    # Hand-edited config.json can hold anything; the profile setters can't
+    cache = config.get("cache", {})
+    if isinstance(cache, dict):
+        settings.update(cache)
+    try:
+        size = int(settings["max_size_mb"])
+    except (TypeError, ValueError):
+        size = DEFAULT_CACHE["max_size_mb"]
+    settings["max_size_mb"] = min(max(size, 0), CACHE_MAX_SIZE_MB)
+    for key in ("type", "path", "cookies"):
+        if not isinstance(settings[key], str):
+            settings[key] = DEFAULT_CACHE[key]
+    return settings
+
+def apply_cache_settings(profile, settings):
+    # Off-the-record profiles always cache in memory and never persist
+    # cookies; only the size limit applies to them
+    size = min(max(int(settings["max_size_mb"]), 0), CACHE_MAX_SIZE_MB)
+    profile.setHttpCacheMaximumSize(size * 1024 * 1024)
+    if profile.isOffTheRecord():
+        return
+    profile.setHttpCacheType(CACHE_TYPES.get(settings["type"], QWebEngineProfile.DiskHttpCache))
+    # An empty path means the profile's own folder, remembered before the
+    # first custom one replaces it
+    default_path = default_cache_path(profile)
+    profile.setCachePath(os.path.expanduser(settings["path"]) if settings["path"] else default_path)
+    profile.setPersistentCookiesPolicy(COOKIE_POLICIES.get(settings["cookies"], QWebEngineProfile.AllowPersistentCookies))
+
+def default_cache_path(profile):
+    if profile.property("default_cache_path") is None:
+        profile.setProperty("default_cache_path", profile.cachePath())
+    return profile.property("default_cache_path")
+
+def directory_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += directory_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
 class BrowserTab(QWidget):
-    def __init__(self, parent=None, private_profile=None):
+    # Emitted with the tab itself, so the window updates the right tab
+    url_changed = pyqtSignal(object, QUrl)
+    title_changed = pyqtSignal(object, str)
+    icon_changed = pyqtSignal(object, QIcon)
+    find_finished = pyqtSignal(object, int, int)  # tab, active match (from 1), number of matches
+    visited = pyqtSignal(object, str, str)  # tab, url, title; once per navigation
+    blocked_changed = pyqtSignal(object)  # tab; its page's blocked-request count changed
+
+    def __init__(self, parent=None, private_profile=None, url=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
+        self.session_id = None
+        self.last_activated = 0.0
+        self.last_deactivated = 0.0
+        self.pinned = False
+        # Lifecycle freezing bookkeeping, see TabManager.freeze_stats
+        self.frozen_at = None
+        self.background_cpu = None
+        self.frozen_cpu_rate = 0.0
+        self.freeze_count = 0
+        self.frozen_seconds = 0.0
+        self.cpu_seconds_saved = 0.0
+        # Metrics, see TabMetrics
+        self.load_started_at = None
+        self.load_seconds = None
+        self.js_heap_bytes = None
+        self.visit_url = None  # URL the current navigation was recorded under, see handle_load_finished
         self.webview = QWebEngineView()
         # Set user agent for this tab
         if private_profile:
-            self.webview.setPage(self.webview.page().__class__(private_profile, self.webview))
+            self.webview.setPage(QWebEnginePage(private_profile, self.webview))
         profile = self.webview.page().profile()
         profile.setHttpUserAgent(CHROME_USER_AGENT)
+        # Parented to the page, which doesn't own it, so it outlives the page's last request
+        self.interceptor = AdBlockInterceptor(self.webview.page())
+        self.interceptor.blocked_changed.connect(lambda: self.blocked_changed.emit(self))
+        self.webview.page().setUrlRequestInterceptor(self.interceptor)
+        if private_profile is None and config_service().get("performance_timing", True):
+            # Timing reports from the collector script, see install_performance_collector.
+            # Private windows don't collect them.
+            self.perf_bridge = PerformanceBridge(self)
+            channel = QWebChannel(self.webview.page())
+            channel.registerObject("unibrowserPerf", self.perf_bridge)
+            self.webview.page().setWebChannel(channel, QWebEngineScript.ApplicationWorld)
         self.layout.addWidget(self.webview)
         self.setLayout(self.layout)
-        self.webview.setUrl(QUrl("https://duckduckgo.com"))
         # Error handling: show error page if load fails
+        self.webview.loadStarted.connect(self.handle_load_started)
         self.webview.loadFinished.connect(self.handle_load_finished)
+        self.webview.urlChanged.connect(self.handle_url_changed)
+        self.webview.titleChanged.connect(self.handle_title_changed)
+        self.webview.iconChanged.connect(self.handle_icon_changed)
+        self.webview.page().findTextFinished.connect(self.handle_find_finished)
         # Custom context menu
         self.webview.setContextMenuPolicy(Qt.CustomContextMenu)
         self.webview.customContextMenuRequested.connect(self.show_context_menu)
+        # Navigate once, straight to the requested page
+        if url:
+            self.webview.setUrl(QUrl(url))
 
     def show_context_menu(self, pos):
         menu = QMenu()
@@ -69,7 +707,48 @@ class BrowserTab(QWidget):
         elif action == select_all:
             self.webview.triggerPageAction(QWebEnginePage.SelectAll)
 
+    def restore_scroll_position(self, pos):
+        # Scroll back once the page has loaded, e.g. after a discarded tab is reloaded
+        def restore(ok):
+            self.webview.loadFinished.disconnect(restore)
+            if ok:
+                self.webview.page().runJavaScript("window.scrollTo(%d, %d);" % (pos.x(), pos.y()))
+        self.webview.loadFinished.connect(restore)
+
+    def handle_load_started(self):
+        self.load_started_at = time.monotonic()
+        self.visit_url = None
+        self.interceptor.reset()
+
+    def handle_url_changed(self, url):
+        # Same-document navigations (fragments, pushState) change the URL
+        # without a load, and count as visits of their own
+        if self.load_started_at is None and self.visit_url is not None and url.toString() != self.visit_url:
+            self.record_visit()
+        self.url_changed.emit(self, url)
+
+    def handle_title_changed(self, title):
+        self.title_changed.emit(self, title)
+
+    def handle_icon_changed(self, icon):
+        self.icon_changed.emit(self, icon)
+
+    def handle_find_finished(self, result):
+        self.find_finished.emit(self, result.activeMatch(), result.numberOfMatches())
+
+    def record_visit(self):
+        url = self.webview.url()
+        if url.scheme() in ("data", "about", ""):
+            return
+        self.visit_url = url.toString()
+        self.visited.emit(self, self.visit_url, self.webview.page().title())
+
     def handle_load_finished(self, ok):
+        if self.load_started_at is not None:
+            self.load_seconds = round(time.monotonic() - self.load_started_at, 3)
+            self.load_started_at = None
+            if ok:
+                self.record_visit()
         if not ok:
             self.webview.setHtml("""
                 <html style='background:#fff;'><body style='font-family:sans-serif;text-align:center;padding:60px;'>
@@ -77,81 +756,2315 @@ class BrowserTab(QWidget):
                 <p>Check your internet connection or the URL and try again.</p>
                 </body></html>""")
 
+class LazyTab(QWidget):
+    # Lightweight stand-in for a background tab. Only the URL and title are
+    # kept; the real BrowserTab (and its renderer process) is built by
+    # UniBrowser.materialize_tab the first time the tab is selected.
+    def __init__(self, url, title=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.title = title or url
+        self.session_id = None
+        self.history_state = None  # serialized back/forward list, see serialize_history
+        self.scroll_position = None
+        self.last_activated = 0.0
+        self.pinned = False
+        self.discarded = False  # by TabManager, as opposed to restored and not loaded yet
+
+def process_rss(pid):
+    # Resident set size in bytes, read from /proc; 0 where unavailable
+    try:
+        with open("/proc/%d/statm" % pid, "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+def process_cpu_seconds(pid):
+    # User + system CPU time in seconds, read from /proc; None where unavailable
+    try:
+        with open("/proc/%d/stat" % pid, "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class TabManager(QObject):
+    # Records when each tab was last shown and discards the least recently
+    # used background tabs (back into LazyTab placeholders) whenever the
+    # live-tab or memory budget from the config is exceeded. Background tabs
+    # idle for longer than the freeze delay are moved to the Frozen lifecycle
+    # state so their timers and network polling stop until reselected.
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.browser = browser
+        self.tab_widget = browser.tab_widget
+        self.current_tab = None
+        self.settings = dict(DEFAULT_TAB_DISCARD)
+        self.settings.update(browser.config.get("tab_discard", {}))
+        self.freeze_settings = dict(DEFAULT_TAB_FREEZE)
+        self.freeze_settings.update(browser.config.get("tab_freeze", {}))
+        self.tab_widget.currentChanged.connect(self.tab_activated)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.enforce_budget)
+        if self.settings["policy"] != "off":
+            self.timer.start(self.settings["check_interval_ms"])
+        self.discards = 0
+        self.freeze_timer = QTimer(self)
+        self.freeze_timer.timeout.connect(self.freeze_idle_tabs)
+        if self.freeze_settings["enabled"]:
+            self.freeze_timer.start(self.freeze_settings["check_interval_ms"])
+
+    def tab_activated(self, idx):
+        now = time.monotonic()
+        previous = self.current_tab
+        if isinstance(previous, BrowserTab) and self.tab_widget.indexOf(previous) >= 0:
+            previous.last_deactivated = now
+            pid = previous.webview.page().renderProcessPid()
+            previous.background_cpu = (now, process_cpu_seconds(pid)) if pid > 0 else None
+        tab = self.tab_widget.widget(idx)
+        self.current_tab = tab
+        if tab is not None:
+            tab.last_activated = now
+        if isinstance(tab, BrowserTab):
+            tab.installEventFilter(self)
+            self.unfreeze_tab(tab)
+        self.enforce_budget()
+
+    def eventFilter(self, obj, event):
+        # Snapshot the tab being switched away from for the tab overview. By
+        # currentChanged it is hidden and its webview has dropped its frame;
+        # its own hide event comes first, while the webview still shows. The
+        # tab stack has updates off for the switch (grab() would leave out
+        # the webview) and turns them back on itself right after. Window
+        # hides, closed and discarded tabs are left alone.
+        if (event.type() == event.Hide and not event.spontaneous() and obj is self.current_tab
+                and self.browser.isVisible() and self.tab_widget.indexOf(obj) >= 0):
+            stack = obj.parentWidget()
+            stack.setUpdatesEnabled(True)
+            self.browser.thumbnails.capture(obj)
+            stack.setUpdatesEnabled(False)
+        return False
+
+    def can_freeze(self, tab):
+        page = tab.webview.page()
+        return (tab is not self.tab_widget.currentWidget() and not tab.pinned
+                and not page.recentlyAudible()
+                and page.lifecycleState() == QWebEnginePage.LifecycleState.Active)
+
+    def freeze_idle_tabs(self):
+        now = time.monotonic()
+        idle_after = self.freeze_settings["freeze_after_ms"] / 1000.0
+        for tab in self.live_tabs():
+            if self.can_freeze(tab) and now - tab.last_deactivated >= idle_after:
+                self.freeze_tab(tab, now)
+
+    def freeze_tab(self, tab, now):
+        page = tab.webview.page()
+        # CPU burned per second while idling in the background, used to
+        # estimate what the frozen period saved
+        cpu_rate = 0.0
+        pid = page.renderProcessPid()
+        cpu_now = process_cpu_seconds(pid) if pid > 0 else None
+        if tab.background_cpu and tab.background_cpu[1] is not None and cpu_now is not None:
+            elapsed = now - tab.background_cpu[0]
+            if elapsed > 0:
+                cpu_rate = max(0.0, (cpu_now - tab.background_cpu[1]) / elapsed)
+        tab.frozen_cpu_rate = cpu_rate
+        page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+        tab.frozen_at = now
+        tab.freeze_count += 1
+
+    def unfreeze_tab(self, tab):
+        if tab.frozen_at is None:
+            return
+        tab.webview.page().setLifecycleState(QWebEnginePage.LifecycleState.Active)
+        frozen_for = time.monotonic() - tab.frozen_at
+        tab.frozen_seconds += frozen_for
+        tab.cpu_seconds_saved += tab.frozen_cpu_rate * frozen_for
+        tab.frozen_at = None
+        tab.background_cpu = None
+
+    def freeze_stats(self):
+        # Per-tab CPU-savings counters; cpu_seconds_saved is an estimate based
+        # on the renderer's background CPU rate just before it was frozen
+        now = time.monotonic()
+        stats = []
+        for tab in self.live_tabs():
+            frozen_for = now - tab.frozen_at if tab.frozen_at is not None else 0.0
+            stats.append({
+                "tab": tab.session_id,
+                "url": tab.webview.url().toString(),
+                "frozen": tab.frozen_at is not None,
+                "freeze_count": tab.freeze_count,
+                "frozen_seconds": tab.frozen_seconds + frozen_for,
+                "cpu_seconds_saved": tab.cpu_seconds_saved + tab.frozen_cpu_rate * frozen_for,
+            })
+        return stats
+
+    def live_tabs(self):
+        return [self.tab_widget.widget(i) for i in range(self.tab_widget.count())
+                if isinstance(self.tab_widget.widget(i), BrowserTab)]
+
+    def memory_usage(self, tabs):
+        # Browser process plus each distinct renderer, in bytes
+        pids = {os.getpid()}
+        pids.update(tab.webview.page().renderProcessPid() for tab in tabs)
+        return sum(process_rss(pid) for pid in pids if pid > 0)
+
+    def enforce_budget(self):
+        if self.settings["policy"] != "lru":
+            return
+        live = self.live_tabs()
+        current = self.tab_widget.currentWidget()
+        candidates = sorted((tab for tab in live if tab is not current and not tab.pinned),
+                            key=lambda tab: tab.last_activated)
+        max_live = self.settings["max_live_tabs"]
+        excess = len(live) - max_live if max_live > 0 else 0
+        budget = self.settings["memory_budget_mb"] * 1024 * 1024
+        used = self.memory_usage(live) if budget > 0 else 0
+        while candidates and (excess > 0 or (budget > 0 and used > budget)):
+            tab = candidates.pop(0)
+            # Renderer memory is released asynchronously, so account for it up front
+            pid = tab.webview.page().renderProcessPid()
+            if pid > 0 and not any(other.webview.page().renderProcessPid() == pid for other in candidates):
+                used -= process_rss(pid)
+            self.discard_tab(tab)
+            excess -= 1
+
+    def discard_tab(self, tab):
+        idx = self.tab_widget.indexOf(tab)
+        if idx < 0 or tab is self.tab_widget.currentWidget():
+            return
+        url = tab.webview.url().toString()
+        placeholder = LazyTab(url, tab.webview.page().title() or url)
+        placeholder.scroll_position = tab.webview.page().scrollPosition()
+        placeholder.history_state = serialize_history(tab.webview.history())
+        placeholder.session_id = tab.session_id
+        placeholder.last_activated = tab.last_activated
+        placeholder.pinned = tab.pinned
+        placeholder.discarded = True
+        self.browser.replace_tab(idx, placeholder)
+        tab.deleteLater()
+        self.discards += 1
+
+def prometheus_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_prometheus(rows, totals=None):
+    # Text exposition format, e.g. for node_exporter's textfile collector.
+    # Tabs sharing a renderer process report the same RSS and CPU.
+    lines = []
+    for name, key, kind, help_text in WINDOW_METRICS if totals else ():
+        lines.append("# HELP unibrowser_%s %s" % (name, help_text))
+        lines.append("# TYPE unibrowser_%s %s" % (name, kind))
+        lines.append("unibrowser_%s %s" % (name, totals[key]))
+    for name, key, kind, help_text in TAB_METRICS:
+        lines.append("# HELP unibrowser_%s %s" % (name, help_text))
+        lines.append("# TYPE unibrowser_%s %s" % (name, kind))
+        for row in rows:
+            value = row.get(key)
+            if value is None:
+                continue
+            lines.append('unibrowser_%s{tab="%s",url="%s"} %s' % (name, row["tab"], prometheus_label(row["url"]), value))
+    return "\n".join(lines) + "\n"
+
+class TabMetrics(QObject):
+    # Per-tab performance metrics: load time (loadStarted to loadFinished),
+    # renderer PID with RSS and CPU from /proc, requests seen by the request
+    # interceptor, the JS heap where Chromium exposes performance.memory, and
+    # the freezing counters of TabManager.freeze_stats. sample() returns them
+    # as one dict per tab, totals() the window's frozen, discarded and
+    # not-yet-loaded tab counts; they are shown in the HUD overlay
+    # (Ctrl+Shift+M) and, if the "metrics" config key names an export_path,
+    # written there every interval_ms as Prometheus text or JSON lines.
+    JS_HEAP_SCRIPT = "performance.memory ? performance.memory.usedJSHeapSize : null"
+
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.browser = browser
+        self.tab_widget = browser.tab_widget
+        self.settings = dict(DEFAULT_METRICS)
+        self.settings.update(browser.config.get("metrics", {}))
+        self.cpu_samples = {}  # pid -> (monotonic time, CPU seconds)
+        self.hud = None
+        self.export_error = None
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.update_hud)
+        self.export_timer = QTimer(self)
+        self.export_timer.timeout.connect(self.export)
+        if self.settings["export_path"] and not browser.private:
+            self.export_timer.start(self.settings["interval_ms"])
+
+    def sample(self):
+        now = time.monotonic()
+        freezing = {stats["tab"]: stats for stats in self.browser.tab_manager.freeze_stats()}
+        cpu_percent = {}
+        rows = []
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if isinstance(tab, LazyTab):
+                rows.append({"tab": tab.session_id, "url": tab.url, "title": tab.title,
+                             "state": "discarded" if tab.discarded else "unloaded"})
+                continue
+            page = tab.webview.page()
+            url = tab.webview.url().toString()
+            pid = page.renderProcessPid()
+            if pid > 0 and pid not in cpu_percent:
+                cpu_percent[pid] = self.cpu_percent(pid, now)
+            rows.append({
+                "tab": tab.session_id,
+                "url": url,
+                "title": page.title(),
+                "state": "frozen" if tab.frozen_at is not None else "live",
+                "pid": pid if pid > 0 else None,
+                "load_seconds": tab.load_seconds,
+                "rss_bytes": process_rss(pid) if pid > 0 else None,
+                "cpu_seconds": process_cpu_seconds(pid) if pid > 0 else None,
+                "cpu_percent": cpu_percent.get(pid),
+                "requests": tab.interceptor.requests,
+                "blocked": tab.interceptor.blocked,
+                "js_heap_bytes": tab.js_heap_bytes,
+                "freeze_count": freezing[tab.session_id]["freeze_count"],
+                "frozen_seconds": round(freezing[tab.session_id]["frozen_seconds"], 1),
+                "cpu_seconds_saved": round(freezing[tab.session_id]["cpu_seconds_saved"], 2),
+            })
+            if tab.frozen_at is None:
+                # Frozen pages don't run scripts; the answer lands in time for the next sample
+                page.runJavaScript(self.JS_HEAP_SCRIPT, QWebEngineScript.ApplicationWorld,
+                                   lambda heap, tab=tab: setattr(tab, "js_heap_bytes", heap))
+        return rows
+
+    def totals(self, rows):
+        return {
+            "frozen": sum(row["state"] == "frozen" for row in rows),
+            "discarded": sum(row["state"] == "discarded" for row in rows),
+            "unloaded": sum(row["state"] == "unloaded" for row in rows),
+            "freezes": sum(row.get("freeze_count", 0) for row in rows),
+            "discards": self.browser.tab_manager.discards,
+            "cpu_seconds_saved": round(sum(row.get("cpu_seconds_saved", 0) for row in rows), 2),
+        }
+
+    def cpu_percent(self, pid, now):
+        # CPU use of a renderer since the previous sample, as a percentage of one core
+        cpu = process_cpu_seconds(pid)
+        if cpu is None:
+            return None
+        previous = self.cpu_samples.get(pid)
+        self.cpu_samples[pid] = (now, cpu)
+        if previous is None or now <= previous[0]:
+            return None
+        return round(100 * (cpu - previous[1]) / (now - previous[0]), 1)
+
+    def timing_lines(self, tab):
+        # Navigation timing of the current site: medians over its recent
+        # loads, and the slowest resources of its last load
+        if not isinstance(tab, BrowserTab):
+            return []
+        url = tab.webview.url()
+        origin = "%s://%s" % (url.scheme(), url.authority())
+        log = performance_log()
+        summary = log.summary(origin)
+        if not summary["loads"]:
+            return []
+        def fmt(value):
+            return "-" if value is None else "%.0fms" % value
+        lines = ["", "%s  (median of %d loads)  ttfb %s  fcp %s  dcl %s  load %s" % (
+            origin, summary["loads"], fmt(summary["ttfb"]), fmt(summary["first_contentful_paint"]),
+            fmt(summary["dom_content_loaded"]), fmt(summary["load"]))]
+        last = log.entries(origin)[-1]
+        for r in sorted(last["resources"], key=lambda r: r["duration"] or 0, reverse=True)[:HUD_SLOWEST_RESOURCES]:
+            lines.append("  %8s +%-8s %-10s %s" % (fmt(r["duration"]), fmt(r["start"]), r["type"], r["name"][-60:]))
+        return lines
+
+    def export(self):
+        rows = self.sample()
+        totals = self.totals(rows)
+        path = self.settings["export_path"]
+        try:
+            if self.settings["format"] == "jsonl":
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"time": time.time(), "pid": os.getpid(), "totals": totals,
+                                        "tabs": rows}) + "\n")
+            else:
+                # Scrapers must never see a half-written file
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(format_prometheus(rows, totals))
+                os.replace(tmp_path, path)
+            self.export_error = None
+        except OSError as e:
+            # Shown in the HUD until an export succeeds again
+            self.export_error = str(e)
+
+    def toggle_hud(self):
+        if self.hud is None:
+            self.hud = QLabel(self.tab_widget)
+            self.hud.setAttribute(Qt.WA_TransparentForMouseEvents)
+            self.hud.setStyleSheet("background: rgba(20, 20, 24, 210); color: #e8e8e8; border-radius: 8px; "
+                                   "padding: 8px 10px; font-family: monospace; font-size: 12px;")
+        if self.hud.isVisible():
+            self.hud.hide()
+            self.hud_timer.stop()
+        else:
+            self.update_hud()
+            self.hud.show()
+            self.hud_timer.start(self.settings["hud_interval_ms"])
+
+    def update_hud(self):
+        def fmt(value, unit=""):
+            return "-" if value is None else f"{value}{unit}"
+        lines = ["  tab state      load    pid       rss    cpu  reqs  blkd   js heap  title"]
+        rows = self.sample()
+        for row in rows:
+            load = row.get("load_seconds")
+            lines.append("%5s %-9s %6s %6s %9s %6s %5s %5s %9s  %s" % (
+                fmt(row["tab"]), row["state"],
+                "-" if load is None else "%.2fs" % load,
+                fmt(row.get("pid")),
+                "-" if row.get("rss_bytes") is None else format_bytes(row["rss_bytes"]),
+                fmt(row.get("cpu_percent"), "%"),
+                fmt(row.get("requests")), fmt(row.get("blocked")),
+                "-" if row.get("js_heap_bytes") is None else format_bytes(row["js_heap_bytes"]),
+                (row["title"] or row["url"])[:40]))
+        totals = self.totals(rows)
+        lines.append("frozen %d, discarded %d, unloaded %d  (%d freezes, %d discards, ~%.1f CPU s saved)" % (
+            totals["frozen"], totals["discarded"], totals["unloaded"], totals["freezes"], totals["discards"],
+            totals["cpu_seconds_saved"]))
+        if self.export_error:
+            lines.append("metrics export failed: %s" % self.export_error)
+        lines += self.timing_lines(self.tab_widget.currentWidget())
+        self.hud.setText("<pre style='margin:0'>%s</pre>" % html.escape("\n".join(lines)))
+        self.hud.adjustSize()
+        self.hud.move(self.tab_widget.width() - self.hud.width() - 12, self.tab_widget.tabBar().height() + 12)
+        self.hud.raise_()
+
+# Injected into every page (application world) to report the Navigation,
+# Paint and Resource Timing entries once the load event has finished
+PERF_COLLECTOR_JS = """
+(function () {
+    if (window.__unibrowserPerf) return;
+    window.__unibrowserPerf = true;
+    function ms(x) { return x ? Math.round(x * 10) / 10 : null; }
+    function collect() {
+        var nav = performance.getEntriesByType('navigation')[0];
+        var paint = {};
+        performance.getEntriesByType('paint').forEach(function (e) { paint[e.name] = ms(e.startTime); });
+        var resources = performance.getEntriesByType('resource').slice(0, %d).map(function (e) {
+            return {name: e.name, type: e.initiatorType, start: ms(e.startTime),
+                    duration: ms(e.duration), size: e.transferSize || 0};
+        });
+        return {
+            url: location.href,
+            origin: location.origin,
+            navigation: nav ? {
+                type: nav.type,
+                ttfb: ms(nav.responseStart),
+                response_end: ms(nav.responseEnd),
+                dom_content_loaded: ms(nav.domContentLoadedEventEnd),
+                load: ms(nav.loadEventEnd),
+                transfer_size: nav.transferSize || 0
+            } : null,
+            first_paint: paint['first-paint'] || null,
+            first_contentful_paint: paint['first-contentful-paint'] || null,
+            resources: resources
+        };
+    }
+    function report() {
+        new QWebChannel(qt.webChannelTransport, function (channel) {
+            channel.objects.unibrowserPerf.report(JSON.stringify(collect()));
+        });
+    }
+    // loadEventEnd is only filled in after the load handlers have returned
+    if (document.readyState === 'complete') setTimeout(report, 0);
+    else window.addEventListener('load', function () { setTimeout(report, 0); });
+})();
+""" % PERF_MAX_RESOURCES
+
+class PerformanceLog:
+    # Rolling per-origin ring buffers of page-load timing reports, newest
+    # last. Origins are evicted least recently reported first.
+    def __init__(self):
+        self.by_origin = {}
+
+    def add(self, report):
+        origin = report["origin"]
+        entries = self.by_origin.pop(origin, None)
+        if entries is None:
+            entries = collections.deque(maxlen=PERF_ENTRIES_PER_ORIGIN)
+        entries.append(report)
+        self.by_origin[origin] = entries
+        if len(self.by_origin) > PERF_ORIGINS:
+            del self.by_origin[next(iter(self.by_origin))]
+
+    def origins(self):
+        return list(self.by_origin)
+
+    def entries(self, origin):
+        return list(self.by_origin.get(origin, ()))
+
+    def summary(self, origin):
+        # Medians over the buffered loads of an origin, in milliseconds
+        entries = self.by_origin.get(origin, ())
+        def median(values):
+            values = sorted(v for v in values if v is not None)
+            return values[len(values) // 2] if values else None
+        navs = [e["navigation"] or {} for e in entries]
+        return {
+            "loads": len(entries),
+            "ttfb": median(n.get("ttfb") for n in navs),
+            "first_contentful_paint": median(e["first_contentful_paint"] for e in entries),
+            "dom_content_loaded": median(n.get("dom_content_loaded") for n in navs),
+            "load": median(n.get("load") for n in navs),
+        }
+
+_performance_log = None
+
+def performance_log():
+    # The process-wide PerformanceLog, shared by every window and profile
+    global _performance_log
+    if _performance_log is None:
+        _performance_log = PerformanceLog()
+    return _performance_log
+
+class PerformanceBridge(QObject):
+    # WebChannel endpoint the collector script reports to, one per tab
+    def __init__(self, tab):
+        super().__init__(tab)
+        self.tab = tab
+
+    @pyqtSlot(str)
+    def report(self, payload):
+        try:
+            report = json.loads(payload)
+        except ValueError:
+            return
+        if not isinstance(report, dict) or not str(report.get("origin", "")).startswith(("http://", "https://")):
+            return
+        report["time"] = time.time()
+        report["tab"] = self.tab.session_id
+        report["resources"] = report.get("resources", [])[:PERF_MAX_RESOURCES]
+        performance_log().add(report)
+
+def install_performance_collector(profile):
+    # Adds PERF_COLLECTOR_JS, with qwebchannel.js in front of it, to every
+    # page of the profile; BrowserTab sets up the matching channel
+    if not profile.scripts().findScript("unibrowser-performance").isNull():
+        return
+    f = QFile(":/qtwebchannel/qwebchannel.js")
+    if not f.open(QIODevice.ReadOnly):
+        return
+    channel_js = bytes(f.readAll()).decode("utf-8")
+    f.close()
+    script = QWebEngineScript()
+    script.setName("unibrowser-performance")
+    script.setSourceCode(channel_js + PERF_COLLECTOR_JS)
+    script.setInjectionPoint(QWebEngineScript.DocumentReady)
+    script.setWorldId(QWebEngineScript.ApplicationWorld)
+    script.setRunsOnSubFrames(False)
+    profile.scripts().insert(script)
+
+def url_origin(url):
+    # "scheme://host[:port]" of an http(s) URL, "" for anything else
+    qurl = QUrl(url)
+    if qurl.scheme() not in ("http", "https") or not qurl.host():
+        return ""
+    port = qurl.port()
+    return "%s://%s%s" % (qurl.scheme(), qurl.host(), "" if port < 0 else ":%d" % port)
+
+def omnibox_url(text):
+    # What load_url navigates to for the text typed in the URL bar
+    text = text.strip()
+    if text.startswith(("http://", "https://", "file://")):
+        return text
+    if text.startswith("www.") or ("." in text and " " not in text and len(text.split(".")) >= 2):
+        return "https://" + text
+    return DUCKDUCKGO_URL + text.replace(" ", "+")
+
+class Preconnector(QObject):
+    # Resolves and opens connections to origins the user is likely to visit
+    # next. The hints go through a hidden page of the window's profile, so the
+    # warmed sockets sit in the same network context as the tabs.
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.browser = browser
+        self.page = None
+        self.recent = {}  # origin -> monotonic time it was last warmed
+        self.sent = collections.deque()  # times of the warm-ups inside the budget window
+
+    def settings(self):
+        settings = dict(DEFAULT_PRECONNECT)
+        settings.update(self.browser.config.get("preconnect", {}))
+        return settings
+
+    def preconnect(self, url):
+        # Returns whether a hint was sent
+        settings = self.settings()
+        if not settings["enabled"]:
+            return False
+        origin = url_origin(url)
+        if not origin:
+            return False
+        now = time.monotonic()
+        last = self.recent.get(origin)
+        if last is not None and now - last < settings["cooldown_ms"] / 1000:
+            return False
+        while self.sent and now - self.sent[0] >= settings["budget_ms"] / 1000:
+            self.sent.popleft()
+        if len(self.sent) >= settings["budget"]:
+            return False
+        self.sent.append(now)
+        self.recent.pop(origin, None)
+        self.recent[origin] = now
+        if len(self.recent) > PRECONNECT_RECENT:
+            del self.recent[next(iter(self.recent))]
+        if self.page is None:
+            self.page = QWebEnginePage(self.browser.web_profile(), self)
+            # Link hints are ignored unless this is on
+            self.page.settings().setAttribute(QWebEngineSettings.DnsPrefetchEnabled, True)
+        href = html.escape(origin, quote=True)
+        self.page.setHtml('<!doctype html><link rel="dns-prefetch" href="%s"><link rel="preconnect" href="%s">'
+                          % (href, href))
+        return True
+
+    def close(self):
+        # The page must be deleted before an off-the-record profile
+        if self.page is not None:
+            self.page.deleteLater()
+            self.page = None
+
+class PrerenderPool(QObject):
+    # At most max_pages hidden BrowserTabs, keyed by the URL they were asked
+    # to load, oldest evicted first. UniBrowser.open_in_new_tab and
+    # load_url_from_string take a page out of the pool and show it as a tab
+    # (a new one, or in place of the current one), already loaded.
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.browser = browser
+        self.pages = collections.OrderedDict()  # url -> (BrowserTab, monotonic time started)
+        self.predicted = None
+        self.delay_timer = QTimer(self)
+        self.delay_timer.setSingleShot(True)
+        self.delay_timer.timeout.connect(self.prerender_predicted)
+        self.expire_timer = QTimer(self)
+        self.expire_timer.timeout.connect(self.expire)
+
+    def settings(self):
+        settings = dict(DEFAULT_PRERENDER)
+        settings.update(self.browser.config.get("prerender", {}))
+        return settings
+
+    def predict(self, url):
+        # The URL is prerendered if it is still the prediction after delay_ms
+        settings = self.settings()
+        if not settings["enabled"] or settings["max_pages"] <= 0:
+            return
+        self.predicted = url
+        self.delay_timer.start(settings["delay_ms"])
+
+    def prerender_predicted(self):
+        if self.predicted:
+            self.prerender(self.predicted)
+
+    def prerender(self, url):
+        if QUrl(url).scheme() not in ("http", "https"):
+            return
+        if url in self.pages:
+            self.pages.move_to_end(url)
+            return
+        settings = self.settings()
+        # No parent, so the page stays hidden until it is put into a tab
+        tab = BrowserTab(private_profile=self.browser.profile, url=url)
+        tab.webview.page().setAudioMuted(True)
+        self.pages[url] = (tab, time.monotonic())
+        while len(self.pages) > settings["max_pages"]:
+            self.pages.popitem(last=False)[1][0].deleteLater()
+        if not self.expire_timer.isActive():
+            self.expire_timer.start(max(settings["ttl_ms"] // 4, 1000))
+
+    def take(self, url):
+        # The prerendered tab for url, no longer owned by the pool, or None.
+        # Either way url is being opened now, so a pending prediction of it
+        # must not load it a second time.
+        if self.predicted == url:
+            self.delay_timer.stop()
+            self.predicted = None
+        entry = self.pages.pop(url, None)
+        if entry is None:
+            return None
+        tab = entry[0]
+        tab.webview.page().setAudioMuted(False)
+        return tab
+
+    def expire(self):
+        ttl = self.settings()["ttl_ms"] / 1000
+        now = time.monotonic()
+        for url, (tab, started) in list(self.pages.items()):
+            if now - started >= ttl:
+                del self.pages[url]
+                tab.deleteLater()
+        if not self.pages:
+            self.expire_timer.stop()
+
+    def clear(self):
+        self.delay_timer.stop()
+        self.expire_timer.stop()
+        while self.pages:
+            self.pages.popitem()[1][0].deleteLater()
+
+def serialize_history(history):
+    # QWebEngineHistory (back/forward list) as base64 text for JSON storage
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.WriteOnly)
+    stream << history
+    return bytes(data.toBase64()).decode("ascii")
+
+def restore_history(history, state):
+    # Also navigates to the restored current entry
+    data = QByteArray.fromBase64(state.encode("ascii"))
+    stream = QDataStream(data)
+    stream >> history
+
+class JsonJournal:
+    # Append-only JSON-lines log. Every record is flushed as soon as it is
+    # written, so a crash loses at most the line in flight (which read()
+    # skips). compact() atomically swaps the log for a single snapshot.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.records = 0
+        self.torn_tail = False
+
+    def read(self):
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # A last line without newline was cut short; the next
+                    # append must start on a fresh line
+                    self.torn_tail = not line.endswith("\n")
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn write from a crash
+        except OSError:
+            pass
+        self.records = len(records)
+        return records
+
+    def append(self, record):
+        try:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+                if self.torn_tail:
+                    self.file.write("\n")
+                    self.torn_tail = False
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.file.flush()
+            self.records += 1
+        except OSError:
+            pass
+
+    def compact(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.close()
+            os.replace(tmp_path, self.path)
+            self.records = 1
+            self.torn_tail = False
+        except OSError:
+            pass
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class SessionJournal(JsonJournal):
+    # Open tabs, their order, the active tab and the closed-tab stack,
+    # journaled as they change. Records:
+    #   {"op": "tab", "id", "url", "title", "history", "pinned"}
+    #                                                    tab added, navigated or (un)pinned
+    #   {"op": "close", "id", "closed"}                 tab closed (pushed on closed_tabs)
+    #   {"op": "reopen"}                                 closed_tabs popped
+    #   {"op": "order", "ids", "active"}                 tab order / selection
+    #   {"op": "snapshot", "tabs", "ids", "active", "closed_tabs"}
+    def load(self):
+        tabs = {}
+        ids = []
+        active = 0
+        closed_tabs = []
+        for record in self.read():
+            op = record.get("op")
+            if op == "snapshot":
+                tabs = {tab["id"]: tab for tab in record["tabs"]}
+                ids = record["ids"]
+                active = record["active"]
+                closed_tabs = record["closed_tabs"]
+            elif op == "tab":
+                tabs[record["id"]] = record
+            elif op == "close":
+                tabs.pop(record["id"], None)
+                closed_tabs.append(record["closed"])
+                del closed_tabs[:-CLOSED_TABS_LIMIT]
+            elif op == "reopen":
+                if closed_tabs:
+                    closed_tabs.pop()
+            elif op == "order":
+                ids = record["ids"]
+                active = record["active"]
+        ordered = [tabs[i] for i in ids if i in tabs]
+        ordered += [tab for i, tab in tabs.items() if i not in ids]
+        return {"tabs": ordered, "active": active, "closed_tabs": closed_tabs[-CLOSED_TABS_LIMIT:]}
+
+def fts_match_expression(terms):
+    # FTS5 trigram MATCH expression requiring every term as a substring.
+    # Terms shorter than a trigram cannot use the index; they are checked
+    # when ranking instead.
+    return " ".join('"%s"' % term.replace('"', '""') for term in terms if len(term) >= 3)
+
+def like_pattern(term):
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def prefix_candidates(table, terms, visits="0"):
+    # UNION arms selecting rows of table whose title, or whose host with or
+    # without "www.", starts with a query word. The ranges are served by
+    # indexes on lower(title) and lower(url), so the cost doesn't depend on
+    # how many rows merely contain the word.
+    arms = []
+    args = []
+    for term in terms:
+        for column, prefix in (("title", term), ("url", "https://" + term), ("url", "http://" + term),
+                               ("url", "https://www." + term), ("url", "http://www." + term)):
+            arms.append("SELECT * FROM (SELECT url, title, %s FROM %s WHERE lower(%s) >= ? AND lower(%s) < ? "
+                        "LIMIT ?)" % (visits, table, column, column))
+            args += [prefix, prefix + "\U0010ffff", SEARCH_PREFIX_CANDIDATES]
+    return arms, args
+
+def match_score(terms, title, url):
+    # Relevance of one entry for lower-cased query terms, or None if a term
+    # is missing. Prefix and word-start hits in the title or host rank highest.
+    title = title.lower()
+    url = url.lower()
+    host = url.split("://", 1)[-1].split("/", 1)[0]
+    score = 0.0
+    for term in terms:
+        if title.startswith(term) or host.startswith(term) or host.startswith("www." + term):
+            score += 4
+        elif (" " + term) in title or ("." + term) in host:
+            score += 3
+        elif term in title or term in host:
+            score += 2
+        elif term in url:
+            score += 1
+        else:
+            return None
+    return score
+
+def rank_search_results(terms, rows, limit):
+    # rows are (url, title, visit_count); frequently visited entries win ties
+    scored = []
+    for url, title, visits in rows:
+        score = match_score(terms, title, url)
+        if score is not None:
+            scored.append((score + 0.5 * math.log1p(visits), url, title))
+    return [{'url': url, 'title': title} for _, url, title in heapq.nlargest(limit, scored)]
+
+def completion_key(url):
+    # Normalised form matched against what is typed: no scheme, no "www."
+    key = url.strip().lower()
+    for scheme in ("https://", "http://", "file://"):
+        if key.startswith(scheme):
+            key = key[len(scheme):]
+            break
+    if key.startswith("www."):
+        key = key[4:]
+    return key
+
+def frecency_score(visit_time, weight=1):
+    # log2 of the decayed visit weight relative to FRECENCY_EPOCH. Decay is
+    # the same for every entry, so scores from different times compare directly.
+    return (visit_time - FRECENCY_EPOCH) / FRECENCY_HALF_LIFE + math.log2(weight)
+
+def add_frecency(a, b):
+    # log2(2**a + 2**b) without overflow
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+class FrecencyIndex:
+    # Prefix index behind the omnibox. Completion keys are kept sorted for
+    # bisecting the prefix range, and alongside in frecency order. A narrow
+    # range is ranked directly; a wide one (a short, common prefix) is served
+    # by walking the frecency order until enough keys match, which stays
+    # short precisely because matches are dense. Both lists are updated
+    # incrementally on every visit or bookmark.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []
+        self.ranked = []
+        self.entries = {}  # key -> [score, url, title]
+
+    def add(self, url, title, visit_time=None, weight=1):
+        key = completion_key(url)
+        if not key:
+            return
+        score = frecency_score(visit_time or time.time(), weight)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = [score, url, title]
+                bisect.insort(self.keys, key)
+            else:
+                del self.ranked[bisect.bisect_left(self.ranked, (-entry[0], key))]
+                entry[0] = add_frecency(entry[0], score)
+                entry[1] = url
+                entry[2] = title or entry[2]
+            bisect.insort(self.ranked, (-entry[0], key))
+
+    def set_title(self, url, title):
+        key = completion_key(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == url:
+                entry[2] = title
+
+    def load(self, rows):
+        # Bulk build from (url, title, visit_count, last_visit) rows, merging
+        # in anything added while the rows were being read
+        entries = {}
+        for url, title, visit_count, last_visit in rows:
+            key = completion_key(url)
+            if not key:
+                continue
+            score = frecency_score(last_visit, max(visit_count, 1))
+            if key in entries:
+                entries[key][0] = add_frecency(entries[key][0], score)
+            else:
+                entries[key] = [score, url, title]
+        with self.lock:
+            for key, entry in self.entries.items():
+                if key in entries:
+                    entries[key][0] = add_frecency(entries[key][0], entry[0])
+                else:
+                    entries[key] = entry
+            self.entries = entries
+            self.keys = sorted(entries)
+            self.ranked = sorted((-entry[0], key) for key, entry in entries.items())
+
+    def complete(self, text, limit=COMPLETION_RESULTS):
+        prefix = completion_key(text)
+        if not prefix:
+            return []
+        with self.lock:
+            lo = bisect.bisect_left(self.keys, prefix)
+            hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+            if hi - lo <= COMPLETION_SCAN_LIMIT:
+                best = heapq.nlargest(limit, (self.entries[key] for key in self.keys[lo:hi]))
+            else:
+                best = []
+                for _, key in self.ranked:
+                    if key.startswith(prefix):
+                        best.append(self.entries[key])
+                        if len(best) == limit:
+                            break
+            return [{'url': url, 'title': title} for _, url, title in best]
+
+class BookmarkIndex:
+    # Incremental full-text index over bookmark titles and URLs: an in-memory
+    # table with an FTS5 index over it. The initial build runs on a worker
+    # thread; the lock makes the first search wait for it rather than see
+    # partial data.
+    def __init__(self, bookmarks):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE bookmarks (id INTEGER PRIMARY KEY, title TEXT, url TEXT);
+            CREATE INDEX bookmarks_title ON bookmarks(lower(title));
+            CREATE INDEX bookmarks_url ON bookmarks(lower(url));
+        ''')
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE docs USING fts5("
+                              "title, url, content='bookmarks', content_rowid='id', tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5/trigram: fall back to LIKE scans
+            self.fts = False
+        self.rowids = {}
+        self.next_rowid = 1
+        self.lock.acquire()
+        threading.Thread(target=self.build, args=(list(bookmarks),), name="bookmark-index", daemon=True).start()
+
+    def build(self, bookmarks):
+        try:
+            for b in bookmarks:
+                self.insert(b)
+            self.conn.commit()
+        finally:
+            self.lock.release()
+
+    def insert(self, b):
+        if b["url"] in self.rowids:
+            return
+        rowid = self.next_rowid
+        self.next_rowid += 1
+        self.rowids[b["url"]] = rowid
+        self.conn.execute("INSERT INTO bookmarks (id, title, url) VALUES (?, ?, ?)", (rowid, b["title"], b["url"]))
+        if self.fts:
+            self.conn.execute("INSERT INTO docs (rowid, title, url) VALUES (?, ?, ?)", (rowid, b["title"], b["url"]))
+
+    def add(self, b):
+        with self.lock:
+            self.insert(b)
+            self.conn.commit()
+
+    def add_many(self, bookmarks):
+        # Bulk insert (imports) on a worker thread, like the initial build
+        self.lock.acquire()
+        threading.Thread(target=self.build, args=(list(bookmarks),), name="bookmark-index", daemon=True).start()
+
+    def remove(self, url):
+        with self.lock:
+            rowid = self.rowids.pop(url, None)
+            if rowid is not None:
+                if self.fts:
+                    self.conn.execute("INSERT INTO docs (docs, rowid, title, url) "
+                                      "SELECT 'delete', id, title, url FROM bookmarks WHERE id = ?", (rowid,))
+                self.conn.execute("DELETE FROM bookmarks WHERE id = ?", (rowid,))
+                self.conn.commit()
+
+    def search(self, text, limit=SEARCH_RESULTS):
+        terms = text.lower().split()
+        if not terms:
+            return []
+        expr = fts_match_expression(terms)
+        arms, args = prefix_candidates("bookmarks", terms)
+        if expr and self.fts:
+            arms.insert(0, "SELECT * FROM (SELECT b.url, b.title, 0 FROM docs JOIN bookmarks b ON b.id = docs.rowid "
+                           "WHERE docs MATCH ? ORDER BY docs.rowid DESC LIMIT ?)")
+            args[:0] = [expr, SEARCH_CANDIDATES]
+        else:
+            pattern = like_pattern(max(terms, key=len))
+            arms.insert(0, "SELECT * FROM (SELECT url, title, 0 FROM bookmarks "
+                           "WHERE title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\' ORDER BY id DESC LIMIT ?)")
+            args[:0] = [pattern, pattern, SHORT_SEARCH_CANDIDATES]
+        with self.lock:
+            rows = self.conn.execute(" UNION ".join(arms), args).fetchall()
+        return rank_search_results(terms, rows, limit)
+
+class TabTextIndex(QObject):
+    # Full-text index over the title, URL and page text of a window's tabs,
+    # keyed by tab session id, for find in all tabs. An in-memory FTS5
+    # trigram table is the inverted index; it matches any substring of three
+    # characters or more. Pages are queued by put() as they finish loading
+    # and indexed by a worker thread, which only ever takes the lock for one
+    # page at a time. A discarded tab keeps its row, so its last text stays
+    # searchable without a webview.
+    indexed = pyqtSignal()  # emitted from the worker thread after each batch of pages
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE docs USING fts5(title, url, body, tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5/trigram: fall back to LIKE scans
+            self.conn.execute("CREATE TABLE docs (rowid INTEGER PRIMARY KEY, title TEXT, url TEXT, body TEXT)")
+            self.fts = False
+        self.ids = set()  # session ids with a row, for the UI thread
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self.index_loop, name="tab-text-index", daemon=True)
+        self.worker.start()
+
+    def put(self, session_id, url, title, text):
+        self.ids.add(session_id)
+        self.queue.put(("put", session_id, url, title or "", text[:TAB_TEXT_LIMIT]))
+
+    def remove(self, session_id):
+        self.ids.discard(session_id)
+        self.queue.put(("remove", session_id))
+
+    def close(self):
+        self.queue.put(("stop",))
+
+    def index_loop(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Only the newest op for a tab matters
+            last = {op[1]: i for i, op in enumerate(batch) if op[0] != "stop"}
+            for i, op in enumerate(batch):
+                if op[0] == "stop":
+                    running = False
+                elif last[op[1]] == i:
+                    with self.lock:
+                        self.conn.execute("DELETE FROM docs WHERE rowid = ?", (op[1],))
+                        if op[0] == "put":
+                            # Whitespace is collapsed, as in queries, so phrases match across line breaks
+                            self.conn.execute("INSERT INTO docs (rowid, url, title, body) VALUES (?, ?, ?, ?)",
+                                              (op[1], op[2], op[3], " ".join(op[4].split())))
+                        self.conn.commit()
+            if running:
+                self.indexed.emit()
+        self.conn.close()
+
+    def search(self, text, limit=TAB_SEARCH_RESULTS):
+        # Tabs containing text (as one substring, any case), best first, as
+        # dicts with the tab's session id and a snippet around the match
+        text = " ".join(text.lower().split())
+        if not text:
+            return []
+        with self.lock:
+            if self.fts and len(text) >= 3:
+                rows = self.conn.execute(
+                    "SELECT rowid, title, url, snippet(docs, 2, '', '', '…', ?) FROM docs "
+                    "WHERE docs MATCH ? ORDER BY bm25(docs, 5.0, 2.0, 1.0) LIMIT ?",
+                    (TAB_SNIPPET_TOKENS, '"%s"' % text.replace('"', '""'), limit)).fetchall()
+            else:
+                pattern = like_pattern(text)
+                rows = self.conn.execute(
+                    "SELECT rowid, title, url, substr(body, max(instr(lower(body), ?) - 30, 1), 100) FROM docs "
+                    "WHERE title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\' OR body LIKE ? ESCAPE '\\' "
+                    "ORDER BY (title LIKE ? ESCAPE '\\') DESC LIMIT ?",
+                    (text, pattern, pattern, pattern, pattern, limit)).fetchall()
+        return [{"id": rowid, "title": title, "url": url, "snippet": " ".join(snippet.split())}
+                for rowid, title, url, snippet in rows]
+
+# Netscape bookmark files: a link, a folder heading, or a <DL>/</DL> nesting marker
+NETSCAPE_TOKEN_RE = re.compile(r"<(?:a\s([^>]*)>(.*?)</a>|h3\b[^>]*>(.*?)</h3>|(/?)dl\b[^>]*>)", re.I | re.S)
+NETSCAPE_ATTR_RE = re.compile(r'\b(href|add_date|tags)\s*=\s*"([^"]*)"', re.I)
+NETSCAPE_MARKUP_RE = re.compile(r"<[^>]*>")
+JSON_SPACE_RE = re.compile(r"[ \t\n\r]*")
+
+def iter_netscape_bookmarks(path):
+    # Streams bookmarks out of the Netscape bookmark file format that every
+    # browser exports. Folders are <H3> headings followed by a nested <DL>.
+    # The file is scanned a chunk at a time; a token cut off at the end of a
+    # chunk is carried over to the next one.
+    folders = []  # one entry per open <DL>: its folder name or None
+    folder = ""
+    heading = None
+    tail = ""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(BOOKMARK_IMPORT_CHUNK), ""):
+            text = tail + chunk
+            end = 0
+            for m in NETSCAPE_TOKEN_RE.finditer(text):
+                end = m.end()
+                attrs, title, name, dl_end = m.group(1, 2, 3, 4)
+                if attrs is not None:
+                    attrs = {k.lower(): v for k, v in NETSCAPE_ATTR_RE.findall(attrs)}
+                    url = netscape_text(attrs.get("href", ""))
+                    tags = attrs.get("tags")
+                    try:
+                        added = float(attrs.get("add_date") or 0) or None
+                    except ValueError:
+                        added = None
+                    yield {
+                        "url": url,
+                        "title": netscape_text(title).strip() or url,
+                        "folder": folder,
+                        "tags": [t.strip() for t in netscape_text(tags).split(",") if t.strip()] if tags else [],
+                        "added": added,
+                    }
+                elif name is not None:
+                    heading = netscape_text(name).strip()
+                else:
+                    if dl_end:
+                        if folders:
+                            folders.pop()
+                    else:
+                        folders.append(heading)
+                        heading = None
+                    folder = "/".join(name for name in folders if name)
+            tail = text[end:]
+
+def netscape_text(text):
+    if "<" in text:
+        text = NETSCAPE_MARKUP_RE.sub("", text)
+    return html.unescape(text) if "&" in text else text
+
+class JsonStream:
+    # A JSON file read BOOKMARK_IMPORT_CHUNK characters at a time. Values are
+    # decoded with JSONDecoder.raw_decode straight out of the buffer; arrays
+    # and objects too big for it are walked an element at a time instead,
+    # with items() and members().
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.f.read(BOOKMARK_IMPORT_CHUNK)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        # The next character past whitespace, "" at the end of the file
+        while True:
+            self.pos = JSON_SPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self.fill()
+
+    def take(self, expected):
+        c = self.peek()
+        if not c or c not in expected:
+            raise ValueError("Expecting one of %r, found %r" % (expected, c))
+        self.pos += 1
+        return c
+
+    def value(self):
+        # The next value, whole, reading as much of the file as it takes
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if self.complete(value, end):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def small_value(self):
+        # (True, value) if the next value ends within the buffer, topped up
+        # to at least half a chunk ahead; (False, None) if it must be walked
+        if len(self.buf) - self.pos < BOOKMARK_IMPORT_CHUNK // 2 and not self.eof:
+            self.fill()
+        self.peek()
+        try:
+            value, end = self.decoder.raw_decode(self.buf, self.pos)
+        except ValueError:
+            return False, None
+        if not self.complete(value, end):
+            return False, None
+        self.pos = end
+        return True, value
+
+    def complete(self, value, end):
+        # Whether a value decoded up to end can't go on in the next chunk,
+        # as a number cut off before its fraction or exponent would
+        if self.eof:
+            return True
+        if end == len(self.buf):
+            return False
+        return not isinstance(value, (int, float)) or self.buf[end] not in ".eE"
+
+    def items(self):
+        # Walks an array: yields once per element, which the caller must read
+        # (with value() or by walking it) before asking for the next
+        self.take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.take(",]") == "]":
+                return
+
+    def members(self):
+        # Walks an object: yields each key, with its value to be read as above
+        self.take("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.take(":")
+            yield key
+            if self.take(",}") == "}":
+                return
+
+def iter_json_bookmarks(path):
+    # Streams bookmarks out of our own export (a list of bookmarks), Chrome's
+    # Bookmarks file ({"roots": ...}) and Firefox's JSON backup (nested
+    # "children"), holding no more of the file than a JsonStream buffer
+    with open(path, "r", encoding="utf-8") as f:
+        stream = JsonStream(f)
+        for folders, b in stream_json_bookmarks(stream):
+            b["folder"] = b["folder"] or "/".join(folders)
+            yield b
+        if stream.peek():
+            raise ValueError("Extra data after the bookmarks")
+
+def stream_json_bookmarks(stream):
+    # (folders, bookmark) for each bookmark in the stream's next value, as
+    # json_bookmarks does for a decoded one
+    small, value = stream.small_value()
+    if small:
+        yield from json_bookmarks(value)
+        return
+    c = stream.peek()
+    if c == "[":
+        for _ in stream.items():
+            yield from stream_json_bookmarks(stream)
+        return
+    if c != "{":
+        stream.value()
+        return
+    node = {}
+    pending = []
+    for key in stream.members():
+        if key == "roots":
+            node["roots"] = True
+            for _ in stream.members():
+                yield from stream_json_bookmarks(stream)
+        elif key == "children":
+            for folders, b in stream_json_bookmarks(stream):
+                if node.get("root") or node.get("title"):
+                    yield json_folder(node) + folders, b
+                else:
+                    # Chrome names a folder after its children
+                    pending.append((folders, b))
+        else:
+            node[key] = stream.value()
+    if "roots" in node:
+        return
+    url = node.get("url") or node.get("uri")
+    if url:
+        yield (), json_bookmark(node, url)
+    else:
+        for folders, b in pending:
+            yield json_folder(node) + folders, b
+
+def json_bookmarks(node):
+    # (folders, bookmark) for each bookmark in a decoded value; folders are
+    # the names of the folders below node that hold it
+    if isinstance(node, list):
+        for child in node:
+            yield from json_bookmarks(child)
+        return
+    if not isinstance(node, dict):
+        return
+    if "roots" in node:
+        for root in node["roots"].values():
+            yield from json_bookmarks(root)
+        return
+    url = node.get("url") or node.get("uri")
+    if url:
+        yield (), json_bookmark(node, url)
+    elif "children" in node:
+        for folders, b in json_bookmarks(node["children"]):
+            yield json_folder(node) + folders, b
+
+def json_folder(node):
+    name = node.get("title") or node.get("name") or ""
+    if node.get("root") or not name:
+        return ()  # Firefox's built-in roots ("menu", "toolbar", ...)
+    return (name,)
+
+def json_bookmark(node, url):
+    if "date_added" in node:
+        # Chrome: microseconds since 1601-01-01
+        added = int(node["date_added"]) / 1e6 - 11644473600
+    elif "dateAdded" in node:
+        added = node["dateAdded"] / 1e6  # Firefox: microseconds since the epoch
+    else:
+        added = node.get("added")
+    tags = node.get("tags") or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",") if t.strip()]
+    return {
+        "url": url,
+        "title": node.get("title") or node.get("name") or url,
+        "folder": node.get("folder") or "",  # set in full by iter_json_bookmarks
+        "tags": list(tags),
+        "added": added,
+    }
+
+class BookmarkStore:
+    # Bookmarks keyed by URL in an insertion-ordered dict, so duplicate checks
+    # and removals are O(1). Each bookmark is {"url", "title", "folder",
+    # "tags", "added"}; folders are "/"-separated paths. Changes are appended
+    # to a JsonJournal rather than rewriting the file:
+    #   {"op": "add", "bookmark"}           bookmark added
+    #   {"op": "update", "url", "bookmark"} bookmark edited (url may change)
+    #   {"op": "remove", "url"}             bookmark deleted
+    #   {"op": "snapshot", "bookmarks"}     whole store, written by compact()
+    # path=None keeps bookmarks in memory only (private windows).
+    def __init__(self, path=None, legacy_path=None):
+        self.journal = JsonJournal(path) if path else None
+        self.bookmarks = {}
+        if self.journal is None:
+            return
+        records = self.journal.read()
+        migrated = False
+        if not records and legacy_path and os.path.exists(legacy_path):
+            # Bookmarks from before the journal: a plain JSON list
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    records = [{"op": "snapshot", "bookmarks": json.load(f)}]
+                    migrated = True
+            except (OSError, ValueError):
+                records = []
+        for record in records:
+            op = record.get("op")
+            if op == "snapshot":
+                self.bookmarks = {}
+                for b in record["bookmarks"]:
+                    if isinstance(b, dict) and b.get("url"):
+                        self.bookmarks.setdefault(b["url"], self.normalize(b))
+            elif op == "add":
+                self.bookmarks.setdefault(record["bookmark"]["url"], record["bookmark"])
+            elif op == "update":
+                self.replace(record["url"], record["bookmark"])
+            elif op == "remove":
+                self.bookmarks.pop(record["url"], None)
+        if migrated or self.journal.records > max(BOOKMARKS_COMPACT_RECORDS, len(self.bookmarks)):
+            self.compact()
+
+    @staticmethod
+    def normalize(b):
+        return {
+            "url": b["url"],
+            "title": b.get("title") or b["url"],
+            "folder": b.get("folder") or "",
+            "tags": list(b.get("tags") or []),
+            "added": b.get("added") or time.time(),
+        }
+
+    def __len__(self):
+        return len(self.bookmarks)
+
+    def __iter__(self):
+        return iter(self.bookmarks.values())
+
+    def __contains__(self, url):
+        return url in self.bookmarks
+
+    def get(self, url):
+        return self.bookmarks.get(url)
+
+    def folders(self):
+        return sorted({b["folder"] for b in self.bookmarks.values() if b["folder"]})
+
+    def tagged(self, tag):
+        return [b for b in self.bookmarks.values() if tag in b["tags"]]
+
+    def add(self, url, title, folder="", tags=()):
+        # Returns the new bookmark, or None if the URL is already bookmarked
+        if url in self.bookmarks:
+            return None
+        b = self.normalize({"url": url, "title": title, "folder": folder, "tags": tags})
+        self.bookmarks[url] = b
+        self.log({"op": "add", "bookmark": b})
+        return b
+
+    def update(self, old_url, **fields):
+        # Returns the edited bookmark, or None if the new URL is taken
+        new = dict(self.bookmarks[old_url], **fields)
+        if new["url"] != old_url and new["url"] in self.bookmarks:
+            return None
+        self.replace(old_url, new)
+        self.log({"op": "update", "url": old_url, "bookmark": new})
+        return new
+
+    def replace(self, url, new):
+        if new["url"] == url:
+            self.bookmarks[url] = new
+            return
+        # Rebuild to keep the bookmark's position under its new key
+        self.bookmarks = {(new["url"] if key == url else key): (new if key == url else b)
+                          for key, b in self.bookmarks.items()}
+
+    def remove(self, url):
+        if self.bookmarks.pop(url, None) is not None:
+            self.log({"op": "remove", "url": url})
+
+    def import_file(self, path):
+        # Streams a Netscape HTML or JSON export into the store, skipping URLs
+        # that are already bookmarked. Returns the bookmarks that were added.
+        if path.lower().endswith((".html", ".htm")):
+            parsed = iter_netscape_bookmarks(path)
+        else:
+            parsed = iter_json_bookmarks(path)
+        added = []
+        now = time.time()
+        for b in parsed:
+            url = b["url"]
+            if url and url not in self.bookmarks and not url.startswith(("place:", "javascript:")):
+                b["added"] = b["added"] or now
+                self.bookmarks[url] = b
+                added.append(b)
+        if added:
+            self.compact()  # one snapshot instead of a record per bookmark
+        return added
+
+    def export_file(self, path):
+        if path.lower().endswith((".html", ".htm")):
+            self.export_netscape(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(list(self.bookmarks.values()), f, indent=2)
+
+    def export_netscape(self, path):
+        escape = html.escape
+        lines = ["<!DOCTYPE NETSCAPE-Bookmark-file-1>",
+                 '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">',
+                 "<TITLE>Bookmarks</TITLE>", "<H1>Bookmarks</H1>", "<DL><p>"]
+        open_folders = []
+        for b in sorted(self.bookmarks.values(), key=lambda b: b["folder"]):
+            folders = b["folder"].split("/") if b["folder"] else []
+            common = 0
+            while common < min(len(folders), len(open_folders)) and folders[common] == open_folders[common]:
+                common += 1
+            while len(open_folders) > common:
+                open_folders.pop()
+                lines.append("    " * (len(open_folders) + 1) + "</DL><p>")
+            for name in folders[common:]:
+                indent = "    " * (len(open_folders) + 1)
+                lines.append(indent + "<DT><H3>%s</H3>" % escape(name))
+                lines.append(indent + "<DL><p>")
+                open_folders.append(name)
+            tags = ' TAGS="%s"' % escape(",".join(b["tags"])) if b["tags"] else ""
+            lines.append("    " * (len(open_folders) + 1) + '<DT><A HREF="%s" ADD_DATE="%d"%s>%s</A>' % (
+                escape(b["url"]), b["added"], tags, escape(b["title"])))
+        while open_folders:
+            open_folders.pop()
+            lines.append("    " * (len(open_folders) + 1) + "</DL><p>")
+        lines.append("</DL><p>")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def log(self, record):
+        if self.journal is None:
+            return
+        self.journal.append(record)
+        if self.journal.records > max(BOOKMARKS_COMPACT_RECORDS, len(self.bookmarks)):
+            self.compact()
+
+    def compact(self):
+        if self.journal is not None:
+            self.journal.compact({"op": "snapshot", "bookmarks": list(self.bookmarks.values())})
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
+class HistoryStore(QObject):
+    # Visit history in SQLite (WAL). Visits are queued from the UI thread and
+    # written in batches by a background thread; reads run on the UI thread
+    # through a separate connection so they never wait on the writer.
+    flushed = pyqtSignal()  # emitted from the writer thread, see flush_soon()
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL DEFAULT '',
+            visit_count INTEGER NOT NULL DEFAULT 0,
+            last_visit REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS urls_title ON urls(title);
+        CREATE INDEX IF NOT EXISTS urls_last_visit ON urls(last_visit);
+        CREATE INDEX IF NOT EXISTS urls_title_lower ON urls(lower(title));
+        CREATE INDEX IF NOT EXISTS urls_url_lower ON urls(lower(url));
+        CREATE INDEX IF NOT EXISTS urls_frequent ON urls(visit_count) WHERE visit_count >= %(frequent)d;
+        CREATE TABLE IF NOT EXISTS visits (
+            id INTEGER PRIMARY KEY,
+            url_id INTEGER NOT NULL REFERENCES urls(id),
+            visit_time REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS visits_time ON visits(visit_time);
+        CREATE INDEX IF NOT EXISTS visits_url ON visits(url_id);
+    ''' % {"frequent": SEARCH_FREQUENT_VISITS}
+    # Trigram full-text indexes over urls, kept in sync by triggers: one over
+    # every URL and a small one over the frequently visited ones
+    FTS_SCHEMA = '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts USING fts5(
+            title, url, content='urls', content_rowid='id', tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS urls_fts_insert AFTER INSERT ON urls BEGIN
+            INSERT INTO urls_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS urls_fts_delete AFTER DELETE ON urls BEGIN
+            INSERT INTO urls_fts (urls_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS urls_fts_update AFTER UPDATE OF title, url ON urls
+        WHEN old.title IS NOT new.title OR old.url IS NOT new.url BEGIN
+            INSERT INTO urls_fts (urls_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+            INSERT INTO urls_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+        CREATE VIRTUAL TABLE IF NOT EXISTS frequent_fts USING fts5(
+            title, url, content='urls', content_rowid='id', tokenize='trigram');
+        CREATE TRIGGER IF NOT EXISTS frequent_fts_insert AFTER INSERT ON urls
+        WHEN new.visit_count >= %(frequent)d BEGIN
+            INSERT INTO frequent_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS frequent_fts_promote AFTER UPDATE OF visit_count ON urls
+        WHEN old.visit_count < %(frequent)d AND new.visit_count >= %(frequent)d BEGIN
+            INSERT INTO frequent_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS frequent_fts_delete AFTER DELETE ON urls
+        WHEN old.visit_count >= %(frequent)d BEGIN
+            INSERT INTO frequent_fts (frequent_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS frequent_fts_update AFTER UPDATE OF title, url ON urls
+        WHEN old.visit_count >= %(frequent)d AND (old.title IS NOT new.title OR old.url IS NOT new.url) BEGIN
+            INSERT INTO frequent_fts (frequent_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+            INSERT INTO frequent_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+    ''' % {"frequent": SEARCH_FREQUENT_VISITS}
+
+    def __init__(self, path=None):
+        # path=None keeps history in memory only (private windows)
+        super().__init__()
+        if path is None:
+            self.uri = "file:unibrowser-private-%d?mode=memory&cache=shared" % id(self)
+        else:
+            self.uri = "file:%s" % path
+        self.persistent = path is not None
+        self.reader = self.connect()
+        self.reader.executescript(self.SCHEMA)
+        self.queue = queue.Queue()
+        had_fts = self.reader.execute("SELECT 1 FROM sqlite_master WHERE name = 'frequent_fts'").fetchone()
+        try:
+            self.reader.executescript(self.FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5/trigram: search falls back to LIKE scans
+            self.fts = False
+        if self.fts and not had_fts:
+            # Index rows recorded before (this) full-text search existed, off the UI thread
+            self.queue.put(("rebuild_fts",))
+        self.writer = threading.Thread(target=self.write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.uri, uri=True)
+        if self.persistent:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Room for the index pages a search touches (the default is 2 MB)
+            conn.execute("PRAGMA cache_size=-16384")
+        else:
+            # Shared-cache databases use table locks; let reads skip them
+            conn.execute("PRAGMA read_uncommitted=1")
+        return conn
+
+    def add_visit(self, url, title, visit_time=None):
+        self.queue.put(("visit", url, title or "", visit_time or time.time()))
+
+    def update_title(self, url, title):
+        # Renames the URL without counting a visit
+        self.queue.put(("title", url, title))
+
+    def clear(self):
+        self.queue.put(("clear",))
+
+    def flush(self):
+        # Block until every queued write has been committed
+        self.queue.join()
+
+    def flush_soon(self):
+        # Commit what is queued without waiting out the batch delay, then
+        # emit flushed; for the UI thread, which must not block in flush()
+        self.queue.put(("flush",))
+
+    def close(self):
+        self.queue.put(("stop",))
+        self.writer.join()
+        self.reader.close()
+
+    def write_loop(self):
+        conn = self.connect()
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + HISTORY_BATCH_DELAY
+            while len(batch) < HISTORY_BATCH_SIZE and batch[-1][0] not in ("stop", "flush"):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            # Of the title updates for a URL only the batch's last one is written
+            last_title = {op[1]: i for i, op in enumerate(batch) if op[0] == "title"}
+            try:
+                with conn:
+                    for i, op in enumerate(batch):
+                        if op[0] == "stop":
+                            running = False
+                        elif op[0] == "flush":
+                            pass
+                        elif op[0] != "title" or last_title[op[1]] == i:
+                            self.apply(conn, op)
+            except sqlite3.Error:
+                pass
+            for _ in batch:
+                self.queue.task_done()
+            if batch[-1][0] == "flush":
+                self.flushed.emit()
+        conn.close()
+
+    def apply(self, conn, op):
+        if op[0] == "visit":
+            _, url, title, visit_time = op
+            conn.execute(
+                "INSERT INTO urls (url, title, visit_count, last_visit) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "title = CASE WHEN excluded.title != '' THEN excluded.title ELSE urls.title END, "
+                "visit_count = urls.visit_count + 1, last_visit = excluded.last_visit",
+                (url, title, visit_time))
+            conn.execute(
+                "INSERT INTO visits (url_id, visit_time) SELECT id, ? FROM urls WHERE url = ?",
+                (visit_time, url))
+        elif op[0] == "title":
+            _, url, title = op
+            conn.execute("UPDATE urls SET title = ? WHERE url = ? AND title != ?", (title, url, title))
+        elif op[0] == "clear":
+            conn.execute("DELETE FROM visits")
+            conn.execute("DELETE FROM urls")
+        elif op[0] == "rebuild_fts":
+            conn.execute("INSERT INTO urls_fts (urls_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO frequent_fts (frequent_fts) VALUES ('delete-all')")
+            conn.execute("INSERT INTO frequent_fts (rowid, title, url) "
+                         "SELECT id, title, url FROM urls WHERE visit_count >= ?", (SEARCH_FREQUENT_VISITS,))
+
+    def url_rows(self):
+        # Every distinct URL with its visit stats. Uses its own connection so
+        # it can run on a worker thread.
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT url, title, visit_count, last_visit FROM urls").fetchall()
+        finally:
+            conn.close()
+
+    def search(self, text, limit=SEARCH_RESULTS):
+        # Ranked matches over every distinct URL's title and address
+        terms = text.lower().split()
+        if not terms:
+            return []
+        expr = fts_match_expression(terms)
+        arms, args = prefix_candidates("urls", terms, "visit_count")
+        if expr and self.fts:
+            arms[:0] = [
+                "SELECT * FROM (SELECT u.url, u.title, u.visit_count FROM urls_fts JOIN urls u ON u.id = urls_fts.rowid "
+                "WHERE urls_fts MATCH ? ORDER BY urls_fts.rowid DESC LIMIT ?)",
+                "SELECT * FROM (SELECT u.url, u.title, u.visit_count FROM frequent_fts "
+                "JOIN urls u ON u.id = frequent_fts.rowid WHERE frequent_fts MATCH ? ORDER BY u.visit_count DESC LIMIT ?)"]
+            args[:0] = [expr, SEARCH_CANDIDATES, expr, SEARCH_FREQUENT_CANDIDATES]
+        else:
+            # Too short for the trigram index: scan most recent first and stop
+            # early, and the frequently visited URLs most visited first
+            pattern = like_pattern(max(terms, key=len))
+            arms[:0] = [
+                "SELECT * FROM (SELECT url, title, visit_count FROM urls "
+                "WHERE title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\' ORDER BY last_visit DESC LIMIT ?)",
+                "SELECT * FROM (SELECT url, title, visit_count FROM urls WHERE visit_count >= %d "
+                "AND (title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\') ORDER BY visit_count DESC LIMIT ?)"
+                % SEARCH_FREQUENT_VISITS]
+            args[:0] = [pattern, pattern, SHORT_SEARCH_CANDIDATES, pattern, pattern, SEARCH_FREQUENT_CANDIDATES]
+        rows = self.reader.execute(" UNION ".join(arms), args).fetchall()
+        return rank_search_results(terms, rows, limit)
+
+    def page(self, limit=HISTORY_PAGE_SIZE, before=None, after=None):
+        # Newest visits first. Pass the (visit_time, id) of the last row as
+        # `before` to fetch the next page; keyset paging keeps deep pages cheap.
+        # `after` returns only visits newer than the given row.
+        if before is not None:
+            rows = self.reader.execute(
+                "SELECT v.visit_time, v.id, u.url, u.title FROM visits v JOIN urls u ON u.id = v.url_id "
+                "WHERE (v.visit_time, v.id) < (?, ?) "
+                "ORDER BY v.visit_time DESC, v.id DESC LIMIT ?", (before[0], before[1], limit))
+        elif after is not None:
+            rows = self.reader.execute(
+                "SELECT v.visit_time, v.id, u.url, u.title FROM visits v JOIN urls u ON u.id = v.url_id "
+                "WHERE (v.visit_time, v.id) > (?, ?) "
+                "ORDER BY v.visit_time DESC, v.id DESC LIMIT ?", (after[0], after[1], limit))
+        else:
+            rows = self.reader.execute(
+                "SELECT v.visit_time, v.id, u.url, u.title FROM visits v JOIN urls u ON u.id = v.url_id "
+                "ORDER BY v.visit_time DESC, v.id DESC LIMIT ?", (limit,))
+        return [{'visit_time': t, 'id': i, 'url': url, 'title': title} for t, i, url, title in rows]
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+def unique_download_name(directory, name, taken):
+    # "file.zip" -> "file (1).zip" while the name exists on disk or is the
+    # target of another download in progress
+    base, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while os.path.join(directory, candidate) in taken or os.path.exists(os.path.join(directory, candidate)):
+        candidate = f"{base} ({n}){ext}"
+        n += 1
+    return candidate
+
+class DownloadManager(QObject):
+    # Every download of the process. watch() connects a profile's
+    # downloadRequested exactly once. At most "max_parallel" downloads
+    # transfer at a time; the rest are accepted but held paused in a FIFO
+    # queue and resumed as slots free up. Records are plain dicts (see
+    # handle_request) so they can be journaled; the QWebEngineDownloadItems
+    # of this session live in `items`. DOWNLOADS_FILE is a JsonJournal of
+    #   {"op": "download", "download"}   a download started or finished
+    #   {"op": "snapshot", "downloads"}  the trimmed history, from compact()
+    # Downloads from private profiles are never written to it.
+    added = pyqtSignal(dict)
+    changed = pyqtSignal(dict)  # progress (throttled) and state changes
+    finished = pyqtSignal(dict)  # completed, cancelled or interrupted
+
+    FINAL_STATES = ("completed", "cancelled", "interrupted")
+
+    def __init__(self, path=DOWNLOADS_FILE, parent=None):
+        super().__init__(parent)
+        self.settings = dict(DEFAULT_DOWNLOADS)
+        self.settings.update(config_service().get("downloads", {}))
+        self.journal = JsonJournal(path)
+        self.records = self.load()
+        self.next_id = max((r["id"] for r in self.records), default=0) + 1
+        self.items = {}  # record id -> QWebEngineDownloadItem
+        self.active = set()  # ids holding a transfer slot
+        self.waiting = []  # records queued (paused) for a slot, oldest first
+        self.profiles = []
+
+    def load(self):
+        records = {}
+        for record in self.journal.read():
+            op = record.get("op")
+            if op == "snapshot":
+                records = {d["id"]: d for d in record["downloads"]}
+            elif op == "download":
+                records[record["download"]["id"]] = record["download"]
+        records = list(records.values())[-self.settings["history_limit"]:]
+        for record in records:
+            if record["state"] not in self.FINAL_STATES:
+                # Still running when the last session ended
+                record["state"] = "interrupted"
+                record["rate"] = 0
+        if self.journal.records > 2 * max(len(records), 1):
+            self.journal.compact({"op": "snapshot", "downloads": records})
+        return records
+
+    def watch(self, profile, private=False):
+        if profile in self.profiles:
+            return
+        self.profiles.append(profile)
+        profile.downloadRequested.connect(lambda item: self.handle_request(item, private))
+        profile.destroyed.connect(lambda: self.profiles.remove(profile))
+
+    def handle_request(self, item, private=False):
+        directory = item.downloadDirectory()
+        taken = {r["path"] for r in self.records if r["id"] in self.items}
+        name = unique_download_name(directory, item.downloadFileName() or "download", taken)
+        item.setDownloadFileName(name)
+        record = {
+            "id": self.next_id,
+            "url": item.url().toString(),
+            "path": os.path.join(directory, name),
+            "state": "downloading",
+            "received": 0,
+            "total": item.totalBytes(),
+            "rate": 0,
+            "started": time.time(),
+            "finished": None,
+            "error": "",
+            "private": private,
+        }
+        self.next_id += 1
+        self.records.append(record)
+        self.items[record["id"]] = item
+        sample = [time.monotonic(), 0]  # time and bytes of the last progress update
+        item.downloadProgress.connect(lambda received, total: self.progress(record, sample, received, total))
+        item.stateChanged.connect(lambda state: self.state_changed(record, state))
+        # A private window's downloads die with its profile, without a state change
+        item.destroyed.connect(lambda: self.item_destroyed(record))
+        item.accept()
+        if len(self.active) >= self.settings["max_parallel"]:
+            record["state"] = "queued"
+            self.waiting.append(record)
+            item.pause()
+        else:
+            self.active.add(record["id"])
+        self.log(record)
+        self.added.emit(record)
+
+    def progress(self, record, sample, received, total):
+        record["received"] = received
+        record["total"] = total
+        now = time.monotonic()
+        elapsed = now - sample[0]
+        if elapsed >= DOWNLOAD_UPDATE_INTERVAL:
+            record["rate"] = (received - sample[1]) / elapsed
+            sample[:] = [now, received]
+            self.changed.emit(record)
+
+    def state_changed(self, record, state):
+        item = self.items.get(record["id"])
+        if item is None:
+            return
+        if state == QWebEngineDownloadItem.DownloadCompleted:
+            record["received"] = record["total"] = item.receivedBytes()
+            self.finish(record, "completed")
+        elif state == QWebEngineDownloadItem.DownloadCancelled:
+            self.finish(record, "cancelled")
+        elif state == QWebEngineDownloadItem.DownloadInterrupted:
+            self.finish(record, "interrupted", item.interruptReasonString())
+
+    def item_destroyed(self, record):
+        if record["id"] in self.items:
+            self.finish(record, "cancelled")
+
+    def finish(self, record, state, error=""):
+        record["state"] = state
+        record["error"] = error
+        record["rate"] = 0
+        record["finished"] = time.time()
+        del self.items[record["id"]]
+        if record in self.waiting:
+            self.waiting.remove(record)
+        self.release(record)
+        self.log(record)
+        self.changed.emit(record)
+        self.finished.emit(record)
+
+    def release(self, record):
+        # Give up record's transfer slot and resume queued downloads into it
+        self.active.discard(record["id"])
+        while self.waiting and len(self.active) < self.settings["max_parallel"]:
+            nxt = self.waiting.pop(0)
+            self.active.add(nxt["id"])
+            nxt["state"] = "downloading"
+            self.items[nxt["id"]].resume()
+            self.changed.emit(nxt)
+
+    def pause(self, record):
+        item = self.items.get(record["id"])
+        if item is None or record["state"] not in ("downloading", "queued"):
+            return
+        if record in self.waiting:
+            self.waiting.remove(record)
+        item.pause()
+        record["state"] = "paused"
+        record["rate"] = 0
+        self.release(record)
+        self.changed.emit(record)
+
+    def resume(self, record):
+        if record["id"] not in self.items or record["state"] != "paused":
+            return
+        record["state"] = "queued"
+        self.waiting.append(record)
+        self.release(record)  # not holding a slot; just starts it if one is free
+        self.changed.emit(record)
+
+    def cancel(self, record):
+        item = self.items.get(record["id"])
+        if item is not None:
+            item.cancel()
+
+    def clear_finished(self):
+        self.records = [r for r in self.records if r["id"] in self.items]
+        self.compact()
+
+    def log(self, record):
+        if record["private"]:
+            return
+        self.journal.append({"op": "download", "download": record})
+        if self.journal.records > 2 * self.settings["history_limit"]:
+            limit = self.settings["history_limit"]
+            # Trim old finished downloads; ones still running always stay
+            self.records = [r for r in self.records[:-limit] if r["id"] in self.items] + self.records[-limit:]
+            self.compact()
+
+    def compact(self):
+        self.journal.compact({"op": "snapshot", "downloads": [r for r in self.records if not r["private"]]})
+
+    def close(self):
+        self.journal.close()
+
+_download_manager = None
+
+def download_manager():
+    # The process-wide DownloadManager, created on first use
+    global _download_manager
+    if _download_manager is None:
+        app = QApplication.instance()
+        _download_manager = DownloadManager(parent=app)
+        if app is not None:
+            app.aboutToQuit.connect(_download_manager.close)
+    return _download_manager
+
+class FaviconStore:
+    # Favicons by origin, for tabs, bookmarks and history rows. Images are
+    # content-addressed (FAVICON_DIR/<sha1>.png, one file however many
+    # origins share it) and FAVICON_DIR/index.jsonl maps origins to them:
+    #   {"op": "icon", "origin", "hash"}  an origin's icon was set
+    #   {"op": "snapshot", "icons"}       the whole map, from compact()
+    # Decoded icons are kept in an LRU by hash, so every row and tab of an
+    # origin shares one QIcon and each image is decoded at most once while
+    # it stays cached.
+    def __init__(self, directory=FAVICON_DIR):
+        self.directory = directory
+        self.journal = JsonJournal(os.path.join(directory, "index.jsonl"))
+        self.by_origin = {}
+        for record in self.journal.read():
+            op = record.get("op")
+            if op == "snapshot":
+                self.by_origin = record["icons"]
+            elif op == "icon":
+                self.by_origin[record["origin"]] = record["hash"]
+        self.icons = collections.OrderedDict()  # hash -> QIcon, least recently used first
+        if self.journal.records > 2 * len(self.by_origin) + 100:
+            self.compact()
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest + ".png")
+
+    def cached(self, digest, pixmap=None):
+        icon = self.icons.pop(digest, None)
+        if icon is None:
+            if pixmap is None:
+                pixmap = QPixmap(self.path(digest))
+                if pixmap.isNull():
+                    return None
+            icon = QIcon(pixmap)
+        self.icons[digest] = icon
+        if len(self.icons) > FAVICON_CACHE_SIZE:
+            self.icons.popitem(last=False)
+        return icon
+
+    def icon(self, url):
+        # The stored icon of url's origin, or None
+        origin = url_origin(url)
+        digest = self.by_origin.get(origin)
+        if digest is None:
+            return None
+        icon = self.cached(digest)
+        if icon is None:
+            # The image file is gone; don't look for it again
+            del self.by_origin[origin]
+        return icon
+
+    def set_icon(self, url, icon):
+        # Stores a page's icon for its origin and returns the shared copy
+        origin = url_origin(url)
+        if not origin or icon.isNull():
+            return icon
+        pixmap = icon.pixmap(FAVICON_SIZE, FAVICON_SIZE)
+        data = QByteArray()
+        buf = QBuffer(data)
+        buf.open(QIODevice.WriteOnly)
+        pixmap.save(buf, "PNG")
+        buf.close()
+        data = bytes(data)
+        digest = hashlib.sha1(data).hexdigest()
+        if self.by_origin.get(origin) != digest:
+            path = self.path(digest)
+            try:
+                if not os.path.exists(path):
+                    os.makedirs(self.directory, exist_ok=True)
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(data)
+                    os.replace(path + ".tmp", path)
+            except OSError:
+                return icon
+            self.by_origin[origin] = digest
+            self.journal.append({"op": "icon", "origin": origin, "hash": digest})
+        return self.cached(digest, pixmap)
+
+    def compact(self):
+        # Also deletes the images no origin uses any more
+        self.journal.compact({"op": "snapshot", "icons": self.by_origin})
+        used = set(self.by_origin.values())
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".png") and name[:-4] not in used:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def close(self):
+        self.journal.close()
+
+_favicon_store = None
+
+def favicon_store():
+    # The process-wide FaviconStore, created on first use
+    global _favicon_store
+    if _favicon_store is None:
+        _favicon_store = FaviconStore()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_favicon_store.close)
+    return _favicon_store
+
+class ThumbnailCache:
+    # Snapshots of a window's tabs by session id, for the tab overview. The
+    # tab is grabbed on the UI thread (and roughly shrunk there, so queued
+    # images stay small); smooth scaling and JPEG encoding run on a worker
+    # thread. The least recently captured snapshots are dropped once their
+    # total size passes THUMBNAIL_CACHE_BYTES.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = collections.OrderedDict()  # session id -> JPEG bytes
+        self.size = 0
+        # session id -> (JPEG bytes, QPixmap) decoded from them; UI thread only
+        self.decoded = collections.OrderedDict()
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self.encode_loop, name="thumbnail-encoder", daemon=True)
+        self.worker.start()
+
+    def capture(self, tab, wait=False):
+        # wait=True encodes right away, for the tab that is on screen
+        if tab.session_id is None or tab.width() <= 0 or tab.height() <= 0:
+            return
+        image = tab.grab().toImage()
+        if image.isNull():
+            return
+        image = image.scaled(2 * THUMBNAIL_WIDTH, 2 * THUMBNAIL_HEIGHT, Qt.KeepAspectRatio, Qt.FastTransformation)
+        if wait:
+            self.store(tab.session_id, self.encode(image))
+        else:
+            self.queue.put((tab.session_id, image))
+
+    def encode(self, image):
+        image = image.scaled(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        data = QByteArray()
+        buf = QBuffer(data)
+        buf.open(QIODevice.WriteOnly)
+        image.save(buf, "JPEG", THUMBNAIL_QUALITY)
+        buf.close()
+        return bytes(data)
+
+    def encode_loop(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            self.store(job[0], self.encode(job[1]))
+
+    def store(self, session_id, data):
+        with self.lock:
+            old = self.snapshots.pop(session_id, None)
+            if old is not None:
+                self.size -= len(old)
+            self.snapshots[session_id] = data
+            self.size += len(data)
+            while self.size > THUMBNAIL_CACHE_BYTES and len(self.snapshots) > 1:
+                self.size -= len(self.snapshots.popitem(last=False)[1])
+
+    def pixmap(self, session_id):
+        # The tab's last snapshot, or None
+        with self.lock:
+            data = self.snapshots.get(session_id)
+        if data is None:
+            self.decoded.pop(session_id, None)
+            return None
+        cached = self.decoded.pop(session_id, None)
+        if cached is not None and cached[0] is data:
+            pixmap = cached[1]
+        else:
+            pixmap = QPixmap()
+            pixmap.loadFromData(data, "JPEG")
+        self.decoded[session_id] = (data, pixmap)
+        if len(self.decoded) > THUMBNAIL_DECODED:
+            self.decoded.popitem(last=False)
+        return pixmap
+
+    def remove(self, session_id):
+        with self.lock:
+            data = self.snapshots.pop(session_id, None)
+            if data is not None:
+                self.size -= len(data)
+        self.decoded.pop(session_id, None)
+
+    def close(self):
+        self.queue.put(None)
+
+class RecordListModel(QAbstractListModel):
+    # List model over dict records for the bookmarks, history and downloads
+    # dialogs. Row text is built lazily by `display` as rows become visible.
+    # With a `fetch` callback the view pages rows in on demand: fetch(last)
+    # gets the last loaded record (or None) and returns the next batch.
+    # `decoration` returns a row's icon, or None.
+    def __init__(self, display, fetch=None, parent=None, decoration=None):
+        super().__init__(parent)
+        self.display = display
+        self.fetch = fetch
+        self.decoration = decoration
+        self.records = []
+        self.exhausted = True
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.display(self.records[index.row()])
+        if role == Qt.DecorationRole and self.decoration and index.isValid():
+            return self.decoration(self.records[index.row()])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        rows = self.fetch(self.records[-1] if self.records else None)
+        if not rows:
+            self.exhausted = True
+            return
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.records.extend(rows)
+        self.endInsertRows()
+
+    def reset(self, records=(), paged=False):
+        # paged=True starts empty-handed and lets the view fetch the first batch
+        self.beginResetModel()
+        self.records = list(records)
+        self.exhausted = not (paged and self.fetch)
+        self.endResetModel()
+
+    def prepend(self, records):
+        if not records:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(records) - 1)
+        self.records[:0] = records
+        self.endInsertRows()
+
+    def replace(self, row, record):
+        self.records[row] = record
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.records[row]
+        self.endRemoveRows()
+
 class UniBrowser(QMainWindow):
     def __init__(self, private=False):
         super().__init__()
         self.private = private
+        self.config = config_service()
+        startup_profile.mark("config")
         # Enable PDF viewer globally (correct attribute)
         QWebEngineProfile.defaultProfile().settings().setAttribute(QWebEngineSettings.PdfViewerEnabled, True)
+        adblock_engine()  # start compiling the filters; each tab's page installs an AdBlockInterceptor
+        if self.config.get("performance_timing", True):
+            install_performance_collector(QWebEngineProfile.defaultProfile())
+        self.profile = None
+        if self.private:
+            # Off-the-record profile: no storage name, nothing written to disk.
+            # Not parented to the window, so closeEvent can delete it after its pages.
+            self.profile = QWebEngineProfile()
+            self.profile.settings().setAttribute(QWebEngineSettings.PdfViewerEnabled, True)
+            self.setAttribute(Qt.WA_DeleteOnClose)
+        apply_cache_settings(self.web_profile(), cache_settings(self.config))
+        self.private_windows = []
         self.setWindowTitle("Unibrowser" + (" (Private)" if self.private else ""))
         self.setMinimumSize(1200, 800)
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.old_pos = None
-        self.downloads = []  # Track downloads
+        self.downloads = download_manager()
+        self.downloads.watch(self.profile or QWebEngineProfile.defaultProfile(), self.private)
+        self.downloads.added.connect(self.download_started)
+        self.downloads.changed.connect(self.download_changed)
+        self.downloads.finished.connect(self.download_finished)
+        self.downloads_model = None  # rows of the downloads dialog, once built
+        self.favicons = favicon_store()
+        self.thumbnails = ThumbnailCache()
+        self.tab_text = TabTextIndex()
+        self.tab_text.indexed.connect(self.tab_text_indexed, Qt.QueuedConnection)
+        self.tab_search_text = None
+        self.tab_overview_dialog = None
+        # Dialogs are built on first use and kept for the window's lifetime
+        self.bookmarks_dialog = None
+        self.history_dialog = None
+        self.downloads_dialog = None
+        self.settings_dialog = None
         self.init_history()  # Ensure history is initialized before anything else
-        self.bookmarks = self.load_bookmarks() if not self.private else []
-        self.config = self.load_config() if not self.private else {}
-        self.dark_mode = self.load_dark_mode()  # Load dark mode preference
+        self.bookmarks = BookmarkStore(BOOKMARKS_JOURNAL if not self.private else None, BOOKMARKS_FILE)
+        self.bookmark_index = BookmarkIndex(self.bookmarks)
+        self.init_frecency()
+        self.closed_tabs = []
+        self.next_session_id = 1
+        self.session = SessionJournal(SESSION_FILE) if not self.private else None
+        self.retitled = set()  # session ids of tabs whose new title isn't journaled yet
+        self.retitle_timer = QTimer(self)
+        self.retitle_timer.setSingleShot(True)
+        self.retitle_timer.setInterval(SESSION_TITLE_DELAY_MS)
+        self.retitle_timer.timeout.connect(self.record_retitled_tabs)
+        self.config.changed.connect(self.handle_config_changed)
+        self.dark_mode = self.config.get("dark_mode", False)
         self.init_ui()
+        startup_profile.mark("init_ui")
         if self.dark_mode:
             self.apply_dark_mode()
+        if startup_profile.enabled:
+            self.installEventFilter(self)
         self.show()
+        startup_profile.mark("show")
 
-    def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                return {}
-        return {}
+    def web_profile(self):
+        return self.profile or QWebEngineProfile.defaultProfile()
 
-    def save_config(self):
-        try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2)
-        except Exception:
-            pass
+    def clear_cache(self):
+        # Reports the bytes reclaimed once the cache directory stops shrinking
+        profile = self.web_profile()
+        path = profile.cachePath()
+        on_disk = profile.httpCacheType() == QWebEngineProfile.DiskHttpCache and path
+        before = directory_size(path) if on_disk else 0
+        profile.clearHttpCache()
+        if not on_disk:
+            self.show_toast("Memory cache cleared.", success=True)
+            return
+        state = {"size": before, "waited": 0}
+        def poll():
+            size = directory_size(path)
+            state["waited"] += CACHE_CLEAR_POLL_MS
+            settled = size == state["size"] and state["waited"] > CACHE_CLEAR_POLL_MS
+            if settled or state["waited"] >= CACHE_CLEAR_TIMEOUT_MS:
+                self.show_toast(f"Cache cleared: {format_bytes(max(before - size, 0))} reclaimed.", success=True)
+            else:
+                state["size"] = size
+                QTimer.singleShot(CACHE_CLEAR_POLL_MS, poll)
+        QTimer.singleShot(CACHE_CLEAR_POLL_MS, poll)
 
     def get_homepage(self):
         return self.config.get("homepage", DUCKDUCKGO_URL)
 
     def set_homepage(self, url):
-        self.config["homepage"] = url
-        self.save_config()
-
-    def load_dark_mode(self):
-        # Persist dark mode in a config file in user home
-        config_path = os.path.join(os.path.expanduser("~"), ".unibrowser_config.json")
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    cfg = json.load(f)
-                    return cfg.get("dark_mode", False)
-            except Exception:
-                return False
-        return False
+        self.config.set("homepage", url)
 
-    def save_dark_mode(self, enabled):
-        config_path = os.path.join(os.path.expanduser("~"), ".unibrowser_config.json")
-        try:
-            cfg = {}
-            if os.path.exists(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    cfg = json.load(f)
-            cfg["dark_mode"] = enabled
-            with open(config_path, "w", encoding="utf-8") as f:
-                json.dump(cfg, f, indent=2)
-        except Exception:
-            pass
+    def handle_config_changed(self, key, value):
+        # Keep every open window in step with settings changed elsewhere
+        if key == "dark_mode" and value != self.dark_mode:
+            self.dark_mode = value
+            if self.dark_mode:
+                self.apply_dark_mode()
+            else:
+                self.apply_light_mode()
+        elif key == "cache":
+            apply_cache_settings(self.web_profile(), cache_settings(self.config))
 
     def toggle_dark_mode(self):
-        self.dark_mode = not self.dark_mode
-        if self.dark_mode:
-            self.apply_dark_mode()
-        else:
-            self.apply_light_mode()
-        self.save_dark_mode(self.dark_mode)
+        self.config.set("dark_mode", not self.dark_mode)
         self.show_toast("Dark mode {}".format("enabled" if self.dark_mode else "disabled"), success=True)
 
     def apply_dark_mode(self):
@@ -183,8 +3096,8 @@ class UniBrowser(QMainWindow):
             QTabBar::tab:selected { background: #35363c; color: #1a73e8; border-color: #888; }
             QTabBar::tab:hover:!selected { background: #35363c; }
             QDialog#unibrowser_bookmarks_dialog { background: #23242a; color: #f2f2f2; border: 1.5px solid #444; }
-            QListWidget { background: #23242a; color: #f2f2f2; }
-            QListWidget::item:selected { background: #35363c; color: #1a73e8; }
+            QListView { background: #23242a; color: #f2f2f2; }
+            QListView::item:selected { background: #35363c; color: #1a73e8; }
             QLabel#bookmarks_title { color: #1a73e8; }
             QDialog#unibrowser_toast QLabel { background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #23242a, stop:1 #35363c); color: #f2f2f2; border: 1.5px solid #444; }
             QMenu { background: #23242a; color: #f2f2f2; border: 1.5px solid #444; }
@@ -207,30 +3120,15 @@ class UniBrowser(QMainWindow):
         for btn in (self.find_prev_btn, self.find_next_btn, self.find_close_btn):
             btn.setStyleSheet('border:none; background:transparent; font-size:16px; color:#444; border-radius:6px;')
 
-    def load_bookmarks(self):
-        if os.path.exists(BOOKMARKS_FILE):
-            try:
-                with open(BOOKMARKS_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                return []
-        return []
-
-    def save_bookmarks(self):
-        try:
-            with open(BOOKMARKS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.bookmarks, f, indent=2)
-        except Exception:
-            pass
-
     def add_bookmark(self):
         current_tab = self.tab_widget.currentWidget()
         if current_tab:
             url = current_tab.webview.url().toString()
             title = current_tab.webview.page().title() or url
-            if not any(b["url"] == url for b in self.bookmarks):
-                self.bookmarks.append({"title": title, "url": url})
-                self.save_bookmarks()
+            b = self.bookmarks.add(url, title)
+            if b:
+                self.bookmark_index.add(b)
+                self.frecency.add(url, title, weight=BOOKMARK_FRECENCY_WEIGHT)
                 self.show_toast("★ Bookmarked!", success=True)
             else:
                 self.show_toast("Already bookmarked.", success=False)
@@ -297,8 +3195,12 @@ class UniBrowser(QMainWindow):
         QTimer.singleShot(2500, fade_out)
 
     def show_bookmarks(self):
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout, QLabel, QAbstractItemView, QInputDialog, QFileDialog, QMessageBox
-        from PyQt5.QtGui import QIcon
+        if self.bookmarks_dialog is None:
+            self.bookmarks_dialog = self.build_bookmarks_dialog()
+        self.bookmarks_dialog.refresh()
+        self.bookmarks_dialog.exec_()
+
+    def build_bookmarks_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Bookmarks")
         dlg.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
@@ -310,19 +3212,19 @@ class UniBrowser(QMainWindow):
                 border: 1.5px solid #e0e0e0;
                 box-shadow: 0 8px 32px 0 rgba(60,60,80,0.16);
             }
-            QListWidget {
+            QListView {
                 background: transparent;
                 border: none;
                 font-size: 16px;
                 color: #222;
                 padding: 0 0 8px 0;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 12px 12px 12px 0px;
                 border-radius: 10px;
                 margin-bottom: 2px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background: #e3e8ee;
                 color: #1a73e8;
             }
@@ -357,19 +3259,50 @@ class UniBrowser(QMainWindow):
         title.setObjectName("bookmarks_title")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
-        listw = QListWidget()
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Search bookmarks, or #tag...")
+        filter_edit.setClearButtonEnabled(True)
+        layout.addWidget(filter_edit)
+        def describe(b):
+            text = f'{b["title"]}  |  {b["url"]}'
+            if b["folder"]:
+                text = f'{b["folder"]} › {text}'
+            if b["tags"]:
+                text += "  " + " ".join("#" + t for t in b["tags"])
+            return text
+        model = RecordListModel(describe, parent=dlg, decoration=lambda b: self.favicons.icon(b["url"]))
+        listw = QListView()
+        listw.setModel(model)
+        listw.setUniformItemSizes(True)
         listw.setSelectionMode(QAbstractItemView.SingleSelection)
-        for b in self.bookmarks:
-            listw.addItem(f'{b["title"]}  |  {b["url"]}')
+        self.watch_list_targets(listw, model)
+        self.add_open_menu(listw, model, dlg)
+        def populate():
+            # model.records holds the bookmarks behind each list row
+            text = filter_edit.text().strip()
+            if text.startswith("#") and len(text) > 1:
+                model.reset(self.bookmarks.tagged(text[1:]))
+            elif text:
+                found = (self.bookmarks.get(r["url"]) for r in self.bookmark_index.search(text))
+                model.reset(b for b in found if b)
+            else:
+                model.reset(self.bookmarks)
+        def current_row():
+            index = listw.currentIndex()
+            return index.row() if index.isValid() else -1
+        dlg.refresh = populate
+        filter_edit.textChanged.connect(populate)
         layout.addWidget(listw)
         btn_layout = QHBoxLayout()
         open_btn = QPushButton("Open")
+        background_btn = QPushButton("Open in Background")
         del_btn = QPushButton("Delete")
         edit_btn = QPushButton("Edit")
         import_btn = QPushButton("Import")
         export_btn = QPushButton("Export")
         close_btn = QPushButton("Close")
         btn_layout.addWidget(open_btn)
+        btn_layout.addWidget(background_btn)
         btn_layout.addWidget(edit_btn)
         btn_layout.addWidget(del_btn)
         btn_layout.addWidget(import_btn)
@@ -377,66 +3310,175 @@ class UniBrowser(QMainWindow):
         btn_layout.addWidget(close_btn)
         layout.addLayout(btn_layout)
         def open_selected():
-            idx = listw.currentRow()
-            if idx >= 0:
-                self.load_url_from_string(self.bookmarks[idx]["url"])
+            row = current_row()
+            if row >= 0:
+                self.load_url_from_string(model.records[row]["url"])
                 dlg.accept()
+        def open_in_background():
+            row = current_row()
+            if row >= 0:
+                self.open_in_new_tab(model.records[row]["url"], background=True)
         def delete_selected():
-            idx = listw.currentRow()
-            if idx >= 0:
-                del self.bookmarks[idx]
-                self.save_bookmarks()
-                listw.takeItem(idx)
+            row = current_row()
+            if row >= 0:
+                url = model.records[row]["url"]
+                self.bookmark_index.remove(url)
+                self.bookmarks.remove(url)
+                model.remove(row)
         def edit_selected():
-            idx = listw.currentRow()
-            if idx >= 0:
-                b = self.bookmarks[idx]
-                new_title, ok1 = QInputDialog.getText(dlg, "Edit Title", "Title:", text=b["title"])
-                if not ok1:
-                    return
-                new_url, ok2 = QInputDialog.getText(dlg, "Edit URL", "URL:", text=b["url"])
-                if not ok2:
-                    return
-                self.bookmarks[idx] = {"title": new_title, "url": new_url}
-                self.save_bookmarks()
-                listw.item(idx).setText(f'{new_title}  |  {new_url}')
+            row = current_row()
+            if row < 0:
+                return
+            b = model.records[row]
+            form = QDialog(dlg)
+            form.setWindowTitle("Edit Bookmark")
+            form_layout = QFormLayout(form)
+            title_edit = QLineEdit(b["title"])
+            url_edit = QLineEdit(b["url"])
+            folder_edit = QLineEdit(b["folder"])
+            folder_edit.setPlaceholderText("e.g. Work/Docs")
+            folder_edit.setCompleter(QCompleter(self.bookmarks.folders(), folder_edit))
+            tags_edit = QLineEdit(", ".join(b["tags"]))
+            tags_edit.setPlaceholderText("comma separated")
+            form_layout.addRow("Title:", title_edit)
+            form_layout.addRow("URL:", url_edit)
+            form_layout.addRow("Folder:", folder_edit)
+            form_layout.addRow("Tags:", tags_edit)
+            buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+            buttons.accepted.connect(form.accept)
+            buttons.rejected.connect(form.reject)
+            form_layout.addRow(buttons)
+            if not form.exec_() or not url_edit.text().strip():
+                return
+            new = self.bookmarks.update(
+                b["url"],
+                url=url_edit.text().strip(),
+                title=title_edit.text().strip() or url_edit.text().strip(),
+                folder=folder_edit.text().strip().strip("/"),
+                tags=[t.strip() for t in tags_edit.text().split(",") if t.strip()])
+            if new is None:
+                QMessageBox.warning(dlg, "Edit Bookmark", "That URL is already bookmarked.")
+                return
+            self.bookmark_index.remove(b["url"])
+            self.bookmark_index.add(new)
+            model.replace(row, new)
         def import_bookmarks():
-            path, _ = QFileDialog.getOpenFileName(dlg, "Import Bookmarks", "", "JSON Files (*.json)")
+            path, _ = QFileDialog.getOpenFileName(dlg, "Import Bookmarks", "", "Bookmark Files (*.html *.htm *.json)")
             if path:
                 try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        imported = json.load(f)
-                        if isinstance(imported, list):
-                            self.bookmarks.extend(imported)
-                            self.save_bookmarks()
-                            listw.clear()
-                            for b in self.bookmarks:
-                                listw.addItem(f'{b["title"]}  |  {b["url"]}')
-                            QMessageBox.information(dlg, "Import", "Bookmarks imported.")
+                    added = self.bookmarks.import_file(path)
+                    self.bookmark_index.add_many(added)
+                    rows = [(b["url"], b["title"], BOOKMARK_FRECENCY_WEIGHT, time.time()) for b in added]
+                    threading.Thread(target=lambda: self.frecency.load(rows), name="frecency-load", daemon=True).start()
+                    populate()
+                    QMessageBox.information(dlg, "Import", f"{len(added)} new bookmark{'s' if len(added) != 1 else ''} imported.")
                 except Exception as e:
                     QMessageBox.warning(dlg, "Import Failed", str(e))
         def export_bookmarks():
-            path, _ = QFileDialog.getSaveFileName(dlg, "Export Bookmarks", "bookmarks.json", "JSON Files (*.json)")
+            path, _ = QFileDialog.getSaveFileName(dlg, "Export Bookmarks", "bookmarks.html",
+                                                  "HTML Bookmarks (*.html);;JSON Files (*.json)")
             if path:
                 try:
-                    with open(path, "w", encoding="utf-8") as f:
-                        json.dump(self.bookmarks, f, indent=2)
+                    self.bookmarks.export_file(path)
                     QMessageBox.information(dlg, "Export", "Bookmarks exported.")
                 except Exception as e:
                     QMessageBox.warning(dlg, "Export Failed", str(e))
         open_btn.clicked.connect(open_selected)
+        listw.activated.connect(open_selected)
+        background_btn.clicked.connect(open_in_background)
         del_btn.clicked.connect(delete_selected)
         edit_btn.clicked.connect(edit_selected)
         import_btn.clicked.connect(import_bookmarks)
         export_btn.clicked.connect(export_bookmarks)
         close_btn.clicked.connect(dlg.accept)
         dlg.setFixedWidth(900)
-        dlg.exec_()
+        return dlg
+
+    def watch_list_targets(self, view, model):
+        # Warms the origin of the bookmark or history entry under the mouse,
+        # and prerenders the one hovered or selected for long enough
+        def entered(index):
+            if index.isValid() and index.row() < len(model.records):
+                url = model.records[index.row()]["url"]
+                self.preconnector.preconnect(url)
+                self.prerender.predict(url)
+        def selected(index, previous):
+            if index.isValid() and index.row() < len(model.records):
+                self.prerender.predict(model.records[index.row()]["url"])
+        view.setMouseTracking(True)
+        view.entered.connect(entered)
+        view.selectionModel().currentChanged.connect(selected)
+
+    def add_open_menu(self, view, model, dlg):
+        def show_menu(pos):
+            index = view.indexAt(pos)
+            if not index.isValid() or index.row() >= len(model.records):
+                return
+            url = model.records[index.row()]["url"]
+            menu = QMenu(view)
+            open_here = menu.addAction("Open")
+            new_tab = menu.addAction("Open in New Tab")
+            background = menu.addAction("Open in Background Tab")
+            action = menu.exec_(view.viewport().mapToGlobal(pos))
+            if action == open_here:
+                self.load_url_from_string(url)
+                dlg.accept()
+            elif action == new_tab:
+                self.open_in_new_tab(url)
+                dlg.accept()
+            elif action == background:
+                self.open_in_new_tab(url, background=True)
+        view.setContextMenuPolicy(Qt.CustomContextMenu)
+        view.customContextMenuRequested.connect(show_menu)
+
+    def open_in_new_tab(self, url, background=False):
+        # The page starts loading right away, even in the background, or is
+        # already loaded if it was prerendered. Placeholders (LazyTab) are only
+        # for restored and discarded tabs.
+        tab = self.prerender.take(url)
+        prerendered = tab is not None
+        if tab is None:
+            tab = BrowserTab(private_profile=self.profile, url=url)
+        tab.session_id = self.new_session_id()
+        # Counts as recently used, so the discard policy doesn't pick it first
+        tab.last_activated = tab.last_deactivated = time.monotonic()
+        idx = self.tab_widget.addTab(tab, "New Tab")
+        self.connect_tab_signals(tab)
+        self.record_tab(tab)
+        self.record_tab_order()
+        if prerendered:
+            self.replay_prerendered(tab)
+        if not background:
+            self.tab_widget.setCurrentIndex(idx)
+        return idx
+
+    def replay_prerendered(self, tab):
+        # Its visit and icon came before the tab was connected
+        if tab.visit_url is not None:
+            self.tab_visited(tab, tab.visit_url, tab.webview.page().title())
+            self.tab_icon_changed(tab, tab.webview.icon())
 
     def load_url_from_string(self, url):
+        # Navigates the current tab. A prerendered page for url takes the
+        # tab's place instead, already loaded; the old page's back/forward
+        # list goes with it.
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if not current_tab:
+            return
+        tab = self.prerender.take(url)
+        if tab is None:
             current_tab.webview.setUrl(QUrl(url))
+            return
+        idx = self.tab_widget.indexOf(current_tab)
+        tab.session_id = current_tab.session_id
+        tab.last_activated = tab.last_deactivated = time.monotonic()
+        self.replace_tab(idx, tab)
+        current_tab.deleteLater()
+        self.connect_tab_signals(tab)
+        self.record_tab(tab)
+        self.replay_prerendered(tab)
+        # The URL bar, tab manager and find bar follow the current tab
+        self.tab_widget.currentChanged.emit(idx)
 
     def init_ui(self):
         main_widget = QWidget()
@@ -461,7 +3503,15 @@ class UniBrowser(QMainWindow):
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        self.tab_widget.tabBar().setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tab_widget.tabBar().customContextMenuRequested.connect(self.show_tab_context_menu)
+        # Must run before any other currentChanged slot so they see a real tab
+        self.tab_widget.currentChanged.connect(self.materialize_tab)
         self.tab_widget.currentChanged.connect(self.update_url_bar)
+        self.tab_manager = TabManager(self)
+        self.metrics = TabMetrics(self)
+        self.preconnector = Preconnector(self)
+        self.prerender = PrerenderPool(self)
         self.tab_widget.setStyleSheet('''
             QTabWidget::pane { border: none; background: transparent; }
             QTabWidget::tab-bar { alignment: left; }
@@ -592,6 +3642,15 @@ class UniBrowser(QMainWindow):
             QLineEdit:focus { border-color: #4285f4; outline: none; }
         ''')
         self.url_bar.returnPressed.connect(self.load_url)
+        # Omnibox suggestions, ranked by FrecencyIndex rather than QCompleter's own filtering
+        self.completion_model = QStandardItemModel(self)
+        self.completer = QCompleter(self.completion_model, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCompletionRole(Qt.UserRole)
+        self.url_bar.setCompleter(self.completer)
+        # Enter on a suggestion reaches returnPressed; a mouse pick does not
+        self.completer.popup().clicked.connect(lambda index: self.load_url())
+        self.url_bar.textEdited.connect(self.update_completions)
         self.url_bar.setPlaceholderText("Search or enter address")
         nav_layout.addWidget(self.url_bar, 1)
         
@@ -643,6 +3702,12 @@ class UniBrowser(QMainWindow):
             btn.setStyleSheet('border:none; background:transparent; font-size:16px; color:#444; border-radius:6px;')
         find_layout.addWidget(self.find_prev_btn)
         find_layout.addWidget(self.find_next_btn)
+        self.find_all_btn = QPushButton("All Tabs", self.find_bar)
+        self.find_all_btn.setCheckable(True)
+        self.find_all_btn.setToolTip("Find in all tabs (Ctrl+Shift+F)")
+        self.find_all_btn.setStyleSheet('QPushButton { border:none; background:transparent; font-size:13px; color:#444; '
+                                        'border-radius:6px; padding:4px 8px; } QPushButton:checked { background:#dde6f7; }')
+        find_layout.addWidget(self.find_all_btn)
         find_layout.addWidget(self.find_close_btn)
         self.find_count_label = QLabel("", self.find_bar)
         self.find_count_label.setStyleSheet('font-size:13px; color:#888; padding-left:8px;')
@@ -650,12 +3715,31 @@ class UniBrowser(QMainWindow):
         self.find_bar.setFixedHeight(38)
         self.find_bar.setVisible(False)
         self.centralWidget().layout().insertWidget(0, self.find_bar)
-        # Find-in-page logic
-        self.find_input.textChanged.connect(self.find_text)
+        # Find in all tabs: matching tabs, listed under the find bar
+        self.tab_results_model = RecordListModel(lambda r: f'{r["title"] or r["url"]}  |  {r["snippet"]}', parent=self,
+                                                 decoration=lambda r: self.favicons.icon(r["url"]))
+        self.tab_results = QListView(self)
+        self.tab_results.setModel(self.tab_results_model)
+        self.tab_results.setUniformItemSizes(True)
+        self.tab_results.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tab_results.setMaximumHeight(240)
+        self.tab_results.setVisible(False)
+        self.tab_results.activated.connect(self.open_tab_result)
+        self.tab_results.clicked.connect(self.open_tab_result)
+        self.centralWidget().layout().insertWidget(1, self.tab_results)
+        self.find_all_btn.toggled.connect(self.toggle_find_all)
+        # Find-in-page logic: typing searches once it pauses; Enter and the
+        # buttons search right away
+        self.find_timer = QTimer(self)
+        self.find_timer.setSingleShot(True)
+        self.find_timer.setInterval(FIND_DEBOUNCE_MS)
+        self.find_timer.timeout.connect(self.find_text)
+        self.find_input.textChanged.connect(self.schedule_find)
+        self.tab_widget.currentChanged.connect(self.schedule_find)
         self.find_next_btn.clicked.connect(lambda: self.find_text(forward=True))
         self.find_prev_btn.clicked.connect(lambda: self.find_text(forward=False))
         self.find_close_btn.clicked.connect(self.hide_find_bar)
-        self.find_input.returnPressed.connect(lambda: self.find_text(forward=True))
+        self.find_input.returnPressed.connect(self.find_return_pressed)
         self.find_input.installEventFilter(self)
 
         # Global styles
@@ -671,11 +3755,19 @@ class UniBrowser(QMainWindow):
         dark_mode_action.triggered.connect(self.toggle_dark_mode)
         self.addAction(dark_mode_action)
 
-        # Start with one tab
-        self.add_tab()
+        # Restore the previous session, or start with one tab
+        if not self.restore_session():
+            self.add_tab()
+        startup_profile.mark("first_tab")
+        if startup_profile.enabled:
+            self.tab_widget.currentWidget().webview.loadFinished.connect(startup_profile.finish)
         self.enable_tab_reordering()
-        # Connect download handling for all tabs
-        self.tab_widget.currentChanged.connect(self._connect_download_signals)
+        self.tab_widget.tabBar().tabMoved.connect(self.record_tab_order)
+        self.tab_widget.currentChanged.connect(self.record_tab_order)
+        if self.session:
+            self.session_timer = QTimer(self)
+            self.session_timer.timeout.connect(self.compact_session)
+            self.session_timer.start(SESSION_COMPACT_INTERVAL_MS)
 
         # Add menu for new private window
         menu = QMenu(self)
@@ -687,42 +3779,98 @@ class UniBrowser(QMainWindow):
         # Add to window (hidden, but shortcuts work)
         self.addAction(private_action)
 
-    def _connect_download_signals(self, idx):
-        tab = self.tab_widget.widget(idx)
-        if hasattr(tab, 'webview'):
-            tab.webview.page().profile().downloadRequested.connect(self.handle_download)
-
-    def handle_download(self, download):
-        url_str = download.url().toString()
-        if url_str.lower().endswith('.pdf'):
-            self.show_toast("PDF navigation allowed: " + url_str, success=True)
-            print("[DEBUG] PDF navigation allowed:", url_str)
-            return  # Do not intercept, let QWebEngineView handle
-        # Save download info and show notification
-        info = {
-            'url': download.url().toString(),
-            'path': download.path(),
-            'state': 'in progress',
-            'download': download
-        }
-        self.downloads.append(info)
-        download.finished.connect(lambda: self._on_download_finished(info))
-        self.show_toast(f"⬇ Download started: {os.path.basename(download.path())}", success=True)
-        print("[DEBUG] Download intercepted:", url_str)
-
-    def _on_download_finished(self, info):
-        info['state'] = 'finished'
-        self.show_toast(f"✔ Download finished: {os.path.basename(info['path'])}", success=True)
-        # Fallback: open PDF in system viewer if it's a PDF
-        if info['path'].lower().endswith('.pdf'):
-            try:
-                os.startfile(info['path'])
-            except Exception:
-                self.show_toast("Failed to open PDF in system viewer.", success=False)
+    def download_visible(self, record):
+        # Private windows' downloads stay out of normal windows
+        return self.private or not record["private"]
+
+    def download_started(self, record):
+        if self.downloads_model is not None and self.download_visible(record):
+            self.downloads_model.prepend([record])
+        if self.isActiveWindow():
+            self.show_toast(f"⬇ Download started: {os.path.basename(record['path'])}", success=True)
+
+    def download_changed(self, record):
+        # Records are updated in place; repaint the row showing this one
+        if self.downloads_model is not None:
+            row = next((i for i, r in enumerate(self.downloads_model.records) if r is record), -1)
+            if row >= 0:
+                self.downloads_model.replace(row, record)
+
+    def download_finished(self, record):
+        if not self.isActiveWindow():
+            return
+        name = os.path.basename(record['path'])
+        if record['state'] == 'completed':
+            self.show_toast(f"✔ Download finished: {name}", success=True)
+            # Fallback: open PDF in system viewer if it's a PDF
+            if record['path'].lower().endswith('.pdf'):
+                if not QDesktopServices.openUrl(QUrl.fromLocalFile(record['path'])):
+                    self.show_toast("Failed to open PDF in system viewer.", success=False)
+        elif record['state'] == 'interrupted':
+            self.show_toast(f"Download failed: {name} ({record['error']})", success=False)
+
+    def show_tab_overview(self):
+        if self.tab_overview_dialog is None:
+            self.tab_overview_dialog = self.build_tab_overview_dialog()
+        self.tab_overview_dialog.refresh()
+        self.tab_overview_dialog.exec_()
+
+    def build_tab_overview_dialog(self):
+        # Every tab as a snapshot in a grid. Tabs without a snapshot (never
+        # shown, or restored from the session) show their site icon; neither
+        # needs a webview, so placeholders stay placeholders.
+        dlg = QDialog(self)
+        dlg.setWindowTitle("Tab Overview")
+        dlg.resize(4 * (THUMBNAIL_WIDTH + 32) + 40, 3 * (THUMBNAIL_HEIGHT + 56) + 90)
+        layout = QVBoxLayout(dlg)
+        def describe(t):
+            return t["title"]
+        def snapshot(t):
+            return self.thumbnails.pixmap(t["id"]) or self.favicons.icon(t["url"])
+        model = RecordListModel(describe, parent=dlg, decoration=snapshot)
+        grid = QListView()
+        grid.setModel(model)
+        grid.setViewMode(QListView.IconMode)
+        grid.setMovement(QListView.Static)
+        grid.setResizeMode(QListView.Adjust)
+        grid.setIconSize(QSize(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+        grid.setGridSize(QSize(THUMBNAIL_WIDTH + 32, THUMBNAIL_HEIGHT + 56))
+        grid.setUniformItemSizes(True)
+        grid.setTextElideMode(Qt.ElideRight)
+        grid.setSelectionMode(QAbstractItemView.SingleSelection)
+        layout.addWidget(grid)
+        def refresh():
+            current = self.tab_widget.currentWidget()
+            if isinstance(current, BrowserTab):
+                self.thumbnails.capture(current, wait=True)
+            tabs = []
+            for i in range(self.tab_widget.count()):
+                tab = self.tab_widget.widget(i)
+                if isinstance(tab, LazyTab):
+                    url, title = tab.url, tab.title
+                else:
+                    url = tab.webview.url().toString()
+                    title = tab.webview.page().title() or url
+                tabs.append({"id": tab.session_id, "tab": tab, "url": url, "title": title})
+            model.reset(tabs)
+            grid.setCurrentIndex(model.index(self.tab_widget.currentIndex()))
+        dlg.refresh = refresh
+        def activate(index):
+            idx = self.tab_widget.indexOf(model.records[index.row()]["tab"])
+            if idx >= 0:
+                self.tab_widget.setCurrentIndex(idx)
+            dlg.accept()
+        grid.activated.connect(activate)
+        grid.clicked.connect(activate)
+        return dlg
 
     def show_downloads(self):
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout, QLabel, QFileDialog, QMessageBox
-        import subprocess
+        if self.downloads_dialog is None:
+            self.downloads_dialog = self.build_downloads_dialog()
+        self.downloads_dialog.refresh()
+        self.downloads_dialog.exec_()
+
+    def build_downloads_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Downloads")
         dlg.setFixedWidth(700)
@@ -731,36 +3879,83 @@ class UniBrowser(QMainWindow):
         title.setStyleSheet("font-size:20px;font-weight:600;color:#1a73e8;padding:10px 0 18px 0;letter-spacing:0.5px;")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
-        listw = QListWidget()
-        for d in self.downloads:
-            state = "(done)" if d['state'] == 'finished' else "(in progress)"
-            listw.addItem(f'{os.path.basename(d["path"])}  |  {d["url"]}  {state}')
+        def describe(d):
+            name = os.path.basename(d["path"])
+            if d["state"] == "completed":
+                status = format_bytes(d["total"])
+            elif d["state"] == "interrupted":
+                status = "failed" + (f": {d['error']}" if d["error"] else "")
+            elif d["state"] in ("downloading", "paused", "queued"):
+                status = format_bytes(d["received"])
+                if d["total"] > 0:
+                    status += f" of {format_bytes(d['total'])}"
+                status += f", {format_bytes(d['rate'])}/s" if d["state"] == "downloading" else f", {d['state']}"
+            else:
+                status = d["state"]
+            return f'{name}  |  {d["url"]}  ({status})'
+        model = self.downloads_model = RecordListModel(describe, parent=dlg)
+        listw = QListView()
+        listw.setModel(model)
+        listw.setUniformItemSizes(True)
+        listw.setSelectionMode(QAbstractItemView.SingleSelection)
+        def refresh():
+            # Newest first
+            model.reset(d for d in reversed(self.downloads.records) if self.download_visible(d))
+        dlg.refresh = refresh
         layout.addWidget(listw)
         btn_layout = QHBoxLayout()
         open_file_btn = QPushButton("Open File")
         open_folder_btn = QPushButton("Open Folder")
+        pause_btn = QPushButton("Pause/Resume")
+        cancel_btn = QPushButton("Cancel")
+        retry_btn = QPushButton("Retry")
+        clear_btn = QPushButton("Clear Finished")
         close_btn = QPushButton("Close")
-        btn_layout.addWidget(open_file_btn)
-        btn_layout.addWidget(open_folder_btn)
-        btn_layout.addWidget(close_btn)
+        for btn in (open_file_btn, open_folder_btn, pause_btn, cancel_btn, retry_btn, clear_btn, close_btn):
+            btn_layout.addWidget(btn)
         layout.addLayout(btn_layout)
+        def current_download():
+            index = listw.currentIndex()
+            return model.records[index.row()] if index.isValid() else None
         def open_file():
-            idx = listw.currentRow()
-            if idx >= 0 and self.downloads[idx]['state'] == 'finished':
-                path = self.downloads[idx]['path']
-                if os.path.exists(path):
-                    os.startfile(path)
+            d = current_download()
+            if d and d['state'] == 'completed' and os.path.exists(d['path']):
+                QDesktopServices.openUrl(QUrl.fromLocalFile(d['path']))
         def open_folder():
-            idx = listw.currentRow()
-            if idx >= 0:
-                path = self.downloads[idx]['path']
-                folder = os.path.dirname(path)
+            d = current_download()
+            if d:
+                folder = os.path.dirname(d['path'])
                 if os.path.exists(folder):
-                    os.startfile(folder)
+                    QDesktopServices.openUrl(QUrl.fromLocalFile(folder))
+        def pause_or_resume():
+            d = current_download()
+            if d and d['state'] == 'paused':
+                self.downloads.resume(d)
+            elif d:
+                self.downloads.pause(d)
+        def cancel():
+            d = current_download()
+            if d:
+                self.downloads.cancel(d)
+        def retry():
+            # Interrupted downloads can't be resumed across Chromium sessions;
+            # start them over from the current tab's page
+            d = current_download()
+            tab = self.tab_widget.currentWidget()
+            if d and d['state'] in ('interrupted', 'cancelled') and hasattr(tab, 'webview'):
+                tab.webview.page().download(QUrl(d['url']), os.path.basename(d['path']))
+        def clear_finished():
+            self.downloads.clear_finished()
+            refresh()
         open_file_btn.clicked.connect(open_file)
+        listw.activated.connect(open_file)
         open_folder_btn.clicked.connect(open_folder)
+        pause_btn.clicked.connect(pause_or_resume)
+        cancel_btn.clicked.connect(cancel)
+        retry_btn.clicked.connect(retry)
+        clear_btn.clicked.connect(clear_finished)
         close_btn.clicked.connect(dlg.accept)
-        dlg.exec_()
+        return dlg
 
     def add_shortcuts(self):
         new_tab_action = QAction("New Tab", self)
@@ -803,11 +3998,31 @@ class UniBrowser(QMainWindow):
         find_action.triggered.connect(self.show_find_bar)
         self.addAction(find_action)
 
+        find_all_action = QAction("Find in All Tabs", self)
+        find_all_action.setShortcut(QKeySequence(Qt.CTRL + Qt.SHIFT + Qt.Key_F))
+        find_all_action.triggered.connect(self.show_find_all)
+        self.addAction(find_all_action)
+
         settings_action = QAction("Settings", self)
         settings_action.setShortcut(QKeySequence(Qt.CTRL + Qt.Key_Comma))
         settings_action.triggered.connect(self.show_settings)
         self.addAction(settings_action)
 
+        pin_tab_action = QAction("Pin Tab", self)
+        pin_tab_action.setShortcut(QKeySequence(Qt.CTRL + Qt.SHIFT + Qt.Key_P))
+        pin_tab_action.triggered.connect(self.toggle_pin_tab)
+        self.addAction(pin_tab_action)
+
+        hud_action = QAction("Performance HUD", self)
+        hud_action.setShortcut(QKeySequence(Qt.CTRL + Qt.SHIFT + Qt.Key_M))
+        hud_action.triggered.connect(self.metrics.toggle_hud)
+        self.addAction(hud_action)
+
+        overview_action = QAction("Tab Overview", self)
+        overview_action.setShortcut(QKeySequence(Qt.CTRL + Qt.SHIFT + Qt.Key_A))
+        overview_action.triggered.connect(self.show_tab_overview)
+        self.addAction(overview_action)
+
         print_action = QAction("Print Page", self)
         print_action.setShortcut(QKeySequence(Qt.CTRL + Qt.Key_P))
         print_action.triggered.connect(self.print_page)
@@ -826,7 +4041,6 @@ class UniBrowser(QMainWindow):
                     self.show_toast("Print not supported on this page.", success=False)
 
     def _handle_pdf_print(self, pdf_data):
-        from PyQt5.QtWidgets import QFileDialog
         if not pdf_data:
             self.show_toast("Failed to generate PDF.", success=False)
             return
@@ -844,8 +4058,14 @@ class UniBrowser(QMainWindow):
         self.find_input.setFocus()
         self.find_input.selectAll()
 
+    def show_find_all(self):
+        self.show_find_bar()
+        self.find_all_btn.setChecked(True)
+
     def hide_find_bar(self):
         self.find_bar.setVisible(False)
+        self.find_all_btn.setChecked(False)
+        self.find_timer.stop()
         self.find_input.clear()
         self.find_count_label.setText("")
         current_tab = self.tab_widget.currentWidget()
@@ -853,44 +4073,290 @@ class UniBrowser(QMainWindow):
             current_tab.webview.findText("")
 
     def eventFilter(self, obj, event):
+        if obj is self and event.type() == event.Paint:
+            startup_profile.mark("first_paint")
+            self.removeEventFilter(self)
         # ESC closes find bar
         if obj == self.find_input and event.type() == event.KeyPress and event.key() == Qt.Key_Escape:
             self.hide_find_bar()
             return True
         return super().eventFilter(obj, event)
 
+    def schedule_find(self, *args):
+        if not self.find_bar.isVisible():
+            return
+        if self.find_input.text():
+            self.find_timer.start()
+        else:
+            self.find_text()
+
     @pyqtSlot()
     def find_text(self, forward=True):
+        # A pending search for new text runs now, from the top. Searching
+        # again for the same text moves to the next (or previous) match; a
+        # new findText also cancels one still in flight. The match counter
+        # is updated from findTextFinished, see tab_find_finished.
+        pending = self.find_timer.isActive()
+        self.find_timer.stop()
         text = self.find_input.text()
         current_tab = self.tab_widget.currentWidget()
-        if not current_tab or not text:
+        if not text:
             self.find_count_label.setText("")
-            if current_tab:
-                current_tab.webview.findText("")
+        if self.find_all_btn.isChecked():
+            if pending or text != self.tab_search_text:
+                self.find_in_tabs(text)
+            else:
+                # The arrows walk the list of matching tabs
+                row = self.tab_results.currentIndex().row() + (1 if forward else -1)
+                if 0 <= row < len(self.tab_results_model.records):
+                    self.tab_results.setCurrentIndex(self.tab_results_model.index(row))
+            return
+        if not isinstance(current_tab, BrowserTab):
             return
         flags = QWebEnginePage.FindFlags()
         if not forward:
             flags |= QWebEnginePage.FindBackward
-        def found_callback(found_count):
-            if found_count == 0:
-                self.find_count_label.setText("No matches")
-            else:
-                self.find_count_label.setText(f"{found_count} match{'es' if found_count != 1 else ''}")
-        current_tab.webview.findText(text, flags, found_callback)
+        current_tab.webview.findText(text, flags)
+
+    def find_return_pressed(self):
+        if self.find_all_btn.isChecked() and not self.find_timer.isActive() \
+                and self.find_input.text() == self.tab_search_text:
+            self.open_tab_result(self.tab_results.currentIndex())
+        else:
+            self.find_text(forward=True)
+
+    def toggle_find_all(self, checked):
+        self.tab_search_text = None
+        self.tab_results_model.reset()
+        self.tab_results.setVisible(checked)
+        self.find_count_label.setText("")
+        current_tab = self.tab_widget.currentWidget()
+        if checked:
+            if isinstance(current_tab, BrowserTab):
+                current_tab.webview.findText("")
+            self.refresh_tab_text()
+        self.schedule_find()
+
+    def find_tab(self, session_id):
+        for i in range(self.tab_widget.count()):
+            if self.tab_widget.widget(i).session_id == session_id:
+                return self.tab_widget.widget(i)
+        return None
+
+    def index_tab_text(self, tab):
+        # Queues the page's text for the tab index once toPlainText delivers it
+        session_id = tab.session_id
+        url = tab.webview.url().toString()
+        title = tab.webview.page().title()
+        def indexed(text):
+            if text is not None and self.find_tab(session_id) is not None:
+                self.tab_text.put(session_id, url, title, text)
+        tab.webview.page().toPlainText(indexed)
+
+    def refresh_tab_text(self):
+        # Live tabs are re-read, since pages change after loading; tabs that
+        # never loaded are searchable by title and URL
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if isinstance(tab, BrowserTab):
+                self.index_tab_text(tab)
+            elif tab.session_id not in self.tab_text.ids:
+                self.tab_text.put(tab.session_id, tab.url, tab.title, "")
+
+    def tab_text_indexed(self):
+        # Pages read by refresh_tab_text (or loaded since) land after the
+        # panel searched: search again, keeping the selected tab
+        if not self.find_all_btn.isChecked() or not self.tab_search_text or self.find_timer.isActive():
+            return
+        current = self.tab_results.currentIndex()
+        selected = self.tab_results_model.records[current.row()]["id"] if current.isValid() else None
+        self.find_in_tabs(self.tab_search_text)
+        for row, result in enumerate(self.tab_results_model.records):
+            if result["id"] == selected:
+                self.tab_results.setCurrentIndex(self.tab_results_model.index(row))
+                break
+
+    def find_in_tabs(self, text):
+        self.tab_search_text = text
+        results = [r for r in self.tab_text.search(text) if self.find_tab(r["id"]) is not None]
+        self.tab_results_model.reset(results)
+        if results:
+            self.tab_results.setCurrentIndex(self.tab_results_model.index(0))
+            self.find_count_label.setText(f"{len(results)} tab{'s' if len(results) != 1 else ''}")
+        else:
+            self.find_count_label.setText("No tabs" if text else "")
+
+    def open_tab_result(self, index):
+        # Switches to the tab and back to finding in it, at its first match
+        if not index.isValid():
+            return
+        tab = self.find_tab(self.tab_results_model.records[index.row()]["id"])
+        if tab is None:
+            return
+        self.tab_widget.setCurrentIndex(self.tab_widget.indexOf(tab))
+        tab = self.tab_widget.currentWidget()
+        self.find_all_btn.setChecked(False)
+        if tab.load_seconds is None:
+            # Just materialized: search once it has loaded
+            def loaded(ok):
+                tab.webview.loadFinished.disconnect(loaded)
+                if tab is self.tab_widget.currentWidget() and self.find_bar.isVisible():
+                    self.find_text()
+            tab.webview.loadFinished.connect(loaded)
+        self.find_input.setFocus()
+
+    def tab_find_finished(self, tab, active, matches):
+        if tab is not self.tab_widget.currentWidget() or not self.find_input.text():
+            return
+        self.find_count_label.setText(f"{active} of {matches}" if matches else "No matches")
 
     def add_tab(self, url=None):
-        tab = BrowserTab()
+        if not url:
+            url = self.get_homepage()
+        tab = BrowserTab(private_profile=self.profile, url=url)
+        tab.session_id = self.new_session_id()
         idx = self.tab_widget.addTab(tab, "New Tab")
         self.tab_widget.setCurrentIndex(idx)
-        tab.webview.urlChanged.connect(self.update_url_bar)
-        tab.webview.loadFinished.connect(self.update_tab_title)
+        self.connect_tab_signals(tab)
         self.update_navigation_buttons()
-        if url:
-            tab.webview.setUrl(QUrl(url))
-        else:
-            tab.webview.setUrl(QUrl(self.get_homepage()))
+        self.record_tab(tab)
         return idx
 
+    def connect_tab_signals(self, tab):
+        tab.url_changed.connect(self.tab_url_changed)
+        tab.title_changed.connect(self.tab_title_changed)
+        tab.icon_changed.connect(self.tab_icon_changed)
+        tab.find_finished.connect(self.tab_find_finished)
+        tab.visited.connect(self.tab_visited)
+        tab.blocked_changed.connect(self.update_tab_tooltip)
+
+    def tab_url_changed(self, tab, url):
+        if tab is self.tab_widget.currentWidget():
+            self.update_url_bar(url)
+        self.record_tab(tab)
+
+    def tab_title_changed(self, tab, title):
+        self.update_tab_title(tab)
+        # Titles set after the load finished belong to the visit already recorded
+        if title and tab.visit_url is not None and title != tab.visit_url:
+            self.history.update_title(tab.visit_url, title)
+            self.frecency.set_title(tab.visit_url, title)
+        # Each record carries the whole back/forward list, and some pages
+        # animate their title (unread counts, timers): coalesce them
+        if self.session and tab.session_id is not None:
+            self.retitled.add(tab.session_id)
+            if not self.retitle_timer.isActive():
+                self.retitle_timer.start()
+
+    def record_retitled_tabs(self):
+        retitled, self.retitled = self.retitled, set()
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if tab.session_id in retitled:
+                self.record_tab(tab)
+
+    def tab_icon_changed(self, tab, icon):
+        idx = self.tab_widget.indexOf(tab)
+        if idx < 0:
+            return
+        if not self.private:
+            # Private windows show the page's own icon and store nothing
+            icon = self.favicons.set_icon(tab.webview.url(), icon)
+        self.tab_widget.setTabIcon(idx, icon)
+
+    def placeholder_icon(self, tab):
+        # Restored and background tabs show their site's icon before loading
+        return self.favicons.icon(tab.url) or QIcon()
+
+    def tab_visited(self, tab, url, title):
+        self.update_tab_title(tab)
+        self.add_history_entry(url, title)
+        self.index_tab_text(tab)
+
+    def new_session_id(self):
+        session_id = self.next_session_id
+        self.next_session_id += 1
+        return session_id
+
+    def tab_session_state(self, tab):
+        if isinstance(tab, LazyTab):
+            return {"id": tab.session_id, "url": tab.url, "title": tab.title, "history": tab.history_state,
+                    "pinned": tab.pinned}
+        url = tab.webview.url().toString()
+        return {"id": tab.session_id, "url": url, "title": tab.webview.page().title() or url,
+                "history": serialize_history(tab.webview.history()), "pinned": tab.pinned}
+
+    def record_tab(self, tab):
+        self.retitled.discard(tab.session_id)
+        if self.session and tab.session_id is not None:
+            record = self.tab_session_state(tab)
+            record["op"] = "tab"
+            self.session.append(record)
+            if self.session.records >= SESSION_COMPACT_RECORDS:
+                self.compact_session()
+
+    def record_tab_order(self, *args):
+        if self.session:
+            ids = [self.tab_widget.widget(i).session_id for i in range(self.tab_widget.count())]
+            self.session.append({"op": "order", "ids": ids, "active": self.tab_widget.currentIndex()})
+
+    def compact_session(self):
+        if self.session and self.session.records > 1:
+            tabs = [self.tab_session_state(self.tab_widget.widget(i)) for i in range(self.tab_widget.count())]
+            self.session.compact({"op": "snapshot", "tabs": tabs, "ids": [tab["id"] for tab in tabs],
+                                  "active": self.tab_widget.currentIndex(), "closed_tabs": self.closed_tabs})
+
+    def restore_session(self):
+        if not self.session:
+            return False
+        state = self.session.load()
+        if not state["tabs"]:
+            return False
+        self.closed_tabs = state["closed_tabs"][-CLOSED_TABS_LIMIT:]
+        # Every restored tab starts as a placeholder; only the active one gets
+        # materialized, by the currentChanged emitted below
+        self.tab_widget.blockSignals(True)
+        for saved in state["tabs"]:
+            tab = LazyTab(saved["url"], saved.get("title"))
+            tab.session_id = saved["id"]
+            tab.history_state = saved.get("history")
+            tab.pinned = bool(saved.get("pinned"))
+            self.tab_widget.addTab(tab, self.placeholder_icon(tab), self.tab_label(tab, tab.title))
+            self.next_session_id = max(self.next_session_id, tab.session_id + 1)
+        active = min(max(state["active"], 0), self.tab_widget.count() - 1)
+        self.tab_widget.setCurrentIndex(active)
+        self.tab_widget.blockSignals(False)
+        self.tab_widget.currentChanged.emit(active)
+        return True
+
+    def materialize_tab(self, idx):
+        placeholder = self.tab_widget.widget(idx)
+        if not isinstance(placeholder, LazyTab):
+            return
+        # A saved back/forward list navigates by itself when restored
+        tab = BrowserTab(private_profile=self.profile, url=None if placeholder.history_state else placeholder.url)
+        tab.session_id = placeholder.session_id
+        tab.pinned = placeholder.pinned
+        if placeholder.history_state:
+            restore_history(tab.webview.history(), placeholder.history_state)
+        if placeholder.scroll_position is not None:
+            tab.restore_scroll_position(placeholder.scroll_position)
+        self.replace_tab(idx, tab)
+        placeholder.deleteLater()
+        self.connect_tab_signals(tab)
+
+    def replace_tab(self, idx, tab):
+        # Swap the widget at idx (e.g. placeholder <-> real tab) keeping its
+        # position and the current selection, without re-emitting currentChanged
+        current = self.tab_widget.currentIndex()
+        text = self.tab_widget.tabText(idx)
+        icon = self.tab_widget.tabIcon(idx)
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(idx)
+        self.tab_widget.insertTab(idx, tab, icon, text)
+        self.tab_widget.setCurrentIndex(current)
+        self.tab_widget.blockSignals(False)
+
     def close_tab(self, idx=None):
         if self.tab_widget.count() <= 1:
             return
@@ -898,18 +4364,67 @@ class UniBrowser(QMainWindow):
             idx = self.tab_widget.currentIndex()
         # Save closed tab info for reopening
         tab = self.tab_widget.widget(idx)
-        url = tab.webview.url().toString()
-        title = tab.webview.page().title() or url
-        if not hasattr(self, 'closed_tabs'):
-            self.closed_tabs = []
+        if isinstance(tab, LazyTab):
+            url, title = tab.url, tab.title
+        else:
+            url = tab.webview.url().toString()
+            title = tab.webview.page().title() or url
         self.closed_tabs.append({'url': url, 'title': title})
+        del self.closed_tabs[:-CLOSED_TABS_LIMIT]
+        if self.session:
+            self.session.append({"op": "close", "id": tab.session_id, "closed": self.closed_tabs[-1]})
         self.tab_widget.removeTab(idx)
+        self.thumbnails.remove(tab.session_id)
+        self.tab_text.remove(tab.session_id)
+        tab.deleteLater()
+        self.record_tab_order()
 
     def reopen_closed_tab(self):
-        if hasattr(self, 'closed_tabs') and self.closed_tabs:
+        if self.closed_tabs:
             tabinfo = self.closed_tabs.pop()
+            if self.session:
+                self.session.append({"op": "reopen"})
             self.add_tab(tabinfo['url'])
 
+    def toggle_pin_tab(self):
+        current_tab = self.tab_widget.currentWidget()
+        if current_tab:
+            self.set_tab_pinned(current_tab, not current_tab.pinned)
+            self.show_toast("Tab pinned" if current_tab.pinned else "Tab unpinned", success=True)
+
+    def set_tab_pinned(self, tab, pinned):
+        # Pinned tabs are never frozen or discarded in the background, and
+        # carry a pin in the tab bar
+        tab.pinned = pinned
+        if isinstance(tab, LazyTab):
+            self.tab_widget.setTabText(self.tab_widget.indexOf(tab), self.tab_label(tab, tab.title))
+        else:
+            self.update_tab_title(tab)
+        self.record_tab(tab)
+
+    def show_tab_context_menu(self, pos):
+        idx = self.tab_widget.tabBar().tabAt(pos)
+        if idx < 0:
+            return
+        tab = self.tab_widget.widget(idx)
+        menu = QMenu()
+        pin = menu.addAction("Unpin Tab" if tab.pinned else "Pin Tab")
+        duplicate = menu.addAction("Duplicate Tab")
+        menu.addSeparator()
+        close = menu.addAction("Close Tab")
+        close.setEnabled(self.tab_widget.count() > 1)
+        action = menu.exec_(self.tab_widget.tabBar().mapToGlobal(pos))
+        # The tab may have gone while the menu was open
+        idx = self.tab_widget.indexOf(tab)
+        if action is None or idx < 0:
+            return
+        if action == pin:
+            self.set_tab_pinned(tab, not tab.pinned)
+        elif action == duplicate:
+            self.add_tab(tab.url if isinstance(tab, LazyTab) else tab.webview.url().toString())
+        elif action == close:
+            self.close_tab(idx)
+
     def duplicate_tab(self):
         current_tab = self.tab_widget.currentWidget()
         if current_tab:
@@ -920,15 +4435,48 @@ class UniBrowser(QMainWindow):
         self.tab_widget.setMovable(True)
 
     def init_history(self):
-        self.history = []
+        self.history = HistoryStore(None if self.private else HISTORY_FILE)
 
     def add_history_entry(self, url, title):
-        self.history.append({'url': url, 'title': title})
-        if len(self.history) > 200:
-            self.history.pop(0)
+        self.history.add_visit(url, title)
+        self.frecency.add(url, title)
+
+    def init_frecency(self):
+        self.frecency = FrecencyIndex()
+        now = time.time()
+        for b in self.bookmarks:
+            self.frecency.add(b["url"], b["title"], now, BOOKMARK_FRECENCY_WEIGHT)
+        # Loading every history URL can take a while on big profiles
+        threading.Thread(target=lambda: self.frecency.load(self.history.url_rows()),
+                         name="frecency-load", daemon=True).start()
+
+    def update_completions(self, text):
+        self.completion_model.clear()
+        for match in self.frecency.complete(text):
+            item = QStandardItem(f'{match["title"]}  |  {match["url"]}' if match["title"] else match["url"])
+            item.setData(match["url"], Qt.UserRole)
+            icon = self.favicons.icon(match["url"])
+            if icon is not None:
+                item.setIcon(icon)
+            self.completion_model.appendRow(item)
+        # Warm up whatever Enter would open: the top match or the typed URL/search
+        first = self.completion_model.item(0)
+        if first is not None:
+            self.preconnector.preconnect(first.data(Qt.UserRole))
+        elif text.strip():
+            self.preconnector.preconnect(omnibox_url(text))
+        if self.completion_model.rowCount():
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
 
     def show_history(self):
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout, QLabel, QAbstractItemView
+        if self.history_dialog is None:
+            self.history_dialog = self.build_history_dialog()
+        self.history_dialog.refresh()
+        self.history_dialog.exec_()
+
+    def build_history_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("History")
         dlg.setFixedWidth(600)
@@ -937,53 +4485,104 @@ class UniBrowser(QMainWindow):
         title.setStyleSheet("font-size:20px;font-weight:600;color:#1a73e8;padding:10px 0 18px 0;letter-spacing:0.5px;")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
-        listw = QListWidget()
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Search history...")
+        filter_edit.setClearButtonEnabled(True)
+        layout.addWidget(filter_edit)
+        def fetch(last):
+            # Next page of visits from the store, older than the last row shown
+            return self.history.page(HISTORY_PAGE_SIZE, (last['visit_time'], last['id']) if last else None)
+        model = RecordListModel(lambda h: f'{h["title"]}  |  {h["url"]}', fetch, parent=dlg,
+                                decoration=lambda h: self.favicons.icon(h["url"]))
+        listw = QListView()
+        listw.setModel(model)
+        listw.setUniformItemSizes(True)
         listw.setSelectionMode(QAbstractItemView.SingleSelection)
-        for h in reversed(self.history):
-            listw.addItem(f'{h["title"]}  |  {h["url"]}')
+        self.watch_list_targets(listw, model)
+        self.add_open_menu(listw, model, dlg)
+        def apply_filter(text):
+            if text.strip():
+                model.reset(self.history.search(text))
+            else:
+                model.reset(paged=True)
+        def update():
+            # On re-open only the visits recorded since the newest loaded row
+            # are fetched; a long absence just starts over from the first page
+            text = filter_edit.text()
+            if text.strip() or not model.records:
+                apply_filter(text)
+                return
+            newest = model.records[0]
+            rows = self.history.page(HISTORY_PAGE_SIZE, after=(newest['visit_time'], newest['id']))
+            if len(rows) < HISTORY_PAGE_SIZE:
+                model.prepend(rows)
+            else:
+                model.reset(paged=True)
+        def refresh():
+            # Show what is committed now and catch up once the writer's
+            # pending batch lands, instead of waiting for it here
+            update()
+            self.history.flush_soon()
+        def flushed():
+            if dlg.isVisible():
+                update()
+        self.history.flushed.connect(flushed, Qt.QueuedConnection)
+        dlg.refresh = refresh
+        filter_edit.textChanged.connect(apply_filter)
         layout.addWidget(listw)
         btn_layout = QHBoxLayout()
         open_btn = QPushButton("Open")
+        background_btn = QPushButton("Open in Background")
         clear_btn = QPushButton("Clear History")
         close_btn = QPushButton("Close")
         btn_layout.addWidget(open_btn)
+        btn_layout.addWidget(background_btn)
         btn_layout.addWidget(clear_btn)
         btn_layout.addWidget(close_btn)
         layout.addLayout(btn_layout)
         def open_selected():
-            idx = listw.currentRow()
-            if idx >= 0:
-                self.load_url_from_string(self.history[::-1][idx]["url"])
+            index = listw.currentIndex()
+            if index.isValid():
+                self.load_url_from_string(model.records[index.row()]["url"])
                 dlg.accept()
+        def open_in_background():
+            index = listw.currentIndex()
+            if index.isValid():
+                self.open_in_new_tab(model.records[index.row()]["url"], background=True)
         def clear_history():
             self.history.clear()
-            listw.clear()
+            model.reset()
         open_btn.clicked.connect(open_selected)
+        listw.activated.connect(open_selected)
+        background_btn.clicked.connect(open_in_background)
         clear_btn.clicked.connect(clear_history)
         close_btn.clicked.connect(dlg.accept)
-        dlg.exec_()
-
-    def add_tab(self):
-        tab = BrowserTab()
-        idx = self.tab_widget.addTab(tab, "New Tab")
-        self.tab_widget.setCurrentIndex(idx)
-        tab.webview.urlChanged.connect(self.update_url_bar)
-        tab.webview.loadFinished.connect(self.update_tab_title)
-        self.update_navigation_buttons()
+        return dlg
 
-    def close_tab(self, idx=None):
-        if self.tab_widget.count() <= 1:
-            return
-        if idx is None:
-            idx = self.tab_widget.currentIndex()
-        # Save closed tab info for reopening
-        tab = self.tab_widget.widget(idx)
-        url = tab.webview.url().toString()
-        title = tab.webview.page().title() or url
-        if not hasattr(self, 'closed_tabs'):
-            self.closed_tabs = []
-        self.closed_tabs.append({'url': url, 'title': title})
-        self.tab_widget.removeTab(idx)
+    def closeEvent(self, event):
+        # Commit any pending history and settings writes before the window goes away
+        self.history.close()
+        self.prerender.clear()
+        self.thumbnails.close()
+        self.tab_text.close()
+        self.bookmarks.close()
+        self.config.flush()
+        if self.session:
+            # The snapshot carries every tab's current title
+            self.retitle_timer.stop()
+            self.compact_session()
+            self.session.close()
+        if self.profile is not None:
+            # Pages must be gone before their off-the-record profile. Without
+            # currentChanged, nothing selects (and materializes) the next tab.
+            self.tab_widget.blockSignals(True)
+            while self.tab_widget.count():
+                tab = self.tab_widget.widget(0)
+                self.tab_widget.removeTab(0)
+                tab.deleteLater()
+            self.preconnector.close()
+            self.profile.deleteLater()
+        super().closeEvent(event)
 
     def close_current_tab(self):
         self.close_tab(self.tab_widget.currentIndex())
@@ -1020,16 +4619,7 @@ class UniBrowser(QMainWindow):
         url = self.url_bar.text().strip()
         if not url:
             return
-            
-        # Improved URL detection
-        if url.startswith("http://") or url.startswith("https://") or url.startswith("file://"):
-            final_url = url
-        elif url.startswith("www.") or ("." in url and " " not in url and len(url.split(".")) >= 2):
-            final_url = "https://" + url
-        else:
-            # Search DuckDuckGo
-            final_url = DUCKDUCKGO_URL + url.replace(" ", "+")
-        
+        final_url = omnibox_url(url)
         current_tab = self.tab_widget.currentWidget()
         if current_tab:
             current_tab.webview.setUrl(QUrl(final_url))
@@ -1043,24 +4633,46 @@ class UniBrowser(QMainWindow):
             self.url_bar.setText(url.toString())
         self.update_navigation_buttons()
 
-    def update_tab_title(self):
-        current_tab = self.tab_widget.currentWidget()
-        if current_tab:
-            idx = self.tab_widget.currentIndex()
-            title = current_tab.webview.page().title()
-            if not title or title.strip() == "":
-                title = "Loading..."
-            # Truncate for fixed width tabs
-            if len(title) > 15:
-                title = title[:12] + "..."
-            self.tab_widget.setTabText(idx, title)
-            # Add to history
-            url = current_tab.webview.url().toString()
-            self.add_history_entry(url, title)
+    def update_tab_title(self, tab):
+        idx = self.tab_widget.indexOf(tab)
+        if idx < 0:
+            return
+        title = tab.webview.page().title()
+        if not title or title.strip() == "":
+            title = "Loading..."
+        self.update_tab_tooltip(tab)
+        self.tab_widget.setTabText(idx, self.tab_label(tab, title))
+
+    def update_tab_tooltip(self, tab):
+        idx = self.tab_widget.indexOf(tab)
+        if idx < 0:
+            return
+        title = tab.webview.page().title()
+        if not title or title.strip() == "":
+            title = "Loading..."
+        blocked = self.blocked_requests(tab)
+        self.tab_widget.setTabToolTip(idx, f"{title}\n{blocked} request{'s' if blocked != 1 else ''} blocked")
+
+    def blocked_requests(self, tab):
+        # Requests the ad blocker stopped for the page currently shown in a tab
+        if isinstance(tab, LazyTab):
+            return 0
+        return tab.interceptor.blocked
+
+    def tab_label(self, tab, title):
+        return "📌 " + self.elide_tab_title(title) if tab.pinned else self.elide_tab_title(title)
+
+    def elide_tab_title(self, title):
+        # Truncate for fixed width tabs
+        if len(title) > 15:
+            title = title[:12] + "..."
+        return title
 
     def focus_url_bar(self):
         self.url_bar.setFocus()
         self.url_bar.selectAll()
+        # Most typing in the URL bar ends in a search
+        self.preconnector.preconnect(DUCKDUCKGO_URL)
 
     def toggle_max_restore(self):
         if self.isMaximized():
@@ -1081,9 +4693,10 @@ class UniBrowser(QMainWindow):
             self.old_pos = event.globalPos()
 
     def open_private_window(self):
-        import subprocess, sys
-        # Launch a new process in private mode
-        subprocess.Popen([sys.executable, __file__, "--private"])
+        # Same process, separate off-the-record profile
+        window = UniBrowser(private=True)
+        self.private_windows.append(window)
+        window.destroyed.connect(lambda: self.private_windows.remove(window))
 
     def show_urlbar_context_menu(self, pos):
         menu = QMenu()
@@ -1106,42 +4719,94 @@ class UniBrowser(QMainWindow):
             self.url_bar.clear()
 
     def show_settings(self):
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QPushButton, QLabel, QHBoxLayout, QMessageBox
+        if self.settings_dialog is None:
+            self.settings_dialog = self.build_settings_dialog()
+        self.settings_dialog.refresh()
+        self.settings_dialog.exec_()
+
+    def build_settings_dialog(self):
         dlg = QDialog(self)
         dlg.setWindowTitle("Settings")
-        dlg.setFixedWidth(420)
+        dlg.setFixedWidth(520)
         layout = QVBoxLayout(dlg)
         title = QLabel("⚙️ Settings", dlg)
         title.setStyleSheet("font-size:20px;font-weight:600;color:#1a73e8;padding:10px 0 18px 0;letter-spacing:0.5px;")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         home_label = QLabel("Home page URL:")
-        home_edit = QLineEdit(self.get_homepage())
+        home_edit = QLineEdit()
         home_edit.setPlaceholderText("https://duckduckgo.com")
         home_edit.setStyleSheet('font-size:15px; padding:4px 8px; border-radius:6px; border:1px solid #d0d0d0;')
         layout.addWidget(home_label)
         layout.addWidget(home_edit)
+        cache_form = QFormLayout()
+        cache_type = QComboBox()
+        cache_type.addItem("Disk", "disk")
+        cache_type.addItem("Memory only", "memory")
+        cache_type.addItem("No cache", "none")
+        cache_path = QLineEdit()
+        cache_path.setPlaceholderText(default_cache_path(QWebEngineProfile.defaultProfile()))
+        cache_size = QSpinBox()
+        cache_size.setRange(0, CACHE_MAX_SIZE_MB)
+        cache_size.setSuffix(" MB")
+        cache_size.setSpecialValueText("Automatic")
+        cookies = QComboBox()
+        cookies.addItem("Keep cookies", "persistent")
+        cookies.addItem("Session cookies only", "session")
+        cookies.addItem("Keep all cookies, incl. session cookies", "force")
+        clear_cache_btn = QPushButton("Clear Cache")
+        clear_cache_btn.clicked.connect(self.clear_cache)
+        cache_form.addRow("HTTP cache:", cache_type)
+        cache_form.addRow("Cache folder:", cache_path)
+        cache_form.addRow("Max cache size:", cache_size)
+        cache_form.addRow("Cookies:", cookies)
+        cache_form.addRow("", clear_cache_btn)
+        layout.addLayout(cache_form)
+        if self.private:
+            # Private windows always cache in memory and keep cookies for the session only
+            for widget in (cache_type, cache_path, cookies):
+                widget.setEnabled(False)
         btn_layout = QHBoxLayout()
         save_btn = QPushButton("Save")
         close_btn = QPushButton("Close")
         btn_layout.addWidget(save_btn)
         btn_layout.addWidget(close_btn)
         layout.addLayout(btn_layout)
+        def refresh():
+            home_edit.setText(self.get_homepage())
+            cache = cache_settings(self.config)
+            cache_type.setCurrentIndex(max(cache_type.findData(cache["type"]), 0))
+            cache_path.setText(cache["path"])
+            cache_size.setValue(int(cache["max_size_mb"]))
+            cookies.setCurrentIndex(max(cookies.findData(cache["cookies"]), 0))
         def save():
             url = home_edit.text().strip()
             if url:
                 self.set_homepage(url)
-                QMessageBox.information(dlg, "Settings", "Homepage saved.")
-                dlg.accept()
+            self.config.set("cache", {
+                "type": cache_type.currentData(),
+                "path": cache_path.text().strip(),
+                "max_size_mb": cache_size.value(),
+                "cookies": cookies.currentData(),
+            })
+            QMessageBox.information(dlg, "Settings", "Settings saved.")
+            dlg.accept()
+        dlg.refresh = refresh
         save_btn.clicked.connect(save)
         close_btn.clicked.connect(dlg.reject)
-        dlg.exec_()
+        return dlg
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--private", action="store_true", help="Start in private/incognito mode")
+    parser.add_argument("--profile-startup", metavar="PATH", nargs="?", const="-",
+                        help="Write startup phase timings as JSON to PATH (default: stdout) once the first page loads")
+    parser.add_argument("--quit-after-startup", action="store_true", help="Exit after --profile-startup has written its report")
     args = parser.parse_args()
+    if args.profile_startup:
+        startup_profile.start(args.profile_startup, args.quit_after_startup)
     app = QApplication(sys.argv)
+    startup_profile.mark("qapplication")
     browser = UniBrowser(private=args.private)
     sys.exit(app.exec_())
\ No newline at end of file